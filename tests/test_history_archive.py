@@ -0,0 +1,50 @@
+from utils.history_archive import HistoryArchive
+from utils.history_entry import HistoryEntry, new_id
+from utils.history_manager import HistoryManager
+
+
+def make_entries(start, count, calculator_type="Basic"):
+    return [HistoryEntry(new_id(), 1e9 + number, calculator_type, f"{number}+1", str(number + 1))
+            for number in range(start, start + count)]
+
+
+def test_segments_round_trip(tmp_path):
+    for compression in ("gzip", "lzma"):
+        archive = HistoryArchive(str(tmp_path / compression), compression)
+        archive.write_segment(make_entries(0, 10))
+        archive.write_segment(make_entries(10, 5, "Scientific"))
+        assert [count for _, _, count, _ in archive.segments()] == [10, 5]
+
+        newest_first = list(archive.iter_newest_first())
+        assert [entry.input for entry in newest_first] == [f"{number}+1" for number in range(14, -1, -1)]
+        assert archive.count() == 15 and archive.count("Scientific") == 5
+        assert [entry.input for entry in archive.window(3, 4)] == ["11+1", "10+1", "9+1", "8+1"]
+        assert [entry.input for entry in archive.window(1, 2, "Scientific")] == ["13+1", "12+1"]
+
+        # A fresh archive object reads what was written
+        assert [entry.id for entry in HistoryArchive(archive.archive_dir).iter_newest_first()] == \
+            [entry.id for entry in newest_first]
+
+
+def test_archived_entries_survive_reopening(tmp_path):
+    history_file = str(tmp_path / "history.json")
+    archive_dir = str(tmp_path / "archive")
+    history_manager = HistoryManager(history_file, backend="journal", archive_dir=archive_dir)
+    for number in range(2500):
+        history_manager.add_entry("Basic", f"{number}+1", str(number + 1))
+    assert history_manager.archive.has_entries()
+    window = [entry.id for entry in history_manager.get_window(990, 20)]
+    deleted = history_manager.get_window(2000, 1)[0]
+    history_manager.delete_entry(deleted.id)
+    history_manager.close()
+
+    history_manager = HistoryManager(history_file, backend="journal", archive_dir=archive_dir)
+    try:
+        # Loads the rest of the hot tier, which is read lazily
+        assert [entry.id for entry in history_manager.get_window(990, 20)] == window
+        assert history_manager.count_history() == 2499
+        assert history_manager.get_entry(deleted.id) is None
+        inputs = [entry.input for chunk in history_manager.iter_history() for entry in chunk]
+        assert inputs == [f"{number}+1" for number in range(2500) if number != 499]
+    finally:
+        history_manager.close()
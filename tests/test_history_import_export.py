@@ -0,0 +1,41 @@
+import time
+
+from utils.history_export import HistoryExport
+from utils.history_import import HistoryImport
+from utils.history_manager import HistoryManager
+
+
+def wait(task):
+    deadline = time.monotonic() + 30
+    while not task.finished and time.monotonic() < deadline:
+        time.sleep(0.01)
+    assert task.finished and task.error is None
+    return task
+
+
+def make_manager(tmp_path, name, count=0):
+    history_manager = HistoryManager(str(tmp_path / f"{name}.json"), backend="journal",
+                                     archive_dir=str(tmp_path / f"{name}-archive"))
+    for number in range(count):
+        history_manager.add_entry("Basic", f"{number}*3", str(number * 3))
+    return history_manager
+
+
+def test_import_of_export_adds_nothing_twice(tmp_path):
+    source = make_manager(tmp_path, "source", 1500)
+    for export_format in ("jsonl", "csv"):
+        path = str(tmp_path / f"export.{export_format}")
+        export = wait(HistoryExport(source, path, export_format).start())
+        assert export.written == 1500
+
+        # Back into the history it came from: every entry is already there
+        assert wait(HistoryImport(source, [path]).start()).stats["added"] == 0, export_format
+        assert source.count_history() == 1500
+
+    target = make_manager(tmp_path, "target")
+    path = str(tmp_path / "export.jsonl")
+    assert wait(HistoryImport(target, [path]).start()).stats["added"] == 1500
+    assert wait(HistoryImport(target, [path, path]).start()).stats["added"] == 0
+    assert target.count_history() == 1500
+    assert [entry.id for entry in target.get_window(0, 1500)] == \
+        [entry.id for entry in source.get_window(0, 1500)]
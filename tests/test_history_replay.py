@@ -0,0 +1,35 @@
+from utils.history_entry import HistoryEntry, new_id
+from utils.history_manager import HistoryManager
+from utils.history_replay import load_entries, parse_history
+from utils.history_stores import create_store
+
+
+def make_entries(count):
+    return [HistoryEntry(new_id(), 1e9 + number, "Basic", f"{number} + 1", str(number + 1))
+            for number in range(count)]
+
+
+def test_load_entries_reads_past_max_entries(tmp_path):
+    for backend in ("json", "journal", "sqlite", "binary"):
+        history_file = str(tmp_path / f"{backend}.json")
+        entries = make_entries(5000)
+        store = create_store(backend, history_file)
+        store.save(entries)
+        store.close()
+
+        loaded = load_entries(history_file, backend)
+        assert [entry.input for entry in loaded] == [entry.input for entry in entries], backend
+        operations, skipped = parse_history(loaded)
+        assert len(operations) == 5000 and not skipped
+
+
+def test_load_entries_includes_archive(tmp_path):
+    history_file = str(tmp_path / "history.json")
+    archive_dir = str(tmp_path / "archive")
+    history_manager = HistoryManager(history_file, backend="journal", archive_dir=archive_dir)
+    for number in range(2500):
+        history_manager.add_entry("Basic", f"{number} + 1", str(number + 1))
+    history_manager.close()
+
+    loaded = load_entries(history_file, "journal", archive_dir)
+    assert [entry.input for entry in loaded] == [f"{number} + 1" for number in range(2500)]
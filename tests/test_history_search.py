@@ -0,0 +1,57 @@
+import time
+
+from utils.history_manager import HistoryManager
+from utils.history_view import HistoryView
+
+
+def wait_for_index(archive):
+    deadline = time.monotonic() + 10
+    while not archive.search_index.ready and time.monotonic() < deadline:
+        time.sleep(0.01)
+    assert archive.search_index.ready
+
+
+def make_manager(tmp_path):
+    history_manager = HistoryManager(str(tmp_path / "history.json"), backend="journal",
+                                     archive_dir=str(tmp_path / "archive"))
+    for number in range(3000):
+        history_manager.add_entry("Basic", f"{number}*7", str(number * 7))
+    return history_manager
+
+
+def test_archive_search_matches_scan(tmp_path):
+    history_manager = make_manager(tmp_path)
+    archive = history_manager.archive
+    scanned = [entry._id for entry in history_manager.search_history("99*7")]
+
+    history_manager.prepare_search()
+    wait_for_index(archive)
+    assert [entry._id for entry in history_manager.search_history("99*7")] == scanned
+    newest = history_manager.search_history("99*7", limit=3, newest_first=True)
+    assert [entry.input for entry in newest] == ["2999*7", "2899*7", "2799*7"]
+
+    # Kept up to date as archived entries are deleted and more are archived
+    oldest = history_manager.search_history("99*7", limit=1)[0]
+    assert oldest.input == "99*7"
+    history_manager.delete_entry(oldest._id)
+    for number in range(3000, 4000):
+        history_manager.add_entry("Basic", f"{number}*7", str(number * 7))
+    found = [entry.input for entry in history_manager.search_history("99*7")]
+    assert "99*7" not in found and "199*7" in found and "3099*7" in found
+    assert len(found) == len(set(found)) == 39
+
+
+def test_view_pages_search_results(tmp_path):
+    history_manager = make_manager(tmp_path)
+    view = HistoryView(history_manager)
+    view.set_filter(None, "*7")
+    view.SEARCH_PAGE = 50
+
+    assert len(view) == 51
+    assert view.rows(0, 2)[0]["input"] == "2999*7"
+    rows = view.rows(100, 10)
+    assert [row["input"] for row in rows] == [f"{2899 - n}*7" for n in range(10)]
+    assert not view.matches_complete and len(view) > 110
+
+    view.set_sort("input", descending=False)
+    assert len(view) == 3000 and view.matches_complete
@@ -0,0 +1,23 @@
+from utils.history_manager import HistoryManager
+from utils.history_view import HistoryView
+
+
+def test_sorted_view_reports_archived_entries(tmp_path):
+    history_manager = HistoryManager(str(tmp_path / "history.json"), backend="journal",
+                                     archive_dir=str(tmp_path / "archive"))
+    for number in range(2500):
+        history_manager.add_entry("Basic", str(number), str(number * 2))
+    view = HistoryView(history_manager)
+    assert len(view) == 2500 and view.partial_order() is None
+
+    view.set_sort("input", descending=False)
+    # The order covers the hot tier, but the total still counts the archive
+    assert history_manager.count_history() == 2500
+    assert view.partial_order() == (1000, 2500)
+    rows = view.rows(0, 1000)
+    assert [row["input"] for row in rows] == [str(number) for number in range(1500, 2500)]
+
+    # Searches are sorted in full
+    view.set_filter(None, "99")
+    assert view.partial_order() is None
+    assert view.rows(0, 2)[0]["input"] == "99"
@@ -0,0 +1,56 @@
+from utils.history_entry import HistoryEntry, new_id
+from utils.history_stores import create_store
+
+BACKENDS = ("json", "journal", "sqlite", "binary", "binary+zlib", "binary+lzma")
+
+
+def make_entries(count):
+    return [HistoryEntry(new_id(), 1e9 + number, "Scientific", f"sin({number})", f"{number}.5")
+            for number in range(count)]
+
+
+def reload(backend, history_file):
+    store = create_store(backend, history_file)
+    try:
+        return [(entry.id, entry.type, entry.input, entry.result) for entry in store.load()]
+    finally:
+        store.close()
+
+
+def rows(entries):
+    return [(entry.id, entry.type, entry.input, entry.result) for entry in entries]
+
+
+def test_store_round_trip(tmp_path):
+    for backend in BACKENDS:
+        history_file = str(tmp_path / f"{backend}.json")
+        entries = make_entries(20)
+        history = []
+        store = create_store(backend, history_file)
+        for entry in entries:
+            history.append(entry)
+            store.append(entry, history)
+        removed = {entries[3].id, entries[7].id}
+        history = [entry for entry in history if entry.id not in removed]
+        store.remove(removed, history)
+        store.close()
+        assert reload(backend, history_file) == rows(history), backend
+
+        store = create_store(backend, history_file)
+        store.clear()
+        store.close()
+        assert reload(backend, history_file) == [], backend
+
+        store = create_store(backend, history_file)
+        store.save(entries)
+        store.close()
+        assert reload(backend, history_file) == rows(entries), backend
+
+
+def test_binary_store_migrates_json(tmp_path):
+    history_file = str(tmp_path / "history.json")
+    entries = make_entries(5)
+    store = create_store("json", history_file)
+    store.save(entries)
+    assert reload("binary", history_file) == rows(entries)
+    assert reload("sqlite", history_file) == rows(entries)
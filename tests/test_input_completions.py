@@ -0,0 +1,48 @@
+import random
+import time
+
+from utils.history_entry import HistoryEntry, new_id
+from utils.history_manager import HistoryManager
+from utils.input_completions import InputCompletions
+
+WORDS = ["sin(x)", "sinh(x)", "Sin(x)", "sqrt(x)", "s", "tan(x)", "x^2", "12+3", "12*4"]
+
+
+def test_remove_matches_rebuild():
+    rng = random.Random(5)
+    entries = sorted(
+        (HistoryEntry(new_id(), 1e9 + rng.random() * 1e6, "Basic", rng.choice(WORDS), "")
+         for _ in range(500)),
+        key=lambda entry: entry.epoch
+    )
+    completions = InputCompletions()
+    completions.build(entries)
+    for _ in range(450):
+        completions.remove(entries.pop(rng.randrange(len(entries))))
+
+    rebuilt = InputCompletions()
+    rebuilt.build(entries)
+    for prefix in ("", "s", "si", "x", "1"):
+        assert completions.suggest(prefix, "Basic") == rebuilt.suggest(prefix, "Basic")
+
+
+def test_suggestions_include_archive(tmp_path):
+    history_manager = HistoryManager(str(tmp_path / "history.json"), backend="journal",
+                                     archive_dir=str(tmp_path / "archive"))
+    history_manager.add_entry("Graph Plotter", "zeta(x)", "Plotted")
+    for number in range(1500):
+        history_manager.add_entry("Basic", f"{number}+1", str(number + 1))
+
+    # Built in the background, without blocking the caller
+    assert history_manager.suggest_inputs("ze") == []
+    history_manager.add_entry("Basic", "zz", "0")
+    deadline = time.monotonic() + 10
+    while history_manager.completions_log is not None and time.monotonic() < deadline:
+        time.sleep(0.01)
+    assert history_manager.suggest_inputs("z") == ["zz", "zeta(x)"]
+
+    archived = history_manager.get_window(1500, 1)[0]
+    assert archived["input"] == "0+1"
+    assert history_manager.suggest_inputs("0+", "Basic") == ["0+1"]
+    history_manager.delete_entry(archived["id"])
+    assert history_manager.suggest_inputs("0+", "Basic") == []
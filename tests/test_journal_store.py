@@ -0,0 +1,62 @@
+import multiprocessing
+import os
+
+from utils.history_manager import HistoryManager
+from utils.history_stores import JournalHistoryStore
+
+
+def test_journal_round_trip(tmp_path):
+    path = str(tmp_path / "history.json")
+    history_manager = HistoryManager(path, backend="journal")
+    first = history_manager.add_entry("Basic", "1+1", "2")
+    history_manager.add_entry("Basic", "2+2", "4")
+    history_manager.delete_entry(first["id"])
+    history_manager.close()
+
+    entries = JournalHistoryStore(path).load()
+    assert [entry.input for entry in entries] == ["2+2"]
+
+
+def _add_after_compaction(path, loaded, compacted):
+    history_manager = HistoryManager(path, backend="journal")
+    # Leaves this process's journal handle open on the current journal
+    history_manager.add_entry("Basic", "B before", "B")
+    loaded.set()
+    compacted.wait(10)
+    # Sees the rotated journal and reloads, then writes its own entry
+    history_manager.sync_external()
+    history_manager.add_entry("Basic", "from B", "B")
+    history_manager.close()
+
+
+def test_write_after_other_process_compacts(tmp_path):
+    path = str(tmp_path / "history.json")
+    history_manager = HistoryManager(path, backend="journal")
+    for number in range(10):
+        history_manager.add_entry("Basic", str(number), str(number))
+
+    context = multiprocessing.get_context("spawn")
+    loaded = context.Event()
+    compacted = context.Event()
+    other = context.Process(target=_add_after_compaction, args=(path, loaded, compacted))
+    other.start()
+    try:
+        assert loaded.wait(30)
+        history_manager.sync_external()
+        history_manager.store.compact(history_manager.history)
+        history_manager.store.compaction_thread.join()
+        compacted.set()
+        other.join(30)
+    finally:
+        if other.is_alive():
+            other.terminate()
+    assert other.exitcode == 0
+
+    history_manager.sync_external()
+    assert "from B" in [entry.input for entry in history_manager.history]
+    history_manager.close()
+
+    entries = JournalHistoryStore(path).load()
+    assert len(entries) == 12
+    assert {"B before", "from B"} <= {entry.input for entry in entries}
+    assert not os.path.exists(path + ".journal.old")
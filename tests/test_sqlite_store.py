@@ -0,0 +1,65 @@
+import sqlite3
+
+from utils.history_entry import HistoryEntry, new_id
+from utils.history_sort import sort_value
+from utils.sqlite_history_store import FTS_SCHEMA, SqliteHistoryStore
+
+# The layout before the sort key columns, indexed on functions only the
+# store defined
+OLD_SCHEMA = """
+CREATE TABLE history (
+    seq INTEGER PRIMARY KEY,
+    id TEXT NOT NULL UNIQUE,
+    timestamp TEXT NOT NULL,
+    type TEXT NOT NULL,
+    input TEXT NOT NULL,
+    result TEXT NOT NULL
+);
+CREATE INDEX history_input_sort ON history (sort_number(input) IS NULL, sort_number(input), timestamp);
+PRAGMA user_version = 1;
+"""
+
+INPUTS = ["10", "9", "b", "A", "2.5", "nan", "-1"]
+
+
+def make_entries():
+    return [HistoryEntry(new_id(), 1e9 + number, "Basic", text, text) for number, text in enumerate(INPUTS)]
+
+
+def test_sort_columns_order_like_history_sort(tmp_path):
+    store = SqliteHistoryStore(str(tmp_path / "history.db"))
+    store.append_many(make_entries())
+    ordered = [entry.input for entry in store.query(order_by="input")]
+    assert ordered == sorted(INPUTS, key=sort_value)
+    assert [entry.result for entry in store.query(order_by="result", newest_first=True)] == ordered[::-1]
+    store.close()
+
+    # Other clients can write without the store's functions
+    conn = sqlite3.connect(str(tmp_path / "history.db"))
+    conn.execute("DELETE FROM history WHERE input = '9'")
+    conn.execute("UPDATE history SET type = 'Scientific'")
+    conn.commit()
+    conn.close()
+
+
+def test_old_database_is_migrated(tmp_path):
+    path = str(tmp_path / "history.db")
+    conn = sqlite3.connect(path)
+    conn.create_function("sort_number", 1, lambda value: None, deterministic=True)
+    conn.executescript(OLD_SCHEMA + FTS_SCHEMA.replace("UPDATE OF input, result ON", "UPDATE ON"))
+    for entry in make_entries():
+        conn.execute("INSERT INTO history (id, timestamp, type, input, result) VALUES (?, ?, ?, ?, ?)",
+                     (entry.id, entry.isoformat(), entry.type, entry.input, entry.result))
+    conn.commit()
+    conn.close()
+
+    store = SqliteHistoryStore(path, legacy_json_file=str(tmp_path / "missing.json"))
+    assert [entry.input for entry in store.query(order_by="input")] == sorted(INPUTS, key=sort_value)
+    assert [entry.input for entry in store.query(search="nan")] == ["nan"]
+    store.close()
+
+    conn = sqlite3.connect(path)
+    assert conn.execute("PRAGMA user_version").fetchone()[0] == 3
+    conn.execute("DELETE FROM history")
+    conn.commit()
+    conn.close()
@@ -0,0 +1,84 @@
+import datetime
+import os
+import time
+
+from utils.history_entry import HistoryEntry, new_id
+from utils.history_stores import JournalHistoryStore
+from utils.write_behind import WriteBehindStore
+
+
+def make_entry(text):
+    return HistoryEntry(new_id(), datetime.datetime.now(), "Basic", text, text)
+
+
+def wait_for(condition, timeout):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if condition():
+            return True
+        time.sleep(0.01)
+    return condition()
+
+
+def test_every_t_flushes_within_interval(tmp_path):
+    inner = JournalHistoryStore(str(tmp_path / "history.json"))
+    store = WriteBehindStore(inner, "every_t", interval=0.2)
+    try:
+        # Let the writer fall asleep with nothing queued first
+        time.sleep(0.3)
+        history = []
+        for text in ("1+1", "2+2"):
+            entry = make_entry(text)
+            history.append(entry)
+            store.append(entry, history)
+
+        assert wait_for(lambda: store.stats()["flushes"] >= 1, 1.0)
+        assert store.stats()["queue_depth"] == 0
+        assert os.path.exists(inner.journal_file)
+    finally:
+        store.close()
+
+    reloaded = JournalHistoryStore(str(tmp_path / "history.json")).load()
+    assert [entry.input for entry in reloaded] == ["1+1", "2+2"]
+
+
+def test_every_t_waits_for_interval(tmp_path):
+    store = WriteBehindStore(JournalHistoryStore(str(tmp_path / "history.json")), "every_t", interval=0.5)
+    try:
+        entry = make_entry("1+1")
+        store.append(entry, [entry])
+        time.sleep(0.1)
+        assert store.stats()["flushes"] == 0
+        assert wait_for(lambda: store.stats()["flushes"] == 1, 1.5)
+    finally:
+        store.close()
+
+
+def test_every_n_flushes_full_batches(tmp_path):
+    store = WriteBehindStore(JournalHistoryStore(str(tmp_path / "history.json")), "every_n", batch_size=3)
+    try:
+        history = []
+        for number in range(5):
+            entry = make_entry(str(number))
+            history.append(entry)
+            store.append(entry, history)
+            if number == 2:
+                assert wait_for(lambda: store.stats()["flushes"] == 1, 1.0)
+
+        time.sleep(0.1)
+        assert store.stats()["flushes"] == 1
+        assert store.stats()["queue_depth"] == 2
+    finally:
+        store.close()
+
+
+def test_on_exit_writes_on_close(tmp_path):
+    path = str(tmp_path / "history.json")
+    store = WriteBehindStore(JournalHistoryStore(path), "on_exit")
+    entry = make_entry("1+1")
+    store.append(entry, [entry])
+    time.sleep(0.1)
+    assert store.stats()["flushes"] == 0
+    store.close()
+
+    assert [entry.input for entry in JournalHistoryStore(path).load()] == ["1+1"]
@@ -1,5 +1,6 @@
 import tkinter as tk
 from tkinter import ttk, messagebox
+import datetime
 import os
 import sys
 
@@ -31,7 +32,12 @@ class CalculatorApp:
         
         # Initialize theme and history managers
         self.theme_manager = ThemeManager(self.root)
-        self.history_manager = HistoryManager()
+        self.history_manager = HistoryManager(
+            backend="journal",
+            durability="every_t",
+            ttl=datetime.timedelta(days=90),
+            archive_dir="calculator_history_archive"
+        )
         
         # Create main container
         self.main_container = ttk.Frame(self.root)
@@ -81,6 +87,21 @@ class CalculatorApp:
         # Set up keyboard shortcuts
         self.setup_shortcuts()
         
+        # Make sure history is flushed when the window closes
+        self.root.protocol("WM_DELETE_WINDOW", self.on_close)
+        
+        # Pick up calculations made in other CalcVersee windows
+        self.root.after(1000, self.sync_history)
+    
+    def sync_history(self):
+        # The history tab updates itself from the manager's change events
+        self.history_manager.sync_external()
+        self.root.after(1000, self.sync_history)
+    
+    def on_close(self):
+        self.history_manager.close()
+        self.root.destroy()
+        
     def toggle_theme(self):
         current_theme = self.theme_manager.current_theme
         new_theme = "dark" if current_theme == "light" else "light"
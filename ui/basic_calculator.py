@@ -2,6 +2,8 @@ import tkinter as tk
 from tkinter import ttk
 import math
 
+from utils.calculations import apply_operator
+
 class BasicCalculatorFrame(ttk.Frame):
     def __init__(self, parent, history_manager):
         super().__init__(parent, padding="10")
@@ -167,18 +169,7 @@ class BasicCalculatorFrame(ttk.Frame):
             expression = f"{self.first_number} {self.current_operation} {second_number}"
             
             try:
-                if self.current_operation == "+":
-                    self.result = self.first_number + second_number
-                elif self.current_operation == "-":
-                    self.result = self.first_number - second_number
-                elif self.current_operation == "*":
-                    self.result = self.first_number * second_number
-                elif self.current_operation == "/":
-                    if second_number == 0:
-                        raise ZeroDivisionError("Division by zero")
-                    self.result = self.first_number / second_number
-                elif self.current_operation == "%":
-                    self.result = self.first_number % second_number
+                self.result = apply_operator(self.first_number, self.current_operation, second_number)
                 
                 # Format the result
                 if self.result.is_integer():
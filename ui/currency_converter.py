@@ -6,6 +6,9 @@ import time
 from datetime import datetime
 import requests
 
+from ui.input_completer import InputCompleter
+from utils.calculations import convert_currency
+
 class CurrencyConverterFrame(ttk.Frame):
     def __init__(self, parent, history_manager):
         super().__init__(parent, padding="10")
@@ -71,6 +74,10 @@ class CurrencyConverterFrame(ttk.Frame):
         from_amount_entry.pack(side=tk.LEFT, padx=5)
         from_amount_entry.bind("<KeyRelease>", self.convert)
         
+        # Suggest past conversions; picking one repeats it
+        InputCompleter(from_amount_entry, self.history_manager, "Currency Converter",
+                       on_choose=self.use_conversion)
+        
         # To currency
         to_frame = ttk.Frame(self.conversion_frame)
         to_frame.pack(fill=tk.X, padx=10, pady=5)
@@ -223,11 +230,8 @@ class CurrencyConverterFrame(ttk.Frame):
             to_rate = self.exchange_rates.get(to_currency, 0)
             
             if from_rate and to_rate:
-                # Calculate direct conversion rate
-                rate = to_rate / from_rate
-                
-                # Calculate converted amount
-                converted_amount = amount * rate
+                # Convert through the direct conversion rate
+                converted_amount, rate = convert_currency(amount, from_rate, to_rate)
                 
                 # Update the result
                 self.to_amount_var.set(f"{converted_amount:.4f}")
@@ -247,6 +251,20 @@ class CurrencyConverterFrame(ttk.Frame):
             self.to_amount_var.set(f"Error: {str(e)}")
             self.rate_var.set("")
     
+    def use_conversion(self, text):
+        # Past conversions are recorded as "<amount> <from> to <to>"
+        parts = text.split()
+        if len(parts) == 4 and parts[2] == "to":
+            amount, from_currency, _, to_currency = parts
+            self.from_amount_var.set(amount)
+            if from_currency in self.exchange_rates:
+                self.from_currency_var.set(from_currency)
+            if to_currency in self.exchange_rates:
+                self.to_currency_var.set(to_currency)
+        else:
+            self.from_amount_var.set(text)
+        self.convert()
+    
     def swap_currencies(self):
         # Swap currencies
         from_currency = self.from_currency_var.get()
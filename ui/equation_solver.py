@@ -1,8 +1,7 @@
 import tkinter as tk
 from tkinter import ttk
-import numpy as np
-import sympy as sp
-import math
+
+from utils.calculations import solve_linear, solve_quadratic, solve_system
 
 class EquationSolverFrame(ttk.Frame):
     def __init__(self, parent, history_manager):
@@ -240,23 +239,7 @@ class EquationSolverFrame(ttk.Frame):
             a = float(self.linear_a.get() or "0")
             b = float(self.linear_b.get() or "0")
             
-            if a == 0:
-                if b == 0:
-                    result = "Infinite solutions (identity)"
-                else:
-                    result = "No solution (contradiction)"
-            else:
-                x = -b / a
-                result = f"x = {x}"
-                
-                # For nicer display, check if it's close to an integer
-                if abs(x - round(x)) < 1e-10:
-                    result = f"x = {int(round(x))}"
-            
-            # Create the equation for history
-            a_str = "" if a == 1 else "-" if a == -1 else f"{a}"
-            b_str = f"+ {b}" if b > 0 else f"- {abs(b)}" if b < 0 else ""
-            equation = f"{a_str}x {b_str} = 0"
+            equation, result, steps = solve_linear(a, b)
             
             # Add to history
             self.history_manager.add_entry(
@@ -265,18 +248,6 @@ class EquationSolverFrame(ttk.Frame):
                 result
             )
             
-            # Display the result with steps
-            steps = [
-                f"Equation: {equation}",
-                f"Step 1: Solve for x by isolating the variable",
-            ]
-            
-            if a != 0:
-                steps.append(f"Step 2: x = -b/a = -({b})/{a} = {-b}/{a}")
-                steps.append(f"Result: {result}")
-            else:
-                steps.append(f"Result: {result}")
-            
             self.display_result("\n".join(steps))
             
         except ValueError:
@@ -290,90 +261,7 @@ class EquationSolverFrame(ttk.Frame):
             b = float(self.quadratic_b.get() or "0")
             c = float(self.quadratic_c.get() or "0")
             
-            # Create the equation for history
-            a_str = "" if a == 1 else "-" if a == -1 else f"{a}"
-            b_str = f"+ {b}x" if b > 0 else f"- {abs(b)}x" if b < 0 else ""
-            c_str = f"+ {c}" if c > 0 else f"- {abs(c)}" if c < 0 else ""
-            equation = f"{a_str}x² {b_str} {c_str} = 0"
-            
-            if a == 0:
-                # This is actually a linear equation
-                if b == 0:
-                    if c == 0:
-                        result = "Infinite solutions (identity)"
-                    else:
-                        result = "No solution (contradiction)"
-                else:
-                    x = -c / b
-                    result = f"x = {x}"
-                
-                steps = [
-                    f"Equation: {equation}",
-                    "Note: This is actually a linear equation (a = 0)",
-                    f"Solving: {b}x + {c} = 0",
-                    f"x = -{c}/{b} = {-c}/{b}",
-                    f"Result: {result}"
-                ]
-            else:
-                # Calculate the discriminant
-                discriminant = b**2 - 4*a*c
-                
-                steps = [
-                    f"Equation: {equation}",
-                    f"Step 1: Calculate the discriminant (b² - 4ac)",
-                    f"Discriminant = {b}² - 4({a})({c}) = {b**2} - {4*a*c} = {discriminant}"
-                ]
-                
-                if discriminant > 0:
-                    # Two real solutions
-                    x1 = (-b + math.sqrt(discriminant)) / (2*a)
-                    x2 = (-b - math.sqrt(discriminant)) / (2*a)
-                    
-                    # For nicer display, check if solutions are close to integers
-                    if abs(x1 - round(x1)) < 1e-10:
-                        x1 = int(round(x1))
-                    if abs(x2 - round(x2)) < 1e-10:
-                        x2 = int(round(x2))
-                    
-                    result = f"x₁ = {x1}, x₂ = {x2}"
-                    
-                    steps.append("Step 2: Discriminant > 0, so there are two real solutions")
-                    steps.append(f"x₁ = (-b + √discriminant)/(2a) = ({-b} + √{discriminant})/{2*a} = {x1}")
-                    steps.append(f"x₂ = (-b - √discriminant)/(2a) = ({-b} - √{discriminant})/{2*a} = {x2}")
-                    
-                elif discriminant == 0:
-                    # One real solution (double root)
-                    x = -b / (2*a)
-                    
-                    # For nicer display, check if solution is close to an integer
-                    if abs(x - round(x)) < 1e-10:
-                        x = int(round(x))
-                    
-                    result = f"x = {x} (double root)"
-                    
-                    steps.append("Step 2: Discriminant = 0, so there is one real solution (double root)")
-                    steps.append(f"x = -b/(2a) = {-b}/{2*a} = {x}")
-                    
-                else:
-                    # Complex solutions
-                    real_part = -b / (2*a)
-                    imag_part = math.sqrt(abs(discriminant)) / (2*a)
-                    
-                    # For nicer display, check if parts are close to integers
-                    if abs(real_part - round(real_part)) < 1e-10:
-                        real_part = int(round(real_part))
-                    if abs(imag_part - round(imag_part)) < 1e-10:
-                        imag_part = int(round(imag_part))
-                    
-                    result = f"x₁ = {real_part} + {imag_part}i, x₂ = {real_part} - {imag_part}i"
-                    
-                    steps.append("Step 2: Discriminant < 0, so there are two complex solutions")
-                    steps.append(f"Real part = -b/(2a) = {-b}/{2*a} = {real_part}")
-                    steps.append(f"Imaginary part = √|discriminant|/(2a) = √{abs(discriminant)}/{2*a} = {imag_part}")
-                    steps.append(f"x₁ = {real_part} + {imag_part}i")
-                    steps.append(f"x₂ = {real_part} - {imag_part}i")
-            
-            steps.append(f"Result: {result}")
+            equation, result, steps = solve_quadratic(a, b, c)
             
             # Add to history
             self.history_manager.add_entry(
@@ -398,55 +286,7 @@ class EquationSolverFrame(ttk.Frame):
             b2 = float(self.system_b2.get() or "0")
             c2 = float(self.system_c2.get() or "0")
             
-            # Create the system equations for history
-            equation1 = f"{a1}x + {b1}y = {c1}"
-            equation2 = f"{a2}x + {b2}y = {c2}"
-            system = f"{equation1}, {equation2}"
-            
-            # Calculate the determinant of the coefficient matrix
-            det = a1 * b2 - a2 * b1
-            
-            steps = [
-                f"System of equations:",
-                f"Equation 1: {equation1}",
-                f"Equation 2: {equation2}",
-                f"Step 1: Calculate the determinant of the coefficient matrix",
-                f"det = a₁b₂ - a₂b₁ = ({a1})({b2}) - ({a2})({b1}) = {a1*b2} - {a2*b1} = {det}"
-            ]
-            
-            if det == 0:
-                # Check if the system is consistent (has infinitely many solutions)
-                if a1 * c2 == a2 * c1 and b1 * c2 == b2 * c1:
-                    result = "Infinite solutions (dependent equations)"
-                    steps.append("Step 2: Determinant = 0 and equations are consistent")
-                    steps.append("Result: Infinite solutions (dependent equations)")
-                else:
-                    result = "No solution (inconsistent system)"
-                    steps.append("Step 2: Determinant = 0 but equations are inconsistent")
-                    steps.append("Result: No solution (inconsistent system)")
-            else:
-                # Solve using Cramer's rule
-                det_x = c1 * b2 - c2 * b1
-                det_y = a1 * c2 - a2 * c1
-                
-                x = det_x / det
-                y = det_y / det
-                
-                # For nicer display, check if solutions are close to integers
-                if abs(x - round(x)) < 1e-10:
-                    x = int(round(x))
-                if abs(y - round(y)) < 1e-10:
-                    y = int(round(y))
-                
-                result = f"x = {x}, y = {y}"
-                
-                steps.append("Step 2: Determinant ≠ 0, so there is a unique solution")
-                steps.append("Step 3: Using Cramer's rule to solve for x and y")
-                steps.append(f"det_x = c₁b₂ - c₂b₁ = ({c1})({b2}) - ({c2})({b1}) = {c1*b2} - {c2*b1} = {det_x}")
-                steps.append(f"det_y = a₁c₂ - a₂c₁ = ({a1})({c2}) - ({a2})({c1}) = {a1*c2} - {a2*c1} = {det_y}")
-                steps.append(f"x = det_x/det = {det_x}/{det} = {x}")
-                steps.append(f"y = det_y/det = {det_y}/{det} = {y}")
-                steps.append(f"Result: {result}")
+            system, result, steps = solve_system(a1, b1, c1, a2, b2, c2)
             
             # Add to history
             self.history_manager.add_entry(
@@ -1,16 +1,21 @@
 import tkinter as tk
 from tkinter import ttk
-import numpy as np
-import matplotlib.pyplot as plt
-from matplotlib.backends.backend_tkagg import FigureCanvasTkAgg
+from matplotlib.backends.backend_tkagg import FigureCanvasTkAgg, NavigationToolbar2Tk
 from matplotlib.figure import Figure
 import matplotlib
-import re
-import math
+
+from ui.input_completer import InputCompleter
+from utils.calculations import evaluate_function, parse_function
+from utils.plot_sampling import auto_limits
+from utils.plot_worker import PlotWorker
+from utils.sample_tiles import SampleTileCache
 
 # Configure matplotlib to use TkAgg backend
 matplotlib.use("TkAgg")
 
+# How often to check for samples from the plot worker
+POLL_MS = 30
+
 class GraphPlotterFrame(ttk.Frame):
     def __init__(self, parent, history_manager):
         super().__init__(parent, padding="10")
@@ -18,6 +23,16 @@ class GraphPlotterFrame(ttk.Frame):
         
         # Default functions
         self.function_entries = []
+        # Plotted (line, function) pairs, resampled when the view changes
+        self.plotted_lines = []
+        self.resample_scheduled = False
+        # Evaluated samples, reused by replots, pans and zooms
+        self.sample_tiles = SampleTileCache()
+        # Functions are sampled off the Tk thread; plot_request is the
+        # (generation, on_done, full plot) request waiting to be drawn
+        self.plot_worker = PlotWorker(self.sample_tiles)
+        self.plot_request = None
+        self.polling = False
         self.function_colors = [
             "#1f77b4", "#ff7f0e", "#2ca02c", "#d62728", "#9467bd",
             "#8c564b", "#e377c2", "#7f7f7f", "#bcbd22", "#17becf"
@@ -127,8 +142,17 @@ class GraphPlotterFrame(ttk.Frame):
         # Create canvas for matplotlib figure
         self.canvas = FigureCanvasTkAgg(self.fig, master=self.right_panel)
         self.canvas.draw()
+        
+        # Zoom and pan with the toolbar, or zoom with the mouse wheel
+        self.toolbar = NavigationToolbar2Tk(self.canvas, self.right_panel, pack_toolbar=False)
+        self.toolbar.pack(side=tk.BOTTOM, fill=tk.X)
+        self.canvas.mpl_connect("scroll_event", self.on_scroll_zoom)
+        
         self.canvas.get_tk_widget().pack(fill=tk.BOTH, expand=True)
         
+        # Shown under the plot while functions are being evaluated
+        self.plot_progress = ttk.Progressbar(self.right_panel, mode="determinate", maximum=1.0)
+        
         # Initialize with default graph
         self.plot_graph()
     
@@ -149,6 +173,9 @@ class GraphPlotterFrame(ttk.Frame):
         func_entry = ttk.Entry(func_entry_frame, width=30)
         func_entry.pack(side=tk.LEFT, padx=5, fill=tk.X, expand=True)
         
+        # Suggest functions plotted before
+        InputCompleter(func_entry, self.history_manager, "Graph Plotter")
+        
         # Default function based on entry number
         if len(self.function_entries) == 0:
             func_entry.insert(0, "sin(x)")
@@ -199,89 +226,73 @@ class GraphPlotterFrame(ttk.Frame):
         self.y_min_var.set("")
         self.y_max_var.set("")
         
-        # Clear the plot
+        # Drop any plot still being evaluated, and clear the plot
+        self.plot_worker.cancel()
+        self.plot_request = None
+        self.plot_progress.pack_forget()
         self.ax.clear()
+        self.plotted_lines = []
         self.fig.tight_layout()
         self.canvas.draw()
     
     def parse_function(self, func_str):
-        # Replace common mathematical expressions with their numpy equivalents
-        replacements = {
-            r'sin\(': 'np.sin(',
-            r'cos\(': 'np.cos(',
-            r'tan\(': 'np.tan(',
-            r'asin\(': 'np.arcsin(',
-            r'acos\(': 'np.arccos(',
-            r'atan\(': 'np.arctan(',
-            r'ln\(': 'np.log(',
-            r'log\(': 'np.log10(',
-            r'sqrt\(': 'np.sqrt(',
-            r'abs\(': 'np.abs(',
-            r'exp\(': 'np.exp(',
-            r'pi': 'np.pi',
-            r'e': 'np.e',
-            r'([0-9]+|x|\))[ ]*\^[ ]*([0-9]+|x|\(.*?\))': r'\1**\2'  # Handle power operations
-        }
-        
-        result = func_str
-        for pattern, replacement in replacements.items():
-            result = re.sub(pattern, replacement, result)
-        
-        return result
+        return parse_function(func_str)
     
     def evaluate_function(self, func_str, x_values):
-        try:
-            # Parse the function string
-            parsed_func = self.parse_function(func_str)
-            
-            # Create function to evaluate
-            def f(x):
-                return eval(parsed_func)
-            
-            # Evaluate function for all x values
-            y_values = f(x_values)
-            
-            return y_values
-        except Exception as e:
-            print(f"Error evaluating function '{func_str}': {str(e)}")
-            return None
+        return evaluate_function(func_str, x_values)
     
     def plot_graph(self):
         try:
-            # Clear previous plot
-            self.ax.clear()
-            
             # Get x range
             x_min = float(self.x_min_var.get())
             x_max = float(self.x_max_var.get())
             x_step = float(self.x_step_var.get())
-            
-            # Create x values
-            x_values = np.arange(x_min, x_max + x_step, x_step)
+        except Exception as e:
+            self.show_plot_error(e)
+            return
+        
+        functions = []
+        for i, (_, entry) in enumerate(self.function_entries):
+            func_str = entry.get().strip()
+            if func_str:
+                functions.append((i, entry, func_str))
+        
+        # Sample on the worker; the plot is drawn once the samples are in
+        self.request_samples(
+            [func_str for _, _, func_str in functions], x_min, x_max, x_step,
+            lambda results: self.draw_plot(functions, results, x_min, x_max),
+            full_plot=True
+        )
+    
+    def draw_plot(self, functions, results, x_min, x_max):
+        try:
+            # Clear previous plot
+            self.ax.clear()
+            self.plotted_lines = []
             
             # Process each function
             legend_entries = []
             history_entries = []
+            curves = []
             
-            for i, (_, entry) in enumerate(self.function_entries):
-                func_str = entry.get().strip()
-                if func_str:
-                    # Get color for this function
-                    color = self.function_colors[i % len(self.function_colors)]
-                    
-                    # Evaluate the function
-                    y_values = self.evaluate_function(func_str, x_values)
-                    
-                    if y_values is not None:
-                        # Plot the function
-                        line, = self.ax.plot(x_values, y_values, color=color, label=f"f{i+1}(x) = {func_str}")
-                        legend_entries.append(line)
-                        history_entries.append(func_str)
-                    else:
-                        # Error in function
-                        entry.config(foreground="red")
+            for (i, entry, func_str), samples in zip(functions, results):
+                # Get color for this function
+                color = self.function_colors[i % len(self.function_colors)]
+                
+                if samples is not None:
+                    # Plot the function
+                    x_values, y_values = samples
+                    line, = self.ax.plot(x_values, y_values, color=color, label=f"f{i+1}(x) = {func_str}")
+                    legend_entries.append(line)
+                    history_entries.append(func_str)
+                    curves.append(samples)
+                    self.plotted_lines.append((line, func_str))
+                else:
+                    # Error in function
+                    entry.config(foreground="red")
             
-            # Configure the plot
+            # Configure the plot; samples reach just past the range
+            self.ax.set_xlim(x_min, x_max)
             self.ax.set_xlabel('x')
             self.ax.set_ylabel('y')
             self.ax.set_title('Function Plot')
@@ -294,6 +305,11 @@ class GraphPlotterFrame(ttk.Frame):
                     self.ax.set_ylim(y_min, y_max)
                 except ValueError:
                     pass
+            else:
+                # Keep poles from squashing the rest of the plot
+                limits = auto_limits(curves)
+                if limits:
+                    self.ax.set_ylim(*limits)
             
             # Show grid if enabled
             if self.show_grid_var.get():
@@ -309,7 +325,14 @@ class GraphPlotterFrame(ttk.Frame):
             
             # Update the canvas
             self.fig.tight_layout()
-            self.canvas.draw()
+            self.canvas.draw_idle()
+            
+            # Home on the toolbar returns to this view; zooming or panning
+            # away from it resamples what is visible (clear() dropped the
+            # previous plot's callbacks)
+            self.toolbar.update()
+            self.toolbar.push_current()
+            self.ax.callbacks.connect("xlim_changed", self.on_xlim_changed)
             
             # Add to history
             if history_entries:
@@ -321,12 +344,84 @@ class GraphPlotterFrame(ttk.Frame):
                 )
             
         except Exception as e:
-            # Display error in the plot
-            self.ax.clear()
-            self.ax.text(0.5, 0.5, f"Error: {str(e)}", 
-                         horizontalalignment='center',
-                         verticalalignment='center',
-                         transform=self.ax.transAxes,
-                         color='red')
-            self.fig.tight_layout()
-            self.canvas.draw()
\ No newline at end of file
+            self.show_plot_error(e)
+    
+    def show_plot_error(self, error):
+        # Display error in the plot
+        self.ax.clear()
+        self.plotted_lines = []
+        self.ax.text(0.5, 0.5, f"Error: {str(error)}", 
+                     horizontalalignment='center',
+                     verticalalignment='center',
+                     transform=self.ax.transAxes,
+                     color='red')
+        self.fig.tight_layout()
+        self.canvas.draw_idle()
+    
+    def request_samples(self, functions, x_min, x_max, x_step, on_done, full_plot=False):
+        # A newer request supersedes this one, and its stale work is dropped
+        generation = self.plot_worker.request(functions, x_min, x_max, self.ax.bbox.width, x_step)
+        self.plot_request = (generation, on_done, full_plot)
+        if not self.polling:
+            self.polling = True
+            self.after(POLL_MS, self.poll_samples)
+    
+    def poll_samples(self):
+        if self.plot_request is None:
+            self.polling = False
+            return
+        
+        generation, on_done, _ = self.plot_request
+        results = self.plot_worker.result(generation)
+        if results is None:
+            # Still evaluating; show how far it has got
+            if not self.plot_progress.winfo_ismapped():
+                self.plot_progress.pack(side=tk.BOTTOM, fill=tk.X, before=self.canvas.get_tk_widget())
+            self.plot_progress["value"] = self.plot_worker.progress
+            self.after(POLL_MS, self.poll_samples)
+            return
+        
+        self.polling = False
+        self.plot_request = None
+        self.plot_progress.pack_forget()
+        on_done(results)
+    
+    def on_scroll_zoom(self, event):
+        if event.inaxes is not self.ax:
+            return
+        # Zoom about the point under the cursor
+        scale = 1 / 1.25 if event.button == "up" else 1.25
+        x_min, x_max = self.ax.get_xlim()
+        y_min, y_max = self.ax.get_ylim()
+        self.ax.set_xlim(event.xdata - (event.xdata - x_min) * scale, event.xdata + (x_max - event.xdata) * scale)
+        self.ax.set_ylim(event.ydata - (event.ydata - y_min) * scale, event.ydata + (y_max - event.ydata) * scale)
+        self.toolbar.push_current()
+        self.canvas.draw_idle()
+    
+    def on_xlim_changed(self, ax):
+        # Panning changes the limits on every mouse move; resample once
+        if not self.resample_scheduled:
+            self.resample_scheduled = True
+            self.after_idle(self.resample_visible)
+    
+    def resample_visible(self):
+        # Only the visible range is evaluated, at a density set by the
+        # plot's pixel width, so deep zooms stay sharp at the same cost
+        self.resample_scheduled = False
+        if not self.plotted_lines:
+            return
+        if self.plot_request is not None and self.plot_request[2]:
+            # A new plot is on its way and will replace these lines
+            return
+        x_min, x_max = self.ax.get_xlim()
+        lines = list(self.plotted_lines)
+        self.request_samples(
+            [func_str for _, func_str in lines], x_min, x_max, None,
+            lambda results: self.update_lines(lines, results)
+        )
+    
+    def update_lines(self, lines, results):
+        for (line, _), samples in zip(lines, results):
+            if samples is not None:
+                line.set_data(*samples)
+        self.canvas.draw_idle()
@@ -1,13 +1,39 @@
 import tkinter as tk
 from tkinter import ttk, filedialog, messagebox
-import csv
 import datetime
+import queue
+
+from utils.history_export import FORMATS, HistoryExport
+from utils.history_import import HistoryImport
+from utils.history_manager import EVENT_ADD, EVENT_ARCHIVE, EVENT_DELETE, EVENT_TRIM
+from utils.history_view import HistoryView
+
+# Spare rows kept below the visible ones (and fetched either side of them)
+OVERSCAN = 20
+
+# How often history events from other threads are applied
+EVENT_POLL_MS = 100
+
+# Tree column: (heading, history field it sorts by)
+COLUMNS = {
+    "Time": ("Time", "time"),
+    "Type": ("Calculator", "type"),
+    "Input": ("Input", "input"),
+    "Result": ("Result", "result"),
+}
 
 class HistoryViewerFrame(ttk.Frame):
     def __init__(self, parent, history_manager):
         super().__init__(parent, padding="10")
         self.history_manager = history_manager
         
+        # Only the rows in view exist in the tree; they are a fixed pool of
+        # items whose values are swapped as the list scrolls
+        self.view = HistoryView(history_manager, OVERSCAN)
+        self.first_row = 0
+        self.row_entries = []
+        self.selected_id = None
+        
         # Create main container
         self.main_container = ttk.Frame(self)
         self.main_container.pack(fill=tk.BOTH, expand=True)
@@ -29,7 +55,16 @@ class HistoryViewerFrame(ttk.Frame):
             width=15
         )
         filter_combobox.pack(side=tk.LEFT, padx=5)
-        filter_combobox.bind("<<ComboboxSelected>>", lambda e: self.refresh_history())
+        filter_combobox.bind("<<ComboboxSelected>>", lambda e: self.reset_and_refresh())
+        
+        # Substring search over inputs and results
+        ttk.Label(self.toolbar, text="Search:").pack(side=tk.LEFT, padx=5)
+        
+        self.search_var = tk.StringVar()
+        search_entry = ttk.Entry(self.toolbar, textvariable=self.search_var, width=20)
+        search_entry.pack(side=tk.LEFT, padx=5)
+        search_entry.bind("<FocusIn>", lambda e: self.history_manager.prepare_search())
+        self.search_var.trace_add("write", lambda *args: self.reset_and_refresh())
         
         # Export button
         export_button = ttk.Button(
@@ -39,6 +74,14 @@ class HistoryViewerFrame(ttk.Frame):
         )
         export_button.pack(side=tk.RIGHT, padx=5)
         
+        # Import button
+        import_button = ttk.Button(
+            self.toolbar,
+            text="Import History",
+            command=self.import_history
+        )
+        import_button.pack(side=tk.RIGHT, padx=5)
+        
         # Clear history button
         clear_button = ttk.Button(
             self.toolbar,
@@ -47,10 +90,29 @@ class HistoryViewerFrame(ttk.Frame):
         )
         clear_button.pack(side=tk.RIGHT, padx=5)
         
+        # Usage analytics toggle
+        self.usage_button = ttk.Button(
+            self.toolbar,
+            text="Show Usage",
+            command=self.toggle_usage
+        )
+        self.usage_button.pack(side=tk.RIGHT, padx=5)
+        
+        # Usage analytics panel (hidden until requested)
+        self.usage_frame = ttk.LabelFrame(self.main_container, text="Usage")
+        self.usage_text = tk.Text(self.usage_frame, height=12, wrap=tk.NONE, font=("Courier", 10))
+        self.usage_text.pack(fill=tk.BOTH, expand=True, padx=5, pady=5)
+        self.usage_text.config(state=tk.DISABLED)
+        self.usage_visible = False
+        
         # Create history display
         self.history_frame = ttk.LabelFrame(self.main_container, text="Calculation History")
         self.history_frame.pack(fill=tk.BOTH, expand=True, padx=5, pady=5)
         
+        # Says when a column sort leaves out archived entries
+        self.sort_note = ttk.Label(self.main_container, foreground="gray")
+        self.sort_note.pack(fill=tk.X, padx=5)
+        
         # Create treeview for history
         self.history_tree = ttk.Treeview(
             self.history_frame,
@@ -59,24 +121,33 @@ class HistoryViewerFrame(ttk.Frame):
             selectmode="browse"
         )
         
-        # Configure columns
-        self.history_tree.heading("Time", text="Time")
-        self.history_tree.heading("Type", text="Calculator")
-        self.history_tree.heading("Input", text="Input")
-        self.history_tree.heading("Result", text="Result")
+        # Configure columns; clicking a heading sorts by it
+        for column, (heading, field) in COLUMNS.items():
+            self.history_tree.heading(column, text=heading, command=lambda f=field: self.sort_by_column(f))
+        self.update_sort_headings()
         
         self.history_tree.column("Time", width=150)
         self.history_tree.column("Type", width=120)
         self.history_tree.column("Input", width=250)
         self.history_tree.column("Result", width=250)
         
-        # Add scrollbar
-        scrollbar = ttk.Scrollbar(self.history_frame, orient="vertical", command=self.history_tree.yview)
-        self.history_tree.configure(yscrollcommand=scrollbar.set)
+        # Add scrollbar; it scrolls the whole history, not the tree's rows
+        self.scrollbar = ttk.Scrollbar(self.history_frame, orient="vertical", command=self.on_scroll)
         
         # Pack tree and scrollbar
         self.history_tree.pack(side=tk.LEFT, fill=tk.BOTH, expand=True)
-        scrollbar.pack(side=tk.RIGHT, fill=tk.Y)
+        self.scrollbar.pack(side=tk.RIGHT, fill=tk.Y)
+        
+        # Scrolling moves the window over the history instead of the tree
+        self.history_tree.bind("<Configure>", lambda e: self.render_rows())
+        self.history_tree.bind("<MouseWheel>", self.on_mousewheel)
+        self.history_tree.bind("<Button-4>", self.on_mousewheel)
+        self.history_tree.bind("<Button-5>", self.on_mousewheel)
+        self.history_tree.bind("<Up>", lambda e: self.move_selection(-1))
+        self.history_tree.bind("<Down>", lambda e: self.move_selection(1))
+        self.history_tree.bind("<Prior>", lambda e: self.move_selection(-self.visible_rows()))
+        self.history_tree.bind("<Next>", lambda e: self.move_selection(self.visible_rows()))
+        self.history_tree.bind("<<TreeviewSelect>>", self.on_select)
         
         # Right-click menu
         self.context_menu = tk.Menu(self, tearoff=0)
@@ -87,27 +158,48 @@ class HistoryViewerFrame(ttk.Frame):
         
         self.history_tree.bind("<Button-3>", self.show_context_menu)
         
+        # Redraw the rows in view as the history changes
+        self.history_events = queue.Queue()
+        self.history_manager.subscribe(self.on_history_event)
+        self.after(EVENT_POLL_MS, self.poll_history_events)
+        
         # Initial history display
-        self.refresh_history()
+        self.reset_and_refresh()
     
     def refresh_history(self):
-        # Clear existing items
-        for item in self.history_tree.get_children():
-            self.history_tree.delete(item)
+        # Re-read the rows in view
+        self.view.invalidate()
+        self.render_rows()
+        self.update_sort_note()
         
-        # Get history from manager
-        history = self.history_manager.get_history()
+        if self.usage_visible:
+            self.refresh_usage()
+    
+    def visible_rows(self):
+        # Measure with the first row if there is one
+        bbox = self.history_tree.bbox("row0") if self.history_tree.exists("row0") else ""
+        if bbox:
+            top, row_height = bbox[1], bbox[3]
+        else:
+            top, row_height = 25, 20
+        return max(1, (self.history_tree.winfo_height() - top) // max(row_height, 1))
+    
+    def render_rows(self):
+        total = len(self.view)
+        visible = self.visible_rows()
+        self.first_row = max(0, min(self.first_row, total - visible))
+        entries = self.view.rows(self.first_row, visible + OVERSCAN)
         
-        # Apply filter
-        filter_type = self.filter_var.get()
-        if filter_type != "All":
-            history = [entry for entry in history if entry["type"] == filter_type]
-        
-        # Add items to tree (newest first)
-        for entry in reversed(history):
-            self.history_tree.insert(
-                "",
-                "end",
+        # Grow or shrink the pool of row items to fit
+        existing = len(self.history_tree.get_children())
+        for index in range(existing, len(entries)):
+            self.history_tree.insert("", "end", iid=f"row{index}")
+        if existing > len(entries):
+            self.history_tree.delete(*[f"row{index}" for index in range(len(entries), existing)])
+        
+        for index, entry in enumerate(entries):
+            self.history_tree.item(
+                f"row{index}",
                 values=(
                     entry["timestamp"].strftime("%Y-%m-%d %H:%M:%S"),
                     entry["type"],
@@ -116,15 +208,200 @@ class HistoryViewerFrame(ttk.Frame):
                 ),
                 tags=(entry["id"],)
             )
+        self.row_entries = entries
+        
+        # Keep the selection on its entry, wherever that has scrolled to
+        selected = [
+            f"row{index}" for index, entry in enumerate(entries)
+            if entry["id"] == self.selected_id
+        ]
+        if tuple(selected) != self.history_tree.selection():
+            self.history_tree.selection_set(selected)
+        
+        self.history_tree.yview_moveto(0)
+        # Fetching the rows may have loaded older entries
+        total = len(self.view)
+        if total:
+            self.scrollbar.set(self.first_row / total, min(self.first_row + visible, total) / total)
+        else:
+            self.scrollbar.set(0, 1)
+    
+    def scroll_to(self, first_row):
+        self.first_row = first_row
+        self.render_rows()
+    
+    def on_scroll(self, *args):
+        if args[0] == "moveto":
+            self.scroll_to(int(float(args[1]) * len(self.view)))
+        elif args[0] == "scroll":
+            amount = int(args[1])
+            if args[2] == "pages":
+                amount *= self.visible_rows()
+            self.scroll_to(self.first_row + amount)
+    
+    def on_mousewheel(self, event):
+        if event.num == 4 or getattr(event, "delta", 0) > 0:
+            self.scroll_to(self.first_row - 3)
+        else:
+            self.scroll_to(self.first_row + 3)
+        return "break"
+    
+    def on_select(self, event=None):
+        selected = self.history_tree.selection()
+        if selected:
+            self.selected_id = self.history_tree.item(selected[0], "tags")[0]
+    
+    def move_selection(self, step):
+        # Move by position in the whole history, scrolling to keep it in view
+        visible = self.visible_rows()
+        position = self.first_row - 1
+        for index, entry in enumerate(self.row_entries):
+            if entry["id"] == self.selected_id:
+                position = self.first_row + index
+                break
+        position = max(0, min(position + step, len(self.view) - 1))
+        
+        if position < self.first_row:
+            self.first_row = position
+        elif position >= self.first_row + visible:
+            self.first_row = position - visible + 1
+        self.render_rows()
+        
+        index = position - self.first_row
+        if 0 <= index < len(self.row_entries):
+            self.selected_id = self.row_entries[index]["id"]
+            self.history_tree.selection_set(f"row{index}")
+            self.history_tree.focus(f"row{index}")
+        return "break"
+    
+    def on_history_event(self, event, entries):
+        # May be called from a worker thread, which must not touch Tk;
+        # the Tk loop picks the events up from the queue
+        self.history_events.put((event, entries))
+    
+    def poll_history_events(self):
+        events = []
+        while True:
+            try:
+                events.append(self.history_events.get_nowait())
+            except queue.Empty:
+                break
+        if events:
+            self.apply_history_events(events)
+        self.after(EVENT_POLL_MS, self.poll_history_events)
+    
+    def apply_history_events(self, events):
+        for event, entries in events:
+            if event == EVENT_ADD:
+                # Keep the rows in view still while newer entries arrive above
+                if self.first_row and self.view.sort_by == "time" and self.view.descending:
+                    self.first_row += sum(1 for entry in entries if self.view.matches_filter(entry))
+            elif event not in (EVENT_DELETE, EVENT_TRIM, EVENT_ARCHIVE):
+                # Cleared or reloaded: start again from the top
+                self.first_row = 0
+        
+        # Only the rows in view are re-read, however large the history is
+        self.refresh_history()
+    
+    def toggle_usage(self):
+        if self.usage_visible:
+            self.usage_frame.pack_forget()
+            self.usage_button.config(text="Show Usage")
+            self.usage_visible = False
+        else:
+            self.usage_frame.pack(fill=tk.X, padx=5, pady=5, before=self.history_frame)
+            self.usage_button.config(text="Hide Usage")
+            self.usage_visible = True
+            self.refresh_usage()
+    
+    def refresh_usage(self):
+        stats = self.history_manager.analytics(top=5)
+        
+        lines = [f"Total calculations: {stats['total']}"]
+        rates = stats["rates"]
+        lines.append(
+            f"Last hour: {rates['last_hour']}   Last day: {rates['last_day']}   "
+            f"Last week: {rates['last_week']}"
+        )
+        if len(stats["rolling_daily"]):
+            lines.append(f"7-day average: {stats['rolling_daily'][-1]:.1f} per day")
+        
+        lines.append("")
+        lines.append("By calculator:")
+        for calculator_type, count in stats["by_type"].items():
+            lines.append(f"  {calculator_type:<20} {count:>8}")
+        
+        lines.append("")
+        lines.append("By hour of day:")
+        lines.append("  " + self.sparkline(stats["by_hour"]))
+        lines.append("  0     6     12    18   23")
+        
+        if len(stats["by_day"]):
+            lines.append("")
+            lines.append(f"By day since {stats['first_day']}:")
+            lines.append("  " + self.sparkline(stats["by_day"][-60:]))
+        
+        if stats["top_inputs"]:
+            lines.append("")
+            lines.append("Most frequent inputs:")
+            for input_text, count in stats["top_inputs"]:
+                lines.append(f"  {count:>6}  {input_text}")
+        
+        if stats["top_conversions"]:
+            lines.append("")
+            lines.append("Most frequent conversions:")
+            for pair, count in stats["top_conversions"]:
+                lines.append(f"  {count:>6}  {pair}")
+        
+        self.usage_text.config(state=tk.NORMAL)
+        self.usage_text.delete("1.0", tk.END)
+        self.usage_text.insert("1.0", "\n".join(lines))
+        self.usage_text.config(state=tk.DISABLED)
+    
+    @staticmethod
+    def sparkline(counts):
+        bars = " ▁▂▃▄▅▆▇█"
+        peak = max(counts.max(), 1) if len(counts) else 1
+        return "".join(bars[int(round(count / peak * (len(bars) - 1)))] for count in counts)
+    
+    def sort_by_column(self, field):
+        # A new column starts ascending; clicking it again reverses it
+        descending = not self.view.descending if field == self.view.sort_by else False
+        self.view.set_sort(field, descending)
+        self.update_sort_headings()
+        self.first_row = 0
+        self.refresh_history()
+    
+    def update_sort_note(self):
+        partial = self.view.partial_order()
+        if partial:
+            rows, entries = partial
+            self.sort_note.config(
+                text=f"Sorted by {self.view.sort_by}: showing the {rows:,} most recent of "
+                     f"{entries:,} entries. Sort by time to see them all."
+            )
+        else:
+            self.sort_note.config(text="")
+    
+    def update_sort_headings(self):
+        arrow = " \u25bc" if self.view.descending else " \u25b2"
+        for column, (heading, field) in COLUMNS.items():
+            text = heading + arrow if field == self.view.sort_by else heading
+            self.history_tree.heading(column, text=text)
+    
+    def reset_and_refresh(self):
+        filter_type = self.filter_var.get()
+        calculator_type = filter_type if filter_type != "All" else None
+        self.view.set_filter(calculator_type, self.search_var.get())
+        self.first_row = 0
+        self.refresh_history()
     
     def export_history(self):
-        # Get filtered history
-        history = self.history_manager.get_history()
+        # Check there is anything to export; the entries themselves are streamed
         filter_type = self.filter_var.get()
-        if filter_type != "All":
-            history = [entry for entry in history if entry["type"] == filter_type]
+        calculator_type = filter_type if filter_type != "All" else None
         
-        if not history:
+        if not self.history_manager.get_window(0, 1, calculator_type):
             messagebox.showinfo("Export History", "No history to export.")
             return
         
@@ -133,27 +410,28 @@ class HistoryViewerFrame(ttk.Frame):
         
         dialog = tk.Toplevel(self)
         dialog.title("Export Format")
-        dialog.geometry("300x150")
+        dialog.geometry("300x200")
         dialog.transient(self)
         dialog.grab_set()
         
         ttk.Label(dialog, text="Select export format:").pack(pady=10)
         
-        ttk.Radiobutton(dialog, text="CSV", variable=export_format, value="csv").pack(anchor=tk.W, padx=20)
-        ttk.Radiobutton(dialog, text="Text", variable=export_format, value="txt").pack(anchor=tk.W, padx=20)
+        for value, (label, _) in FORMATS.items():
+            ttk.Radiobutton(dialog, text=label, variable=export_format, value=value).pack(anchor=tk.W, padx=20)
         
         def confirm_export():
             dialog.destroy()
             format_value = export_format.get()
+            label, extension = FORMATS[format_value]
             
             # Ask for file path
             current_time = datetime.datetime.now().strftime("%Y%m%d_%H%M%S")
-            filename = f"calculator_history_{current_time}.{format_value}"
+            filename = f"calculator_history_{current_time}{extension}"
             
             filepath = filedialog.asksaveasfilename(
-                defaultextension=f".{format_value}",
+                defaultextension=extension,
                 filetypes=[
-                    ("CSV files", "*.csv") if format_value == "csv" else ("Text files", "*.txt"),
+                    (f"{label} files", f"*{extension}"),
                     ("All files", "*.*")
                 ],
                 initialfile=filename
@@ -163,48 +441,108 @@ class HistoryViewerFrame(ttk.Frame):
                 return
             
             try:
-                if format_value == "csv":
-                    self.export_to_csv(filepath, history)
-                else:
-                    self.export_to_text(filepath, history)
-                
-                messagebox.showinfo("Export Complete", f"History exported to {filepath}")
+                export = HistoryExport(self.history_manager, filepath, format_value, calculator_type).start()
             except Exception as e:
                 messagebox.showerror("Export Error", f"Failed to export history: {str(e)}")
+                return
+            self.show_export_progress(export)
         
         ttk.Button(dialog, text="Export", command=confirm_export).pack(pady=10)
     
-    def export_to_csv(self, filepath, history):
-        with open(filepath, 'w', newline='') as file:
-            writer = csv.writer(file)
-            # Write header
-            writer.writerow(["Time", "Calculator", "Input", "Result"])
-            # Write data
-            for entry in history:
-                writer.writerow([
-                    entry["timestamp"].strftime("%Y-%m-%d %H:%M:%S"),
-                    entry["type"],
-                    entry["input"],
-                    entry["result"]
-                ])
+    def show_export_progress(self, export):
+        # The export runs on a worker thread; poll it from the Tk loop
+        dialog = tk.Toplevel(self)
+        dialog.title("Exporting History")
+        dialog.geometry("350x130")
+        dialog.transient(self)
+        
+        status_var = tk.StringVar(value="Exporting...")
+        ttk.Label(dialog, textvariable=status_var).pack(pady=10)
+        
+        progress = ttk.Progressbar(dialog, mode="determinate", length=300)
+        progress.pack(padx=20, pady=5)
+        
+        cancel_button = ttk.Button(dialog, text="Cancel", command=export.cancel)
+        cancel_button.pack(pady=10)
+        dialog.protocol("WM_DELETE_WINDOW", export.cancel)
+        
+        def poll():
+            if export.total:
+                progress.config(maximum=export.total, value=min(export.written, export.total))
+                status_var.set(f"Exported {export.written:,} of {export.total:,} entries")
+            if export.cancelled and not export.finished:
+                status_var.set("Cancelling...")
+                cancel_button.state(["disabled"])
+            
+            if not export.finished:
+                self.after(100, poll)
+                return
+            
+            dialog.destroy()
+            if export.error:
+                messagebox.showerror("Export Error", f"Failed to export history: {export.error}")
+            elif not export.cancelled:
+                messagebox.showinfo("Export Complete", f"History exported to {export.filepath}")
+        
+        poll()
     
-    def export_to_text(self, filepath, history):
-        with open(filepath, 'w') as file:
-            file.write("CALCULATOR HISTORY\n")
-            file.write("=================\n\n")
+    def import_history(self):
+        filepaths = filedialog.askopenfilenames(
+            title="Import History",
+            filetypes=[
+                ("History files", "*.json *.jsonl *.csv"),
+                ("All files", "*.*")
+            ]
+        )
+        if not filepaths:
+            return
+        
+        history_import = HistoryImport(self.history_manager, filepaths).start()
+        
+        # The import runs on a worker thread; poll it from the Tk loop
+        dialog = tk.Toplevel(self)
+        dialog.title("Importing History")
+        dialog.geometry("350x130")
+        dialog.transient(self)
+        
+        status_var = tk.StringVar(value="Importing...")
+        ttk.Label(dialog, textvariable=status_var).pack(pady=10)
+        
+        # The total is unknown until the files are read
+        progress = ttk.Progressbar(dialog, mode="indeterminate", length=300)
+        progress.pack(padx=20, pady=5)
+        progress.start(20)
+        
+        cancel_button = ttk.Button(dialog, text="Cancel", command=history_import.cancel)
+        cancel_button.pack(pady=10)
+        dialog.protocol("WM_DELETE_WINDOW", history_import.cancel)
+        
+        def poll():
+            stats = history_import.stats
+            status_var.set(f"Read {stats['read']:,} entries")
+            if history_import.cancelled and not history_import.finished:
+                status_var.set("Cancelling...")
+                cancel_button.state(["disabled"])
             
-            for entry in history:
-                file.write(f"Time: {entry['timestamp'].strftime('%Y-%m-%d %H:%M:%S')}\n")
-                file.write(f"Calculator: {entry['type']}\n")
-                file.write(f"Input: {entry['input']}\n")
-                file.write(f"Result: {entry['result']}\n")
-                file.write("-" * 40 + "\n\n")
+            if not history_import.finished:
+                self.after(100, poll)
+                return
+            
+            dialog.destroy()
+            if history_import.error:
+                messagebox.showerror("Import Error", f"Failed to import history: {history_import.error}")
+            elif not history_import.cancelled:
+                message = f"Imported {stats['added']:,} new entries from {stats['read']:,} read."
+                if stats["skipped"]:
+                    message += f"\n{stats['skipped']:,} unreadable entries were skipped."
+                messagebox.showinfo("Import Complete", message)
+        
+        poll()
     
     def clear_history(self):
         # Ask for confirmation
         if messagebox.askyesno("Clear History", "Are you sure you want to clear all history?"):
             self.history_manager.clear_history()
-            self.refresh_history()
     
     def show_context_menu(self, event):
         # Get the item under cursor
@@ -241,8 +579,5 @@ class HistoryViewerFrame(ttk.Frame):
         # Get item ID
         item_id = self.history_tree.item(selected[0], "tags")[0]
         
-        # Delete from history manager
-        self.history_manager.delete_entry(item_id)
-        
-        # Refresh display
-        self.refresh_history()
\ No newline at end of file
+        # Delete from history manager; the change event redraws the rows
+        self.history_manager.delete_entry(item_id)
\ No newline at end of file
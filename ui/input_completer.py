@@ -0,0 +1,116 @@
+import tkinter as tk
+
+# Keys that move through or close the suggestions rather than edit the text
+NAVIGATION_KEYS = {"Up", "Down", "Return", "KP_Enter", "Escape", "Tab", "Left", "Right",
+                   "Shift_L", "Shift_R", "Control_L", "Control_R", "Alt_L", "Alt_R"}
+
+class InputCompleter:
+    """A drop-down of past inputs under an entry, updated as you type.
+
+    Suggestions come from the history manager's prefix trie, so looking
+    them up on every key press stays cheap however long the history is.
+    Up/Down move through them, Return or a click picks one, Escape closes
+    the list. on_choose(text) handles a pick; by default it replaces the
+    entry's text.
+    """
+
+    def __init__(self, entry, history_manager, calculator_type, on_choose=None, limit=8):
+        self.entry = entry
+        self.history_manager = history_manager
+        self.calculator_type = calculator_type
+        self.on_choose = on_choose
+        self.limit = limit
+        self.popup = None
+        self.listbox = None
+
+        entry.bind("<KeyRelease>", self.on_key_release, add="+")
+        entry.bind("<Down>", lambda e: self.move_selection(1), add="+")
+        entry.bind("<Up>", lambda e: self.move_selection(-1), add="+")
+        entry.bind("<Return>", self.on_return, add="+")
+        entry.bind("<Escape>", lambda e: self.hide(), add="+")
+        # Build the suggestions in the background before the first key
+        entry.bind("<FocusIn>", lambda e: history_manager.prepare_suggestions(), add="+")
+        entry.bind("<FocusOut>", lambda e: entry.after(200, self.hide_unless_focused), add="+")
+        entry.bind("<Destroy>", lambda e: self.hide(), add="+")
+
+    def on_key_release(self, event):
+        if event.keysym in NAVIGATION_KEYS:
+            return
+        text = self.entry.get().strip()
+        suggestions = []
+        if text:
+            suggestions = [
+                suggestion
+                for suggestion in self.history_manager.suggest_inputs(text, self.calculator_type, self.limit)
+                if suggestion != text
+            ]
+        if suggestions:
+            self.show(suggestions)
+        else:
+            self.hide()
+
+    def show(self, suggestions):
+        if self.popup is None:
+            self.popup = tk.Toplevel(self.entry)
+            self.popup.overrideredirect(True)
+            self.listbox = tk.Listbox(self.popup, exportselection=False, activestyle="none")
+            self.listbox.pack(fill=tk.BOTH, expand=True)
+            self.listbox.bind("<ButtonRelease-1>", self.on_click)
+
+        self.listbox.delete(0, tk.END)
+        for suggestion in suggestions:
+            self.listbox.insert(tk.END, suggestion)
+        self.listbox.config(height=len(suggestions))
+
+        # Keep the list just under the entry, as wide as it
+        x = self.entry.winfo_rootx()
+        y = self.entry.winfo_rooty() + self.entry.winfo_height()
+        self.popup.geometry(f"{self.entry.winfo_width()}x{self.listbox.winfo_reqheight()}+{x}+{y}")
+        self.popup.lift()
+
+    def hide(self):
+        if self.popup is not None:
+            self.popup.destroy()
+            self.popup = None
+            self.listbox = None
+
+    def hide_unless_focused(self):
+        # Focus may have moved to the list itself, to click a suggestion
+        try:
+            focused = self.entry.focus_get()
+        except (KeyError, tk.TclError):
+            focused = None
+        if self.listbox is None or focused is not self.listbox:
+            self.hide()
+
+    def move_selection(self, step):
+        if self.listbox is None:
+            return
+        selection = self.listbox.curselection()
+        index = selection[0] + step if selection else (0 if step > 0 else self.listbox.size() - 1)
+        index = max(0, min(index, self.listbox.size() - 1))
+        self.listbox.selection_clear(0, tk.END)
+        self.listbox.selection_set(index)
+        self.listbox.see(index)
+        return "break"
+
+    def on_return(self, event):
+        if self.listbox is None or not self.listbox.curselection():
+            return
+        self.choose(self.listbox.get(self.listbox.curselection()[0]))
+        return "break"
+
+    def on_click(self, event):
+        index = self.listbox.nearest(event.y)
+        if index >= 0:
+            self.choose(self.listbox.get(index))
+
+    def choose(self, text):
+        self.hide()
+        self.entry.focus_set()
+        if self.on_choose:
+            self.on_choose(text)
+        else:
+            self.entry.delete(0, tk.END)
+            self.entry.insert(0, text)
+            self.entry.icursor(tk.END)
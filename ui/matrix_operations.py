@@ -2,6 +2,8 @@ import tkinter as tk
 from tkinter import ttk
 import numpy as np
 
+from utils.calculations import matrix_operation
+
 class MatrixOperationsFrame(ttk.Frame):
     def __init__(self, parent, history_manager):
         super().__init__(parent, padding="10")
@@ -227,47 +229,14 @@ class MatrixOperationsFrame(ttk.Frame):
             matrix_b = self.get_matrix_values(self.matrix_b_entries)
             
             operation = self.operation.get()
-            result = None
-            operation_str = ""
+            try:
+                result, operation_str = matrix_operation(operation, matrix_a, matrix_b)
+            except ValueError as e:
+                self.show_error(str(e))
+                return
             
-            if operation == "add":
-                # Check dimensions
-                if matrix_a.shape != matrix_b.shape:
-                    self.show_error("Matrix dimensions must match for addition")
-                    return
-                    
-                result = matrix_a + matrix_b
-                operation_str = "A + B"
-                
-            elif operation == "subtract":
-                # Check dimensions
-                if matrix_a.shape != matrix_b.shape:
-                    self.show_error("Matrix dimensions must match for subtraction")
-                    return
-                    
-                result = matrix_a - matrix_b
-                operation_str = "A - B"
-                
-            elif operation == "multiply":
-                # Check dimensions
-                if matrix_a.shape[1] != matrix_b.shape[0]:
-                    self.show_error("Number of columns in A must equal number of rows in B for multiplication")
-                    return
-                    
-                result = np.matmul(matrix_a, matrix_b)
-                operation_str = "A × B"
-                
-            elif operation == "transpose_a":
-                result = np.transpose(matrix_a)
-                operation_str = "A^T"
-                
-            elif operation == "determinant_a":
-                # Check if matrix is square
-                if matrix_a.shape[0] != matrix_a.shape[1]:
-                    self.show_error("Matrix must be square to calculate determinant")
-                    return
-                    
-                det = np.linalg.det(matrix_a)
+            if operation == "determinant_a":
+                det = result
                 
                 # Display determinant result
                 result_label = ttk.Label(
@@ -285,21 +254,6 @@ class MatrixOperationsFrame(ttk.Frame):
                 )
                 
                 return
-                
-            elif operation == "inverse_a":
-                # Check if matrix is square
-                if matrix_a.shape[0] != matrix_a.shape[1]:
-                    self.show_error("Matrix must be square to calculate inverse")
-                    return
-                
-                # Check if matrix is invertible
-                det = np.linalg.det(matrix_a)
-                if abs(det) < 1e-10:
-                    self.show_error("Matrix is singular (not invertible)")
-                    return
-                    
-                result = np.linalg.inv(matrix_a)
-                operation_str = "A^-1"
             
             # Display result matrix
             self.display_matrix(result)
@@ -1,6 +1,8 @@
 import tkinter as tk
 from tkinter import ttk
 
+from utils.calculations import bitwise_operation
+
 class ProgrammerCalculatorFrame(ttk.Frame):
     def __init__(self, parent, history_manager):
         super().__init__(parent, padding="10")
@@ -351,15 +353,11 @@ class ProgrammerCalculatorFrame(ttk.Frame):
         self.prompt_for_second_operand("XOR")
     
     def bitwise_not(self):
-        # Perform NOT operation
-        word_size = int(self.word_size.get())
-        mask = (1 << word_size) - 1
-        
         # Record original value
         original = self.current_value
         
-        # Perform NOT with masking to maintain word size
-        self.current_value = (~self.current_value) & mask
+        # Perform NOT, masked to the word size
+        self.current_value = bitwise_operation(original, "NOT", word_size=int(self.word_size.get()))
         
         # Update displays
         self.update_displays()
@@ -402,12 +400,7 @@ class ProgrammerCalculatorFrame(ttk.Frame):
                 original = self.current_value
                 
                 # Perform the operation
-                if operation == "AND":
-                    self.current_value &= second_value
-                elif operation == "OR":
-                    self.current_value |= second_value
-                elif operation == "XOR":
-                    self.current_value ^= second_value
+                self.current_value = bitwise_operation(original, operation, second_value)
                 
                 # Update displays
                 self.update_displays()
@@ -450,15 +443,9 @@ class ProgrammerCalculatorFrame(ttk.Frame):
                 # Record original value
                 original = self.current_value
                 
-                # Get word size
-                word_size = int(self.word_size.get())
-                mask = (1 << word_size) - 1
-                
                 # Perform the shift
-                if operation == "<<":
-                    self.current_value = (self.current_value << shift_amount) & mask
-                elif operation == ">>":
-                    self.current_value = (self.current_value >> shift_amount)
+                word_size = int(self.word_size.get())
+                self.current_value = bitwise_operation(original, operation, shift_amount, word_size)
                 
                 # Update displays
                 self.update_displays()
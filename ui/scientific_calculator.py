@@ -2,6 +2,8 @@ import tkinter as tk
 from tkinter import ttk
 import math
 
+from utils.calculations import apply_function, apply_operator
+
 class ScientificCalculatorFrame(ttk.Frame):
     def __init__(self, parent, history_manager):
         super().__init__(parent, padding="10")
@@ -233,35 +235,14 @@ class ScientificCalculatorFrame(ttk.Frame):
         expression = f"{function}({value})"
         
         try:
-            if function == "sin":
-                if self.in_degree_mode:
-                    value = math.radians(value)
-                self.result = math.sin(value)
-            elif function == "cos":
-                if self.in_degree_mode:
-                    value = math.radians(value)
-                self.result = math.cos(value)
-            elif function == "tan":
-                if self.in_degree_mode:
-                    value = math.radians(value)
-                self.result = math.tan(value)
-            elif function == "ln":
-                self.result = math.log(value)  # Natural log
-            elif function == "log":
-                self.result = math.log10(value)  # Base 10 log
-            elif function == "sqrt":
-                self.result = math.sqrt(value)
-            elif function == "square":
-                self.result = value ** 2
+            self.result = apply_function(function, value, degrees=self.in_degree_mode)
+            if function == "square":
                 expression = f"({value})²"
             elif function == "cube":
-                self.result = value ** 3
                 expression = f"({value})³"
             elif function == "reciprocal":
-                self.result = 1 / value
                 expression = f"1/({value})"
             elif function == "exp":
-                self.result = math.exp(value)
                 expression = f"e^({value})"
             
             # Format result for display
@@ -297,20 +278,8 @@ class ScientificCalculatorFrame(ttk.Frame):
             expression = f"{self.first_number} {display_operator} {second_number}"
             
             try:
-                if self.current_operation == "+":
-                    self.result = self.first_number + second_number
-                elif self.current_operation == "-":
-                    self.result = self.first_number - second_number
-                elif self.current_operation == "*":
-                    self.result = self.first_number * second_number
-                elif self.current_operation == "/":
-                    if second_number == 0:
-                        raise ZeroDivisionError("Division by zero")
-                    self.result = self.first_number / second_number
-                elif self.current_operation == "%":
-                    self.result = self.first_number % second_number
-                elif self.current_operation == "^":
-                    self.result = self.first_number ** second_number
+                self.result = apply_operator(self.first_number, self.current_operation, second_number)
+                if self.current_operation == "^":
                     expression = f"{self.first_number}^{second_number}"
                 
                 # Format the result
@@ -1,85 +1,15 @@
 import tkinter as tk
 from tkinter import ttk
 
+from utils.calculations import UNIT_CATEGORIES, convert_units, format_converted
+
 class UnitConverterFrame(ttk.Frame):
     def __init__(self, parent, history_manager):
         super().__init__(parent, padding="10")
         self.history_manager = history_manager
         
         # Define unit categories and conversions
-        self.unit_categories = {
-            "Length": {
-                "Meter": 1.0,
-                "Kilometer": 1000.0,
-                "Centimeter": 0.01,
-                "Millimeter": 0.001,
-                "Inch": 0.0254,
-                "Foot": 0.3048,
-                "Yard": 0.9144,
-                "Mile": 1609.344
-            },
-            "Weight/Mass": {
-                "Kilogram": 1.0,
-                "Gram": 0.001,
-                "Milligram": 0.000001,
-                "Pound": 0.45359237,
-                "Ounce": 0.028349523125,
-                "Ton": 1000.0
-            },
-            "Temperature": {
-                "Celsius": "C",
-                "Fahrenheit": "F",
-                "Kelvin": "K"
-            },
-            "Area": {
-                "Square Meter": 1.0,
-                "Square Kilometer": 1000000.0,
-                "Square Centimeter": 0.0001,
-                "Square Millimeter": 0.000001,
-                "Square Inch": 0.00064516,
-                "Square Foot": 0.09290304,
-                "Square Yard": 0.83612736,
-                "Acre": 4046.8564224,
-                "Hectare": 10000.0
-            },
-            "Volume": {
-                "Cubic Meter": 1.0,
-                "Cubic Centimeter": 0.000001,
-                "Liter": 0.001,
-                "Milliliter": 0.000001,
-                "Gallon (US)": 0.00378541,
-                "Quart (US)": 0.000946353,
-                "Pint (US)": 0.000473176,
-                "Cup (US)": 0.000236588,
-                "Fluid Ounce (US)": 0.0000295735,
-                "Cubic Inch": 0.0000163871,
-                "Cubic Foot": 0.0283168
-            },
-            "Time": {
-                "Second": 1.0,
-                "Minute": 60.0,
-                "Hour": 3600.0,
-                "Day": 86400.0,
-                "Week": 604800.0,
-                "Month (30 days)": 2592000.0,
-                "Year (365 days)": 31536000.0
-            },
-            "Speed": {
-                "Meter per Second": 1.0,
-                "Kilometer per Hour": 0.277778,
-                "Mile per Hour": 0.44704,
-                "Knot": 0.514444,
-                "Foot per Second": 0.3048
-            },
-            "Pressure": {
-                "Pascal": 1.0,
-                "Kilopascal": 1000.0,
-                "Bar": 100000.0,
-                "Atmosphere": 101325.0,
-                "mmHg": 133.322,
-                "PSI": 6894.76
-            }
-        }
+        self.unit_categories = UNIT_CATEGORIES
         
         # Create main container
         self.main_container = ttk.Frame(self)
@@ -217,31 +147,8 @@ class UnitConverterFrame(ttk.Frame):
                 self.formula_var.set("")
                 return
             
-            # Handle temperature conversion specially
-            if category == "Temperature":
-                converted_value, formula = self.convert_temperature(from_unit, to_unit, from_value)
-            else:
-                # Get conversion factors
-                from_factor = self.unit_categories[category][from_unit]
-                to_factor = self.unit_categories[category][to_unit]
-                
-                # Convert to base unit then to target unit
-                base_value = from_value * from_factor
-                converted_value = base_value / to_factor
-                
-                # Create formula string
-                if from_factor == to_factor:
-                    formula = f"{from_value} {from_unit} = {converted_value} {to_unit}"
-                else:
-                    formula = f"{from_value} {from_unit} × {from_factor} ÷ {to_factor} = {converted_value} {to_unit}"
-            
-            # Format the result
-            if abs(converted_value) < 0.000001 and converted_value != 0:
-                formatted_value = f"{converted_value:.10e}"
-            elif abs(converted_value) > 1000000:
-                formatted_value = f"{converted_value:.10e}"
-            else:
-                formatted_value = f"{converted_value:.10g}"
+            converted_value, formula = convert_units(category, from_unit, to_unit, from_value)
+            formatted_value = format_converted(converted_value)
             
             # Update the result
             self.to_value_var.set(formatted_value)
@@ -258,39 +165,6 @@ class UnitConverterFrame(ttk.Frame):
             self.to_value_var.set(f"Error: {str(e)}")
             self.formula_var.set("")
     
-    def convert_temperature(self, from_unit, to_unit, value):
-        # Convert to Celsius first (as base unit)
-        if from_unit == "Celsius":
-            celsius = value
-        elif from_unit == "Fahrenheit":
-            celsius = (value - 32) * 5/9
-            formula_part_1 = f"({value}°F - 32) × 5/9 = {celsius}°C"
-        elif from_unit == "Kelvin":
-            celsius = value - 273.15
-            formula_part_1 = f"{value}K - 273.15 = {celsius}°C"
-        
-        # Convert from Celsius to target unit
-        if to_unit == "Celsius":
-            result = celsius
-            if from_unit == "Celsius":
-                formula = f"{value}°C = {result}°C"
-            else:
-                formula = formula_part_1
-        elif to_unit == "Fahrenheit":
-            result = celsius * 9/5 + 32
-            if from_unit == "Celsius":
-                formula = f"{value}°C × 9/5 + 32 = {result}°F"
-            else:
-                formula = f"{formula_part_1}, then {celsius}°C × 9/5 + 32 = {result}°F"
-        elif to_unit == "Kelvin":
-            result = celsius + 273.15
-            if from_unit == "Celsius":
-                formula = f"{value}°C + 273.15 = {result}K"
-            else:
-                formula = f"{formula_part_1}, then {celsius}°C + 273.15 = {result}K"
-        
-        return result, formula
-    
     def update_common_values(self):
         # Clear existing widgets
         for widget in self.common_values_frame.winfo_children():
@@ -358,24 +232,11 @@ class UnitConverterFrame(ttk.Frame):
         for target_unit in units:
             if target_unit != unit:
                 # Calculate the conversion
-                if category == "Temperature":
-                    try:
-                        converted_value, _ = self.convert_temperature(unit, target_unit, value)
-                    except:
-                        continue
-                else:
-                    from_factor = units[unit]
-                    to_factor = units[target_unit]
-                    base_value = value * from_factor
-                    converted_value = base_value / to_factor
-                
-                # Format the result
-                if abs(converted_value) < 0.000001 and converted_value != 0:
-                    formatted_value = f"{converted_value:.6e}"
-                elif abs(converted_value) > 1000000:
-                    formatted_value = f"{converted_value:.6e}"
-                else:
-                    formatted_value = f"{converted_value:.6g}"
+                try:
+                    converted_value, _ = convert_units(category, unit, target_unit, value)
+                except:
+                    continue
+                formatted_value = format_converted(converted_value, digits=6)
                 
                 # Add the conversion to the frame
                 conversion_text = f"{formatted_value} {target_unit}"
@@ -0,0 +1,209 @@
+import lzma
+import os
+import struct
+import zlib
+
+from utils.history_entry import HistoryEntry, type_code, type_name
+from utils.history_stores import read_json_snapshot
+
+# File layout (all integers little-endian):
+#
+#   header   magic "CVHS", u8 version, u8 compression, u16 reserved,
+#            u32 type count, u32 record count
+#   body     (compressed as a whole if compression != NONE)
+#            type table: per type, u16 length + UTF-8 name
+#            records:    per entry, u32 record length followed by
+#                        u8 id kind, u8 id length, f64 epoch, u16 type index,
+#                        u32 input length, id bytes, input, result
+#
+# The result length is whatever remains of the record, and the length prefix
+# lets a reader skip records it does not understand.
+
+MAGIC = b"CVHS"
+VERSION = 2  # 2 added 64-bit ids
+
+COMPRESSION_NONE = 0
+COMPRESSION_ZLIB = 1
+COMPRESSION_LZMA = 2
+
+COMPRESSION_NAMES = {
+    None: COMPRESSION_NONE,
+    "zlib": COMPRESSION_ZLIB,
+    "lzma": COMPRESSION_LZMA,
+}
+
+ID_UUID = 0    # 16 raw uuid bytes (legacy ids)
+ID_TEXT = 1    # UTF-8 string (unusual ids)
+ID_INT64 = 2   # 8-byte big-endian time-sortable id
+
+HEADER = struct.Struct("<4sBBHII")
+RECORD = struct.Struct("<IBBdHI")
+TYPE_NAME = struct.Struct("<H")
+
+
+class SnapshotFormatError(ValueError):
+    pass
+
+
+def encode_snapshot(history, compression=None):
+    """Encode entries to the binary snapshot format."""
+    method = COMPRESSION_NAMES[compression]
+
+    # String table for the repeated calculator type names
+    type_indexes = {}
+    type_names = []
+    for entry in history:
+        if entry.type_code not in type_indexes:
+            type_indexes[entry.type_code] = len(type_names)
+            type_names.append(type_name(entry.type_code))
+
+    parts = []
+    for name in type_names:
+        encoded = name.encode("utf-8")
+        parts.append(TYPE_NAME.pack(len(encoded)))
+        parts.append(encoded)
+
+    pack_record = RECORD.pack
+    for entry in history:
+        packed_id = entry._id
+        if isinstance(packed_id, int):
+            id_kind = ID_INT64
+            packed_id = packed_id.to_bytes(8, "big")
+        elif isinstance(packed_id, bytes):
+            id_kind = ID_UUID
+        else:
+            id_kind = ID_TEXT
+            packed_id = packed_id.encode("utf-8")
+        input_bytes = str(entry.input).encode("utf-8")
+        result_bytes = str(entry.result).encode("utf-8")
+
+        length = RECORD.size - 4 + len(packed_id) + len(input_bytes) + len(result_bytes)
+        parts.append(pack_record(
+            length, id_kind, len(packed_id), entry.epoch,
+            type_indexes[entry.type_code], len(input_bytes)
+        ))
+        parts.append(packed_id)
+        parts.append(input_bytes)
+        parts.append(result_bytes)
+
+    body = b"".join(parts)
+    if method == COMPRESSION_ZLIB:
+        body = zlib.compress(body, 6)
+    elif method == COMPRESSION_LZMA:
+        body = lzma.compress(body)
+
+    header = HEADER.pack(MAGIC, VERSION, method, 0, len(type_names), len(history))
+    return header + body
+
+
+def decode_snapshot(data):
+    """Decode a binary snapshot into a list of HistoryEntry objects."""
+    if len(data) < HEADER.size:
+        raise SnapshotFormatError("Snapshot is truncated")
+    magic, version, method, _, type_count, record_count = HEADER.unpack_from(data, 0)
+    if magic != MAGIC:
+        raise SnapshotFormatError("Not a history snapshot")
+    if version > VERSION:
+        raise SnapshotFormatError(f"Unsupported snapshot version {version}")
+
+    body = memoryview(data)[HEADER.size:]
+    if method == COMPRESSION_ZLIB:
+        body = memoryview(zlib.decompress(body))
+    elif method == COMPRESSION_LZMA:
+        body = memoryview(lzma.decompress(body))
+    elif method != COMPRESSION_NONE:
+        raise SnapshotFormatError(f"Unknown compression {method}")
+
+    offset = 0
+    codes = []
+    for _ in range(type_count):
+        (length,) = TYPE_NAME.unpack_from(body, offset)
+        offset += TYPE_NAME.size
+        codes.append(type_code(str(body[offset:offset + length], "utf-8")))
+        offset += length
+
+    unpack_record = RECORD.unpack_from
+    header_size = RECORD.size
+    make_entry = HistoryEntry.from_packed
+    history = []
+    for _ in range(record_count):
+        length, id_kind, id_length, epoch, type_index, input_length = unpack_record(body, offset)
+        start = offset + header_size
+        end = offset + 4 + length
+
+        id_end = start + id_length
+        if id_kind == ID_INT64:
+            packed_id = int.from_bytes(body[start:id_end], "big")
+        elif id_kind == ID_UUID:
+            packed_id = bytes(body[start:id_end])
+        else:
+            packed_id = str(body[start:id_end], "utf-8")
+        input_end = id_end + input_length
+
+        history.append(make_entry(
+            packed_id, epoch, codes[type_index],
+            str(body[id_end:input_end], "utf-8"),
+            str(body[input_end:end], "utf-8")
+        ))
+        offset = end
+
+    return history
+
+
+def write_binary_snapshot(path, history, compression=None):
+    """Atomically write the history as a binary snapshot."""
+    data = encode_snapshot(history, compression)
+    tmp_path = path + ".tmp"
+    with open(tmp_path, 'wb') as f:
+        f.write(data)
+    os.replace(tmp_path, path)
+
+
+def read_binary_snapshot(path):
+    """Read a binary snapshot with a single read."""
+    if not os.path.exists(path):
+        return []
+    with open(path, 'rb') as f:
+        return decode_snapshot(f.read())
+
+
+class BinaryHistoryStore:
+    """Stores the whole history as a versioned binary snapshot.
+
+    Like JsonHistoryStore every change rewrites the file, but encoding and
+    decoding are several times faster and the file is much smaller. An
+    existing JSON history is migrated the first time the store is loaded.
+    """
+
+    needs_full_history = True
+
+    def __init__(self, snapshot_file, legacy_json_file=None, compression=None):
+        self.snapshot_file = snapshot_file
+        self.legacy_json_file = legacy_json_file
+        self.compression = compression
+
+    def load(self):
+        if not os.path.exists(self.snapshot_file) and self.legacy_json_file \
+                and os.path.exists(self.legacy_json_file):
+            history = read_json_snapshot(self.legacy_json_file)
+            self.save(history)
+            return history
+        return read_binary_snapshot(self.snapshot_file)
+
+    def append(self, entry, history, trimmed_ids=()):
+        self.save(history)
+
+    def remove(self, entry_ids, history):
+        self.save(history)
+
+    def clear(self):
+        self.save([])
+
+    def save(self, history):
+        write_binary_snapshot(self.snapshot_file, history, self.compression)
+
+    def apply_batch(self, ops, history):
+        self.save(history)
+
+    def close(self):
+        pass
@@ -0,0 +1,490 @@
+import math
+
+import numpy as np
+
+from utils.expressions import compile_expression
+from utils.sample_tiles import SampleTileCache
+
+# Pure computations behind the calculator frames. The frames read their
+# inputs from widgets and call these, which keeps the math usable (and
+# measurable) without Tk.
+
+
+def apply_operator(first, operator, second):
+    """Apply a binary keypad operator (+, -, *, /, % or ^)."""
+    if operator == "+":
+        return first + second
+    elif operator == "-":
+        return first - second
+    elif operator == "*":
+        return first * second
+    elif operator == "/":
+        if second == 0:
+            raise ZeroDivisionError("Division by zero")
+        return first / second
+    elif operator == "%":
+        return first % second
+    elif operator == "^":
+        return first ** second
+    raise ValueError(f"Unknown operator: {operator}")
+
+
+def apply_function(function, value, degrees=False):
+    """Apply a scientific keypad function to value."""
+    if function == "sin":
+        if degrees:
+            value = math.radians(value)
+        return math.sin(value)
+    elif function == "cos":
+        if degrees:
+            value = math.radians(value)
+        return math.cos(value)
+    elif function == "tan":
+        if degrees:
+            value = math.radians(value)
+        return math.tan(value)
+    elif function == "ln":
+        return math.log(value)  # Natural log
+    elif function == "log":
+        return math.log10(value)  # Base 10 log
+    elif function == "sqrt":
+        return math.sqrt(value)
+    elif function == "square":
+        return value ** 2
+    elif function == "cube":
+        return value ** 3
+    elif function == "reciprocal":
+        return 1 / value
+    elif function == "exp":
+        return math.exp(value)
+    raise ValueError(f"Unknown function: {function}")
+
+
+# Conversion factors to each category's base unit
+UNIT_CATEGORIES = {
+    "Length": {
+        "Meter": 1.0,
+        "Kilometer": 1000.0,
+        "Centimeter": 0.01,
+        "Millimeter": 0.001,
+        "Inch": 0.0254,
+        "Foot": 0.3048,
+        "Yard": 0.9144,
+        "Mile": 1609.344
+    },
+    "Weight/Mass": {
+        "Kilogram": 1.0,
+        "Gram": 0.001,
+        "Milligram": 0.000001,
+        "Pound": 0.45359237,
+        "Ounce": 0.028349523125,
+        "Ton": 1000.0
+    },
+    "Temperature": {
+        "Celsius": "C",
+        "Fahrenheit": "F",
+        "Kelvin": "K"
+    },
+    "Area": {
+        "Square Meter": 1.0,
+        "Square Kilometer": 1000000.0,
+        "Square Centimeter": 0.0001,
+        "Square Millimeter": 0.000001,
+        "Square Inch": 0.00064516,
+        "Square Foot": 0.09290304,
+        "Square Yard": 0.83612736,
+        "Acre": 4046.8564224,
+        "Hectare": 10000.0
+    },
+    "Volume": {
+        "Cubic Meter": 1.0,
+        "Cubic Centimeter": 0.000001,
+        "Liter": 0.001,
+        "Milliliter": 0.000001,
+        "Gallon (US)": 0.00378541,
+        "Quart (US)": 0.000946353,
+        "Pint (US)": 0.000473176,
+        "Cup (US)": 0.000236588,
+        "Fluid Ounce (US)": 0.0000295735,
+        "Cubic Inch": 0.0000163871,
+        "Cubic Foot": 0.0283168
+    },
+    "Time": {
+        "Second": 1.0,
+        "Minute": 60.0,
+        "Hour": 3600.0,
+        "Day": 86400.0,
+        "Week": 604800.0,
+        "Month (30 days)": 2592000.0,
+        "Year (365 days)": 31536000.0
+    },
+    "Speed": {
+        "Meter per Second": 1.0,
+        "Kilometer per Hour": 0.277778,
+        "Mile per Hour": 0.44704,
+        "Knot": 0.514444,
+        "Foot per Second": 0.3048
+    },
+    "Pressure": {
+        "Pascal": 1.0,
+        "Kilopascal": 1000.0,
+        "Bar": 100000.0,
+        "Atmosphere": 101325.0,
+        "mmHg": 133.322,
+        "PSI": 6894.76
+    }
+}
+
+
+def convert_temperature(from_unit, to_unit, value):
+    # Convert to Celsius first (as base unit)
+    if from_unit == "Celsius":
+        celsius = value
+    elif from_unit == "Fahrenheit":
+        celsius = (value - 32) * 5/9
+        formula_part_1 = f"({value}°F - 32) × 5/9 = {celsius}°C"
+    elif from_unit == "Kelvin":
+        celsius = value - 273.15
+        formula_part_1 = f"{value}K - 273.15 = {celsius}°C"
+
+    # Convert from Celsius to target unit
+    if to_unit == "Celsius":
+        result = celsius
+        if from_unit == "Celsius":
+            formula = f"{value}°C = {result}°C"
+        else:
+            formula = formula_part_1
+    elif to_unit == "Fahrenheit":
+        result = celsius * 9/5 + 32
+        if from_unit == "Celsius":
+            formula = f"{value}°C × 9/5 + 32 = {result}°F"
+        else:
+            formula = f"{formula_part_1}, then {celsius}°C × 9/5 + 32 = {result}°F"
+    elif to_unit == "Kelvin":
+        result = celsius + 273.15
+        if from_unit == "Celsius":
+            formula = f"{value}°C + 273.15 = {result}K"
+        else:
+            formula = f"{formula_part_1}, then {celsius}°C + 273.15 = {result}K"
+
+    return result, formula
+
+
+def convert_units(category, from_unit, to_unit, value):
+    """Convert value between two units of a category, returning (value, formula)."""
+    # Handle temperature conversion specially
+    if category == "Temperature":
+        return convert_temperature(from_unit, to_unit, value)
+
+    # Get conversion factors
+    from_factor = UNIT_CATEGORIES[category][from_unit]
+    to_factor = UNIT_CATEGORIES[category][to_unit]
+
+    # Convert to base unit then to target unit
+    base_value = value * from_factor
+    converted_value = base_value / to_factor
+
+    # Create formula string
+    if from_factor == to_factor:
+        formula = f"{value} {from_unit} = {converted_value} {to_unit}"
+    else:
+        formula = f"{value} {from_unit} × {from_factor} ÷ {to_factor} = {converted_value} {to_unit}"
+    return converted_value, formula
+
+
+def format_converted(value, digits=10):
+    """Format a converted value, switching to exponent form for extremes."""
+    if abs(value) < 0.000001 and value != 0:
+        return f"{value:.{digits}e}"
+    elif abs(value) > 1000000:
+        return f"{value:.{digits}e}"
+    return f"{value:.{digits}g}"
+
+
+def convert_currency(amount, from_rate, to_rate):
+    """Convert amount using rates against a common base, returning (amount, rate)."""
+    rate = to_rate / from_rate
+    return amount * rate, rate
+
+
+def solve_linear(a, b):
+    """Solve ax + b = 0, returning (equation, result, steps)."""
+    if a == 0:
+        if b == 0:
+            result = "Infinite solutions (identity)"
+        else:
+            result = "No solution (contradiction)"
+    else:
+        x = -b / a
+        result = f"x = {x}"
+
+        # For nicer display, check if it's close to an integer
+        if abs(x - round(x)) < 1e-10:
+            result = f"x = {int(round(x))}"
+
+    # Create the equation for history
+    a_str = "" if a == 1 else "-" if a == -1 else f"{a}"
+    b_str = f"+ {b}" if b > 0 else f"- {abs(b)}" if b < 0 else ""
+    equation = f"{a_str}x {b_str} = 0"
+
+    steps = [
+        f"Equation: {equation}",
+        f"Step 1: Solve for x by isolating the variable",
+    ]
+
+    if a != 0:
+        steps.append(f"Step 2: x = -b/a = -({b})/{a} = {-b}/{a}")
+        steps.append(f"Result: {result}")
+    else:
+        steps.append(f"Result: {result}")
+
+    return equation, result, steps
+
+
+def solve_quadratic(a, b, c):
+    """Solve ax² + bx + c = 0, returning (equation, result, steps)."""
+    # Create the equation for history
+    a_str = "" if a == 1 else "-" if a == -1 else f"{a}"
+    b_str = f"+ {b}x" if b > 0 else f"- {abs(b)}x" if b < 0 else ""
+    c_str = f"+ {c}" if c > 0 else f"- {abs(c)}" if c < 0 else ""
+    equation = f"{a_str}x² {b_str} {c_str} = 0"
+
+    if a == 0:
+        # This is actually a linear equation
+        if b == 0:
+            if c == 0:
+                result = "Infinite solutions (identity)"
+            else:
+                result = "No solution (contradiction)"
+        else:
+            x = -c / b
+            result = f"x = {x}"
+
+        steps = [
+            f"Equation: {equation}",
+            "Note: This is actually a linear equation (a = 0)",
+            f"Solving: {b}x + {c} = 0",
+            f"x = -{c}/{b} = {-c}/{b}",
+            f"Result: {result}"
+        ]
+    else:
+        # Calculate the discriminant
+        discriminant = b**2 - 4*a*c
+
+        steps = [
+            f"Equation: {equation}",
+            f"Step 1: Calculate the discriminant (b² - 4ac)",
+            f"Discriminant = {b}² - 4({a})({c}) = {b**2} - {4*a*c} = {discriminant}"
+        ]
+
+        if discriminant > 0:
+            # Two real solutions
+            x1 = (-b + math.sqrt(discriminant)) / (2*a)
+            x2 = (-b - math.sqrt(discriminant)) / (2*a)
+
+            # For nicer display, check if solutions are close to integers
+            if abs(x1 - round(x1)) < 1e-10:
+                x1 = int(round(x1))
+            if abs(x2 - round(x2)) < 1e-10:
+                x2 = int(round(x2))
+
+            result = f"x₁ = {x1}, x₂ = {x2}"
+
+            steps.append("Step 2: Discriminant > 0, so there are two real solutions")
+            steps.append(f"x₁ = (-b + √discriminant)/(2a) = ({-b} + √{discriminant})/{2*a} = {x1}")
+            steps.append(f"x₂ = (-b - √discriminant)/(2a) = ({-b} - √{discriminant})/{2*a} = {x2}")
+
+        elif discriminant == 0:
+            # One real solution (double root)
+            x = -b / (2*a)
+
+            # For nicer display, check if solution is close to an integer
+            if abs(x - round(x)) < 1e-10:
+                x = int(round(x))
+
+            result = f"x = {x} (double root)"
+
+            steps.append("Step 2: Discriminant = 0, so there is one real solution (double root)")
+            steps.append(f"x = -b/(2a) = {-b}/{2*a} = {x}")
+
+        else:
+            # Complex solutions
+            real_part = -b / (2*a)
+            imag_part = math.sqrt(abs(discriminant)) / (2*a)
+
+            # For nicer display, check if parts are close to integers
+            if abs(real_part - round(real_part)) < 1e-10:
+                real_part = int(round(real_part))
+            if abs(imag_part - round(imag_part)) < 1e-10:
+                imag_part = int(round(imag_part))
+
+            result = f"x₁ = {real_part} + {imag_part}i, x₂ = {real_part} - {imag_part}i"
+
+            steps.append("Step 2: Discriminant < 0, so there are two complex solutions")
+            steps.append(f"Real part = -b/(2a) = {-b}/{2*a} = {real_part}")
+            steps.append(f"Imaginary part = √|discriminant|/(2a) = √{abs(discriminant)}/{2*a} = {imag_part}")
+            steps.append(f"x₁ = {real_part} + {imag_part}i")
+            steps.append(f"x₂ = {real_part} - {imag_part}i")
+
+    steps.append(f"Result: {result}")
+    return equation, result, steps
+
+
+def solve_system(a1, b1, c1, a2, b2, c2):
+    """Solve a1x + b1y = c1, a2x + b2y = c2, returning (system, result, steps)."""
+    # Create the system equations for history
+    equation1 = f"{a1}x + {b1}y = {c1}"
+    equation2 = f"{a2}x + {b2}y = {c2}"
+    system = f"{equation1}, {equation2}"
+
+    # Calculate the determinant of the coefficient matrix
+    det = a1 * b2 - a2 * b1
+
+    steps = [
+        f"System of equations:",
+        f"Equation 1: {equation1}",
+        f"Equation 2: {equation2}",
+        f"Step 1: Calculate the determinant of the coefficient matrix",
+        f"det = a₁b₂ - a₂b₁ = ({a1})({b2}) - ({a2})({b1}) = {a1*b2} - {a2*b1} = {det}"
+    ]
+
+    if det == 0:
+        # Check if the system is consistent (has infinitely many solutions)
+        if a1 * c2 == a2 * c1 and b1 * c2 == b2 * c1:
+            result = "Infinite solutions (dependent equations)"
+            steps.append("Step 2: Determinant = 0 and equations are consistent")
+            steps.append("Result: Infinite solutions (dependent equations)")
+        else:
+            result = "No solution (inconsistent system)"
+            steps.append("Step 2: Determinant = 0 but equations are inconsistent")
+            steps.append("Result: No solution (inconsistent system)")
+    else:
+        # Solve using Cramer's rule
+        det_x = c1 * b2 - c2 * b1
+        det_y = a1 * c2 - a2 * c1
+
+        x = det_x / det
+        y = det_y / det
+
+        # For nicer display, check if solutions are close to integers
+        if abs(x - round(x)) < 1e-10:
+            x = int(round(x))
+        if abs(y - round(y)) < 1e-10:
+            y = int(round(y))
+
+        result = f"x = {x}, y = {y}"
+
+        steps.append("Step 2: Determinant ≠ 0, so there is a unique solution")
+        steps.append("Step 3: Using Cramer's rule to solve for x and y")
+        steps.append(f"det_x = c₁b₂ - c₂b₁ = ({c1})({b2}) - ({c2})({b1}) = {c1*b2} - {c2*b1} = {det_x}")
+        steps.append(f"det_y = a₁c₂ - a₂c₁ = ({a1})({c2}) - ({a2})({c1}) = {a1*c2} - {a2*c1} = {det_y}")
+        steps.append(f"x = det_x/det = {det_x}/{det} = {x}")
+        steps.append(f"y = det_y/det = {det_y}/{det} = {y}")
+        steps.append(f"Result: {result}")
+
+    return system, result, steps
+
+
+def matrix_operation(operation, matrix_a, matrix_b=None):
+    """Run a Matrix tab operation, returning (result, operation_str).
+
+    The result is a matrix, or a float for "determinant_a". Raises
+    ValueError if the matrices do not fit the operation.
+    """
+    if operation == "add":
+        # Check dimensions
+        if matrix_a.shape != matrix_b.shape:
+            raise ValueError("Matrix dimensions must match for addition")
+        return matrix_a + matrix_b, "A + B"
+
+    elif operation == "subtract":
+        # Check dimensions
+        if matrix_a.shape != matrix_b.shape:
+            raise ValueError("Matrix dimensions must match for subtraction")
+        return matrix_a - matrix_b, "A - B"
+
+    elif operation == "multiply":
+        # Check dimensions
+        if matrix_a.shape[1] != matrix_b.shape[0]:
+            raise ValueError("Number of columns in A must equal number of rows in B for multiplication")
+        return np.matmul(matrix_a, matrix_b), "A × B"
+
+    elif operation == "transpose_a":
+        return np.transpose(matrix_a), "A^T"
+
+    elif operation == "determinant_a":
+        # Check if matrix is square
+        if matrix_a.shape[0] != matrix_a.shape[1]:
+            raise ValueError("Matrix must be square to calculate determinant")
+        return np.linalg.det(matrix_a), "det(A)"
+
+    elif operation == "inverse_a":
+        # Check if matrix is square
+        if matrix_a.shape[0] != matrix_a.shape[1]:
+            raise ValueError("Matrix must be square to calculate inverse")
+
+        # Check if matrix is invertible
+        det = np.linalg.det(matrix_a)
+        if abs(det) < 1e-10:
+            raise ValueError("Matrix is singular (not invertible)")
+        return np.linalg.inv(matrix_a), "A^-1"
+
+    raise ValueError(f"Unknown matrix operation: {operation}")
+
+
+def bitwise_operation(value, operation, operand=None, word_size=32):
+    """Apply a Programmer tab operation (AND, OR, XOR, NOT, << or >>)."""
+    mask = (1 << word_size) - 1
+    if operation == "AND":
+        return value & operand
+    elif operation == "OR":
+        return value | operand
+    elif operation == "XOR":
+        return value ^ operand
+    elif operation == "NOT":
+        # Mask to maintain word size
+        return (~value) & mask
+    elif operation == "<<":
+        return (value << operand) & mask
+    elif operation == ">>":
+        return value >> operand
+    raise ValueError(f"Unknown operation: {operation}")
+
+
+def parse_function(func_str):
+    """Compile a plot function like "sin(x) + x^2" to a NumPy callable.
+
+    Compiles are cached by expression text. Raises ValueError for anything
+    but numbers, x, pi, e, arithmetic and the functions in
+    utils.expressions.FUNCTIONS.
+    """
+    return compile_expression(func_str)
+
+
+def evaluate_function(func_str, x_values):
+    """Evaluate a plot function over an array of x values, or None on error."""
+    try:
+        return compile_expression(func_str)(x_values)
+    except Exception as e:
+        print(f"Error evaluating function '{func_str}': {str(e)}")
+        return None
+
+
+def sample_function(func_str, x_min, x_max, pixels, x_step=None, tiles=None,
+                    cancelled=None, progress=None):
+    """Adaptively sample a plot function over [x_min, x_max] for a plot pixels wide.
+
+    Samples are cut into tiles and reused from tiles (a SampleTileCache)
+    when given. x_step, if given, may make the first pass coarser;
+    cancelled and progress are passed to SampleTileCache.sample.
+    Returns (x_values, y_values), or None on error or when cancelled.
+    """
+    try:
+        if tiles is None:
+            tiles = SampleTileCache()
+        if x_step is not None and x_step <= 0:
+            raise ValueError("Step must be positive")
+        return tiles.sample(compile_expression(func_str), x_min, x_max, pixels, x_step, cancelled, progress)
+    except Exception as e:
+        print(f"Error evaluating function '{func_str}': {str(e)}")
+        return None
@@ -0,0 +1,251 @@
+import collections
+import re
+import threading
+
+import numpy as np
+
+# Functions a plotted expression may call, by the names users type
+FUNCTIONS = {
+    "sin": np.sin,
+    "cos": np.cos,
+    "tan": np.tan,
+    "sec": lambda x: 1 / np.cos(x),
+    "csc": lambda x: 1 / np.sin(x),
+    "cot": lambda x: 1 / np.tan(x),
+    "asin": np.arcsin,
+    "acos": np.arccos,
+    "atan": np.arctan,
+    "arcsin": np.arcsin,
+    "arccos": np.arccos,
+    "arctan": np.arctan,
+    "sinh": np.sinh,
+    "cosh": np.cosh,
+    "tanh": np.tanh,
+    "exp": np.exp,
+    "ln": np.log,
+    "log": np.log10,
+    "log10": np.log10,
+    "log2": np.log2,
+    "sqrt": np.sqrt,
+    "cbrt": np.cbrt,
+    "abs": np.abs,
+    "sign": np.sign,
+    "floor": np.floor,
+    "ceil": np.ceil,
+    "round": np.round,
+}
+
+CONSTANTS = {
+    "pi": np.pi,
+    "e": np.e,
+}
+
+VARIABLE = "x"
+
+BINARY_OPERATORS = {
+    "+": np.add,
+    "-": np.subtract,
+    "*": np.multiply,
+    "/": np.true_divide,
+    "%": np.mod,
+    "^": np.power,
+}
+
+TOKEN = re.compile(r"\s*(?:(\d+\.?\d*(?:[eE][+-]?\d+)?|\.\d+(?:[eE][+-]?\d+)?)|([A-Za-z_]\w*)|(\*\*|[-+*/%^(),]))")
+
+# Compiled expressions kept, most recently used last
+CACHE_SIZE = 128
+
+
+def tokenize(text):
+    """Split an expression into ("number" | "name" | "op", value) tokens."""
+    tokens = []
+    position = 0
+    text = text.rstrip()
+    while position < len(text):
+        match = TOKEN.match(text, position)
+        if match is None:
+            raise ValueError(f"Unexpected character {text[position:].lstrip()[0]!r}")
+        number, name, operator = match.groups()
+        if number is not None:
+            tokens.append(("number", number))
+        elif name is not None:
+            tokens.append(("name", name))
+        else:
+            # ** is accepted as Python's spelling of ^
+            tokens.append(("op", "^" if operator == "**" else operator))
+        position = match.end()
+    return tokens
+
+
+class _Parser:
+    """Recursive descent parser from tokens to a tree of tuples.
+
+    Nodes are ("num", value), ("var",), ("neg", node), ("call", name, node)
+    and ("bin", operator, left, right). Only whitelisted functions,
+    constants and x are accepted, so the tree can be run without eval.
+    ^ binds tighter than unary minus and groups to the right: -x^2^3 is
+    -(x^(2^3)).
+    """
+
+    def __init__(self, tokens):
+        self.tokens = tokens
+        self.position = 0
+
+    def peek(self):
+        if self.position < len(self.tokens):
+            return self.tokens[self.position]
+        return (None, None)
+
+    def take(self):
+        token = self.peek()
+        self.position += 1
+        return token
+
+    def expect(self, operator):
+        if self.take() != ("op", operator):
+            raise ValueError(f"Expected '{operator}'")
+
+    def parse(self):
+        if not self.tokens:
+            raise ValueError("Empty expression")
+        node = self.sum()
+        if self.position < len(self.tokens):
+            raise ValueError(f"Unexpected '{self.peek()[1]}'")
+        return node
+
+    def sum(self):
+        node = self.product()
+        while self.peek() in (("op", "+"), ("op", "-")):
+            node = ("bin", self.take()[1], node, self.product())
+        return node
+
+    def product(self):
+        node = self.unary()
+        while self.peek() in (("op", "*"), ("op", "/"), ("op", "%")):
+            node = ("bin", self.take()[1], node, self.unary())
+        return node
+
+    def unary(self):
+        if self.peek() == ("op", "-"):
+            self.take()
+            return ("neg", self.unary())
+        if self.peek() == ("op", "+"):
+            self.take()
+            return self.unary()
+        return self.power()
+
+    def power(self):
+        node = self.atom()
+        if self.peek() == ("op", "^"):
+            self.take()
+            node = ("bin", "^", node, self.unary())
+        return node
+
+    def atom(self):
+        kind, value = self.take()
+        if kind == "number":
+            return ("num", float(value))
+        if kind == "name":
+            if value in FUNCTIONS:
+                self.expect("(")
+                argument = self.sum()
+                self.expect(")")
+                return ("call", value, argument)
+            if value in CONSTANTS:
+                return ("num", CONSTANTS[value])
+            if value == VARIABLE:
+                return ("var",)
+            raise ValueError(f"Unknown name '{value}'")
+        if (kind, value) == ("op", "("):
+            node = self.sum()
+            self.expect(")")
+            return node
+        raise ValueError("Unexpected end of expression" if kind is None else f"Unexpected '{value}'")
+
+
+def parse(text):
+    """Parse an expression in x into a validated tree."""
+    return _Parser(tokenize(text)).parse()
+
+
+def _build(node):
+    """Turn a tree into a function of x, folding parts without x."""
+    kind = node[0]
+    if kind == "num":
+        value = node[1]
+        return lambda x: value
+    if kind == "var":
+        return lambda x: x
+    if kind == "neg":
+        operand = _build(node[1])
+        function = lambda x: np.negative(operand(x))
+    elif kind == "call":
+        ufunc = FUNCTIONS[node[1]]
+        operand = _build(node[2])
+        function = lambda x: ufunc(operand(x))
+    else:
+        ufunc = BINARY_OPERATORS[node[1]]
+        left = _build(node[2])
+        right = _build(node[3])
+        function = lambda x: ufunc(left(x), right(x))
+
+    if not _uses_x(node):
+        with np.errstate(all="ignore"):
+            value = float(function(0.0))
+        return lambda x: value
+    return function
+
+
+def _uses_x(node):
+    if node[0] == "var":
+        return True
+    return any(_uses_x(child) for child in node[1:] if isinstance(child, tuple))
+
+
+class CompiledExpression:
+    """An expression compiled to NumPy calls; call it with an array of x."""
+
+    def __init__(self, text, tree):
+        self.text = text
+        self.tree = tree
+        self.function = _build(tree)
+
+    def __call__(self, x_values):
+        x_values = np.asarray(x_values, dtype=float)
+        with np.errstate(all="ignore"):
+            y_values = self.function(x_values)
+        y_values = np.asarray(y_values, dtype=float)
+        if y_values.shape != x_values.shape:
+            # Constant expressions give one value; plots need one per x
+            y_values = np.full(x_values.shape, y_values)
+        return y_values
+
+
+def normalize(text):
+    """The cache key for an expression: its text with runs of spaces collapsed."""
+    return " ".join(text.split())
+
+
+_cache = collections.OrderedDict()
+_cache_lock = threading.Lock()
+
+
+def compile_expression(text):
+    """Compile an expression in x, reusing a cached compile of the same text.
+
+    Raises ValueError if the text is not a valid expression.
+    """
+    key = normalize(text)
+    with _cache_lock:
+        compiled = _cache.get(key)
+        if compiled is not None:
+            _cache.move_to_end(key)
+            return compiled
+
+    compiled = CompiledExpression(key, parse(key))
+    with _cache_lock:
+        _cache[key] = compiled
+        if len(_cache) > CACHE_SIZE:
+            _cache.popitem(last=False)
+    return compiled
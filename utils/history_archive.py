@@ -0,0 +1,407 @@
+import bisect
+import collections
+import gzip
+import itertools
+import json
+import lzma
+import os
+import shutil
+import threading
+
+from utils.history_entry import pack_id, to_epoch
+from utils.history_stores import deserialize_entry, serialize_entry
+from utils.trigram_index import SegmentTrigramIndex, search_text
+
+# Per-segment entry counts by calculator type, one JSON line per segment
+TYPE_COUNTS_FILE = "type_counts.jsonl"
+
+OPENERS = {
+    "gzip": (gzip.open, ".jsonl.gz"),
+    "lzma": (lzma.open, ".jsonl.xz"),
+}
+
+
+class HistoryArchive:
+    """Compressed, append-only segment files for entries aged out of history.
+
+    Each segment is a gzip or lzma compressed JSON-lines file whose name
+    records the time span and entry count, so queries only decompress the
+    segments that overlap the requested time range. A few decoded segments
+    are kept in memory for paging.
+
+    For positional access (count() and window()) a catalog of segments with
+    running entry totals is cached until the directory changes. Totals per
+    calculator type come from a small type-counts file maintained beside
+    the segments, so filtered windows do not decode every segment either.
+
+    Searches use trigram postings over every segment, built in memory on
+    a background thread the first time they are needed (prepare_search())
+    and then kept up to date as segments are written and removed.
+    """
+
+    def __init__(self, archive_dir, compression="gzip", cache_segments=4):
+        if compression not in OPENERS:
+            raise ValueError(f"Unknown archive compression: {compression}")
+        self.archive_dir = archive_dir
+        self.compression = compression
+        self.cache_segments = cache_segments
+        self.cache = collections.OrderedDict()
+        # Imports and exports read segments from worker threads
+        self.cache_lock = threading.Lock()
+        self.type_counts = None
+        self.catalogs = {}
+        self.catalog_stamp = None
+        self.search_index = None
+        self.search_lock = threading.Lock()
+
+    def segments(self):
+        """List (first_epoch, last_epoch, count, path) for every segment, oldest first."""
+        if not os.path.isdir(self.archive_dir):
+            return []
+
+        segments = []
+        for name in os.listdir(self.archive_dir):
+            if not name.startswith("segment-"):
+                continue
+            for _, extension in OPENERS.values():
+                if name.endswith(extension):
+                    break
+            else:
+                continue
+            try:
+                first, last, count = name[len("segment-"):-len(extension)].split("_")
+                segments.append((int(first) / 1e6, int(last) / 1e6, int(count),
+                                 os.path.join(self.archive_dir, name)))
+            except ValueError:
+                continue
+        segments.sort()
+        return segments
+
+    def has_entries(self):
+        return bool(self.segments())
+
+    def write_segment(self, entries):
+        """Write entries (oldest first) to a new segment file."""
+        if not entries:
+            return None
+        os.makedirs(self.archive_dir, exist_ok=True)
+
+        opener, extension = OPENERS[self.compression]
+        first = min(entry.epoch for entry in entries)
+        last = max(entry.epoch for entry in entries)
+        name = f"segment-{int(first * 1e6):017d}_{int(last * 1e6):017d}_{len(entries)}{extension}"
+        path = os.path.join(self.archive_dir, name)
+
+        # Write to a temporary name so a crash never leaves a partial segment
+        tmp_path = path + ".tmp"
+        with opener(tmp_path, 'wt', encoding="utf-8") as f:
+            for entry in entries:
+                f.write(json.dumps(serialize_entry(entry)) + "\n")
+        with open(tmp_path, 'rb') as f:
+            os.fsync(f.fileno())
+        os.replace(tmp_path, path)
+
+        self._add_type_counts(name, collections.Counter(entry.type for entry in entries))
+        self.catalogs = {}
+        with self.search_lock:
+            if self.search_index is not None:
+                self.search_index.add_segment(path, entries)
+        return path
+
+    def read_segment(self, path):
+        """Decode one segment, oldest entry first."""
+        with self.cache_lock:
+            if path in self.cache:
+                self.cache.move_to_end(path)
+                return self.cache[path]
+
+        entries = self._decode(path)
+        with self.cache_lock:
+            self.cache[path] = entries
+            if len(self.cache) > self.cache_segments:
+                self.cache.popitem(last=False)
+        return entries
+
+    def _decode(self, path):
+        opener = gzip.open if path.endswith(".gz") else lzma.open
+        entries = []
+        with opener(path, 'rt', encoding="utf-8") as f:
+            for line in f:
+                if line.strip():
+                    entries.append(deserialize_entry(json.loads(line)))
+        return entries
+
+    def iter_newest_first(self, calculator_type=None, since=None, until=None):
+        """Stream archived entries newest first, only opening needed segments."""
+        since_epoch = to_epoch(since) if since is not None else None
+        until_epoch = to_epoch(until) if until is not None else None
+
+        # Several windows may archive the same entries; yield each id once
+        seen = set()
+        for first, last, _, path in reversed(self.segments()):
+            if since_epoch is not None and last < since_epoch:
+                continue
+            if until_epoch is not None and first >= until_epoch:
+                continue
+            try:
+                entries = self.read_segment(path)
+            except Exception as e:
+                print(f"Error reading history archive: {str(e)}")
+                continue
+
+            for entry in reversed(entries):
+                if calculator_type and entry.type != calculator_type:
+                    continue
+                if since_epoch is not None and entry.epoch < since_epoch:
+                    continue
+                if until_epoch is not None and entry.epoch >= until_epoch:
+                    continue
+                if entry._id in seen:
+                    continue
+                seen.add(entry._id)
+                yield entry
+
+    def prepare_search(self):
+        """Start building the search index, if it is not built or building."""
+        with self.search_lock:
+            if self.search_index is not None:
+                return
+            index = self.search_index = SegmentTrigramIndex()
+        threading.Thread(target=self._build_search_index, args=(index,), daemon=True).start()
+
+    def _build_search_index(self, index):
+        for _, _, _, path in self.segments():
+            if self.search_index is not index:
+                return
+            try:
+                # Bypass the cache, which holds the segments being paged
+                entries = self._decode(path)
+            except Exception as e:
+                print(f"Error reading history archive: {str(e)}")
+                continue
+            with self.search_lock:
+                # Rewritten or removed meanwhile, or written (and so
+                # indexed) since the listing
+                if self.search_index is index and os.path.exists(path):
+                    index.add_segment(path, entries)
+        with self.search_lock:
+            index.ready = True
+
+    def search(self, text, calculator_type=None, limit=None, newest_first=False, exclude=()):
+        """Archived entries whose input or result contains text, case-insensitively.
+
+        Once the search index is ready, only segments holding entries with
+        the rarest trigram of text are decoded. Until then, and for text
+        shorter than three characters, segments are scanned in turn. Either
+        way segments are visited in the requested order, stopping once limit
+        entries are found. exclude holds packed ids to skip, such as those
+        in the hot tier.
+        """
+        text = text.lower()
+        self.prepare_search()
+        candidates = None
+        with self.search_lock:
+            if len(text) >= 3 and self.search_index.ready:
+                candidates = self.search_index.candidates(text)
+
+        segments, _ = self._catalog(None)  # Newest first
+        if not newest_first:
+            segments = reversed(segments)
+
+        seen = set(exclude)
+        results = []
+        for _, _, _, path in segments:
+            if candidates is not None and path not in candidates:
+                continue
+            try:
+                entries = self.read_segment(path)
+            except Exception as e:
+                print(f"Error reading history archive: {str(e)}")
+                continue
+            if candidates is not None:
+                entries = [entries[position] for position in candidates[path]]
+            for entry in (reversed(entries) if newest_first else entries):
+                if calculator_type and entry.type != calculator_type:
+                    continue
+                if entry._id in seen or text not in search_text(entry):
+                    continue
+                seen.add(entry._id)
+                results.append(entry)
+                if limit is not None and len(results) >= limit:
+                    return results
+        return results
+
+    def query(self, calculator_type=None, since=None, until=None):
+        """Archived entries matching the filters, oldest first."""
+        entries = list(self.iter_newest_first(calculator_type, since, until))
+        entries.reverse()
+        return entries
+
+    def count(self, calculator_type=None):
+        """Number of archived entries (of one calculator type, if given)."""
+        _, totals = self._catalog(calculator_type)
+        return totals[-1] if totals else 0
+
+    def window(self, offset, count, calculator_type=None):
+        """Up to count archived entries after the newest offset, newest first.
+
+        Unlike iter_newest_first(), entries archived twice are not merged,
+        so that positions match count().
+        """
+        segments, totals = self._catalog(calculator_type)
+        position = bisect.bisect_right(totals, offset)
+        entries = []
+        while position < len(segments) and len(entries) < count:
+            segment_start = totals[position - 1] if position else 0
+            try:
+                segment = self.read_segment(segments[position][3])
+            except Exception as e:
+                print(f"Error reading history archive: {str(e)}")
+                segment = []
+            newest_first = (
+                entry for entry in reversed(segment)
+                if not calculator_type or entry.type == calculator_type
+            )
+            skip = max(offset - segment_start, 0)
+            entries.extend(itertools.islice(newest_first, skip, skip + count - len(entries)))
+            position += 1
+        return entries
+
+    def _catalog(self, calculator_type):
+        """Segments newest first, with running totals of matching entries."""
+        try:
+            stamp = os.stat(self.archive_dir).st_mtime_ns
+        except OSError:
+            stamp = None
+        if stamp != self.catalog_stamp:
+            self.catalogs = {}
+            self.catalog_stamp = stamp
+
+        catalog = self.catalogs.get(calculator_type)
+        if catalog is None:
+            segments = self.segments()
+            segments.reverse()
+            if calculator_type:
+                counts = [self._segment_type_counts(path).get(calculator_type, 0)
+                          for _, _, _, path in segments]
+            else:
+                counts = [count for _, _, count, _ in segments]
+            catalog = self.catalogs[calculator_type] = (segments, list(itertools.accumulate(counts)))
+        return catalog
+
+    def _load_type_counts(self):
+        if self.type_counts is None:
+            self.type_counts = {}
+            try:
+                with open(os.path.join(self.archive_dir, TYPE_COUNTS_FILE), 'r') as f:
+                    for line in f:
+                        try:
+                            record = json.loads(line)
+                        except ValueError:
+                            # A torn last line from a crash
+                            continue
+                        self.type_counts[record["segment"]] = record["counts"]
+            except OSError:
+                pass
+        return self.type_counts
+
+    def _add_type_counts(self, name, counts):
+        counts = dict(counts)
+        self._load_type_counts()[name] = counts
+        try:
+            with open(os.path.join(self.archive_dir, TYPE_COUNTS_FILE), 'a') as f:
+                f.write(json.dumps({"segment": name, "counts": counts}) + "\n")
+        except OSError as e:
+            print(f"Error saving history archive type counts: {str(e)}")
+        return counts
+
+    def _segment_type_counts(self, path):
+        name = os.path.basename(path)
+        counts = self._load_type_counts().get(name)
+        if counts is None:
+            # Segments written before the counts file existed (or by another
+            # process since it was read) are decoded and counted once
+            try:
+                entries = self.read_segment(path)
+            except Exception as e:
+                print(f"Error reading history archive: {str(e)}")
+                return {}
+            counts = self._add_type_counts(name, collections.Counter(entry.type for entry in entries))
+        return counts
+
+    def find(self, ids):
+        """Paths of the segments holding any of the given entry ids."""
+        packed = {pack_id(entry_id) for entry_id in ids}
+        paths = []
+        for _, _, _, path in reversed(self.segments()):
+            try:
+                entries = self.read_segment(path)
+            except Exception as e:
+                print(f"Error reading history archive: {str(e)}")
+                continue
+            if any(entry._id in packed for entry in entries):
+                paths.append(path)
+        return paths
+
+    def delete(self, ids, paths=None):
+        """Remove entries by id, returning them.
+
+        Segments are immutable, so each one holding a deleted entry is
+        rewritten without it (or removed once empty). paths limits the
+        rewrite to segments already found with find(). The new segment is
+        written before the old one is removed; after a crash in between
+        both exist, which readers already treat as entries archived twice.
+        """
+        packed = {pack_id(entry_id) for entry_id in ids}
+        if paths is None:
+            paths = self.find(ids)
+        removed = []
+        for path in paths:
+            if not os.path.exists(path):
+                continue
+            try:
+                entries = self.read_segment(path)
+            except Exception as e:
+                print(f"Error reading history archive: {str(e)}")
+                continue
+            kept = [entry for entry in entries if entry._id not in packed]
+            if len(kept) == len(entries):
+                continue
+            self.write_segment(kept)
+            os.remove(path)
+            with self.cache_lock:
+                self.cache.pop(path, None)
+            with self.search_lock:
+                if self.search_index is not None:
+                    self.search_index.remove_segment(path)
+            removed.extend(entry for entry in entries if entry._id in packed)
+        self.catalogs = {}
+        return removed
+
+    def replace_with(self, staging):
+        """Swap in the segments of another archive, such as one built in a
+        staging directory, removing every current segment."""
+        old_dir = self.archive_dir + ".old"
+        shutil.rmtree(old_dir, ignore_errors=True)
+        if os.path.isdir(self.archive_dir):
+            os.rename(self.archive_dir, old_dir)
+        if os.path.isdir(staging.archive_dir):
+            os.rename(staging.archive_dir, self.archive_dir)
+        shutil.rmtree(old_dir, ignore_errors=True)
+
+        with self.cache_lock:
+            self.cache.clear()
+        self.type_counts = None
+        self.catalogs = {}
+        self.catalog_stamp = None
+
+    def clear(self):
+        for _, _, _, path in self.segments():
+            os.remove(path)
+        with self.cache_lock:
+            self.cache.clear()
+        counts_path = os.path.join(self.archive_dir, TYPE_COUNTS_FILE)
+        if os.path.exists(counts_path):
+            os.remove(counts_path)
+        self.type_counts = None
+        self.catalogs = {}
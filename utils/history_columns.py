@@ -0,0 +1,212 @@
+import datetime
+
+import numpy as np
+
+from utils.history_entry import EPOCH, from_epoch, type_name
+
+CONVERTER_TYPES = ("Unit Converter", "Currency Converter")
+
+SECONDS_PER_HOUR = 3600
+SECONDS_PER_DAY = 86400
+
+
+def conversion_pair(calculator_type, input_text):
+    """Get "FROM -> TO" for a converter input like "12 USD to EUR", else None."""
+    if calculator_type not in CONVERTER_TYPES:
+        return None
+    left, separator, to_unit = str(input_text).rpartition(" to ")
+    if not separator:
+        return None
+    # The amount comes first; the unit name may contain spaces
+    from_unit = left.split(" ", 1)[-1]
+    return f"{from_unit} -> {to_unit}"
+
+
+class HistoryColumns:
+    """Column arrays over the history for vectorized analytics.
+
+    Holds growable NumPy arrays of epoch timestamps (and whole hours since
+    the epoch, for histograms), type codes, interned input codes and
+    conversion pair codes, in history order. Appends and trims of the oldest
+    rows are applied in place; anything else (deletes, prepends of older
+    entries) invalidates the columns and they are rebuilt on the next query.
+
+    Rows are only ever written past the published end, so analytics() can
+    run on one thread while another appends.
+    """
+
+    def __init__(self):
+        self.invalidate()
+
+    def invalidate(self):
+        self.valid = False
+        self.epochs = np.empty(0, dtype=np.float64)
+        self.hours = np.empty(0, dtype=np.int32)
+        self.types = np.empty(0, dtype=np.int32)
+        self.inputs = np.empty(0, dtype=np.int32)
+        self.pairs = np.empty(0, dtype=np.int32)
+        self.start = 0
+        self.end = 0
+
+        # Interned inputs, with the conversion pair (or -1) of each input
+        self.input_codes = {}
+        self.input_values = []
+        self.input_pairs = []
+        self.pair_codes = {}
+        self.pair_values = []
+        self._publish()
+
+    def __len__(self):
+        return self.end - self.start
+
+    def build(self, entries):
+        """Rebuild the columns from entries, oldest first."""
+        self.invalidate()
+        epochs = []
+        types = []
+        inputs = []
+        input_code = self._input_code
+        for entry in entries:
+            epochs.append(entry.epoch)
+            types.append(entry.type_code)
+            inputs.append(input_code(entry.type, entry.input))
+        pairs = np.array(self.input_pairs, dtype=np.int32)
+
+        self.epochs = np.array(epochs, dtype=np.float64)
+        self.hours = (self.epochs // SECONDS_PER_HOUR).astype(np.int32)
+        self.types = np.array(types, dtype=np.int32)
+        self.inputs = np.array(inputs, dtype=np.int32)
+        self.pairs = pairs[self.inputs] if len(pairs) else np.empty(0, dtype=np.int32)
+        self.end = len(epochs)
+        self.valid = True
+        self._publish()
+
+    def _publish(self):
+        # Readers take the arrays and row range together from this tuple
+        self.frame = (self.epochs, self.hours, self.types, self.inputs, self.pairs,
+                      self.start, self.end, self.input_values, self.pair_values)
+
+    def _input_code(self, calculator_type, input_text):
+        key = (calculator_type, input_text)
+        code = self.input_codes.get(key)
+        if code is None:
+            code = len(self.input_values)
+            self.input_codes[key] = code
+            self.input_values.append(input_text)
+
+            pair = conversion_pair(calculator_type, input_text)
+            pair_code = -1
+            if pair is not None:
+                pair_code = self.pair_codes.get(pair)
+                if pair_code is None:
+                    pair_code = len(self.pair_values)
+                    self.pair_codes[pair] = pair_code
+                    self.pair_values.append(pair)
+            self.input_pairs.append(pair_code)
+        return code
+
+    def append(self, entry):
+        if not self.valid:
+            return
+        if self.end == len(self.epochs):
+            self._grow()
+        self.epochs[self.end] = entry.epoch
+        self.hours[self.end] = entry.epoch // SECONDS_PER_HOUR
+        self.types[self.end] = entry.type_code
+        code = self._input_code(entry.type, entry.input)
+        self.inputs[self.end] = code
+        self.pairs[self.end] = self.input_pairs[code]
+        self.end += 1
+        self._publish()
+
+    def drop_oldest(self, count):
+        if self.valid:
+            self.start = min(self.start + count, self.end)
+            self._publish()
+
+    def _grow(self):
+        # Reclaim trimmed rows before doubling the capacity
+        size = self.end - self.start
+        capacity = max(1024, size * 2)
+        for name in ("epochs", "hours", "types", "inputs", "pairs"):
+            old = getattr(self, name)
+            new = np.empty(capacity, dtype=old.dtype)
+            new[:size] = old[self.start:self.end]
+            setattr(self, name, new)
+        self.start = 0
+        self.end = size
+
+    def analytics(self, now=None, top=10, window_days=7):
+        """Compute usage statistics over the columns."""
+        epochs, hours, types, inputs, pairs, start, end, input_values, pair_values = self.frame
+        epochs = epochs[start:end]
+        hours = hours[start:end]
+        types = types[start:end]
+        inputs = inputs[start:end]
+        pairs = pairs[start:end]
+        if now is None:
+            now = datetime.datetime.now()
+        now_epoch = (now - EPOCH) / datetime.timedelta(seconds=1)
+
+        stats = {
+            "total": len(epochs),
+            "by_type": {},
+            "by_hour": np.zeros(24, dtype=np.int64),
+            "first_day": None,
+            "by_day": np.zeros(0, dtype=np.int64),
+            "rolling_daily": np.zeros(0, dtype=np.float64),
+            "top_inputs": [],
+            "top_conversions": [],
+            "rates": {"last_hour": 0, "last_day": 0, "last_week": 0},
+        }
+        if not len(epochs):
+            return stats
+
+        type_counts = np.bincount(types)
+        codes = np.flatnonzero(type_counts)
+        codes = codes[np.argsort(-type_counts[codes], kind="stable")]
+        stats["by_type"] = {type_name(code): int(type_counts[code]) for code in codes}
+
+        # One pass bins every entry by hour; the hour-of-day and per-day
+        # histograms are then folded from those (far fewer) hourly bins.
+        # Timestamps are naive local time, so hours of day are local too.
+        first_day = int(hours.min()) // 24
+        hourly = np.bincount(hours - first_day * 24)
+        hourly = np.pad(hourly, (0, -len(hourly) % 24))
+        by_day = hourly.reshape(-1, 24).sum(axis=1)
+        stats["by_hour"] = hourly.reshape(-1, 24).sum(axis=0)
+        stats["first_day"] = from_epoch(first_day * SECONDS_PER_DAY).date()
+        stats["by_day"] = by_day
+        # Trailing mean over the last window_days days
+        window = max(1, window_days)
+        stats["rolling_daily"] = np.convolve(by_day, np.ones(window) / window)[:len(by_day)]
+
+        input_counts = np.bincount(inputs)
+        stats["top_inputs"] = [
+            (input_values[code], int(input_counts[code]))
+            for code in _top_codes(input_counts, top)
+        ]
+
+        # Shift so entries without a pair (-1) land in bin 0
+        pair_counts = np.bincount(pairs + 1)[1:]
+        if len(pair_counts):
+            stats["top_conversions"] = [
+                (pair_values[code], int(pair_counts[code]))
+                for code in _top_codes(pair_counts, top)
+            ]
+
+        stats["rates"] = {
+            "last_hour": int(np.count_nonzero(epochs >= now_epoch - SECONDS_PER_HOUR)),
+            "last_day": int(np.count_nonzero(epochs >= now_epoch - SECONDS_PER_DAY)),
+            "last_week": int(np.count_nonzero(epochs >= now_epoch - 7 * SECONDS_PER_DAY)),
+        }
+        return stats
+
+
+def _top_codes(counts, top):
+    """Indexes of the largest non-zero counts, largest first."""
+    top = min(top, np.count_nonzero(counts))
+    if top <= 0:
+        return []
+    codes = np.argpartition(-counts, top - 1)[:top]
+    return codes[np.argsort(-counts[codes], kind="stable")]
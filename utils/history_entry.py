@@ -0,0 +1,205 @@
+import datetime
+import random
+import threading
+import time
+import uuid
+from collections.abc import Mapping
+
+# Timestamps are stored as float seconds since this naive epoch. Working on
+# naive wall-clock time (like datetime.now()) avoids DST ambiguity.
+EPOCH = datetime.datetime(1970, 1, 1)
+
+FIELDS = ("id", "timestamp", "type", "input", "result")
+
+# Interned calculator type names; entries store an index into this list
+_type_names = []
+_type_codes = {}
+
+
+def type_code(name):
+    """Get the small integer code for a calculator type name."""
+    code = _type_codes.get(name)
+    if code is None:
+        code = len(_type_names)
+        _type_names.append(name)
+        _type_codes[name] = code
+    return code
+
+
+def type_name(code):
+    return _type_names[code]
+
+
+def to_epoch(timestamp):
+    """Convert a naive datetime to float epoch seconds."""
+    return (timestamp - EPOCH) / datetime.timedelta(seconds=1)
+
+
+def from_epoch(seconds):
+    return EPOCH + datetime.timedelta(seconds=seconds)
+
+
+# Entry ids are 64-bit integers written as 16 hex digits: milliseconds
+# since the Unix epoch, then a per-process node number and a sequence
+# number within the millisecond. Sorting ids sorts entries by creation time.
+NODE_BITS = 10
+SEQUENCE_BITS = 10
+MAX_SEQUENCE = (1 << SEQUENCE_BITS) - 1
+
+
+class IdGenerator:
+    """Generates monotonic, time-sortable 64-bit entry ids."""
+
+    def __init__(self, node=None):
+        # A random node keeps ids from separate processes apart
+        self.node = random.getrandbits(NODE_BITS) if node is None else node
+        self.last_ms = 0
+        self.sequence = 0
+        self.lock = threading.Lock()
+
+    def next_id(self):
+        with self.lock:
+            ms = time.time_ns() // 1_000_000
+            if ms <= self.last_ms:
+                # Same millisecond (or the clock stepped back): stay monotonic
+                ms = self.last_ms
+                self.sequence += 1
+                if self.sequence > MAX_SEQUENCE:
+                    ms += 1
+                    self.sequence = 0
+            else:
+                self.sequence = 0
+            self.last_ms = ms
+            return (ms << (NODE_BITS + SEQUENCE_BITS)) | (self.node << SEQUENCE_BITS) | self.sequence
+
+
+_id_generator = IdGenerator()
+
+
+def new_id():
+    """Get a new time-sortable entry id string."""
+    return f"{_id_generator.next_id():016x}"
+
+
+def pack_id(entry_id):
+    """Store 64-bit ids as ints, canonical uuid strings (legacy ids) as 16
+    raw bytes and anything else as-is."""
+    if isinstance(entry_id, str):
+        if len(entry_id) == 16:
+            try:
+                packed = int(entry_id, 16)
+            except ValueError:
+                return entry_id
+            if f"{packed:016x}" == entry_id:
+                return packed
+        elif len(entry_id) == 36:
+            try:
+                packed = uuid.UUID(entry_id)
+            except ValueError:
+                return entry_id
+            if str(packed) == entry_id:
+                return packed.bytes
+    return entry_id
+
+
+def unpack_id(packed_id):
+    if isinstance(packed_id, int):
+        return f"{packed_id:016x}"
+    if isinstance(packed_id, bytes):
+        return str(uuid.UUID(bytes=packed_id))
+    return packed_id
+
+
+class HistoryEntry(Mapping):
+    """A compact, read-only history entry.
+
+    Uses ``__slots__`` with a float epoch timestamp, an interned type code
+    and a packed (integer or binary) id, but behaves like the original entry dict:
+    ``entry["timestamp"]`` still returns a datetime and ``dict(entry)``
+    gives the familiar dict.
+
+    The timestamp may also be given as an ISO string, in which case it is
+    only parsed the first time it is needed.
+    """
+
+    __slots__ = ("_id", "_ts", "type_code", "input", "result")
+
+    def __init__(self, entry_id, timestamp, type, input_text, result):
+        self._id = pack_id(entry_id)
+        if isinstance(timestamp, datetime.datetime):
+            self._ts = to_epoch(timestamp)
+        elif isinstance(timestamp, str):
+            self._ts = timestamp
+        else:
+            self._ts = float(timestamp)
+        self.type_code = type_code(type)
+        self.input = input_text
+        self.result = result
+
+    @classmethod
+    def from_dict(cls, data):
+        return cls(data["id"], data["timestamp"], data["type"], data["input"], data["result"])
+
+    @classmethod
+    def from_packed(cls, packed_id, epoch, code, input_text, result):
+        """Build an entry from already packed fields, skipping conversion."""
+        entry = cls.__new__(cls)
+        entry._id = packed_id
+        entry._ts = epoch
+        entry.type_code = code
+        entry.input = input_text
+        entry.result = result
+        return entry
+
+    @property
+    def id(self):
+        return unpack_id(self._id)
+
+    @property
+    def epoch(self):
+        if isinstance(self._ts, str):
+            self._ts = to_epoch(datetime.datetime.fromisoformat(self._ts))
+        return self._ts
+
+    @property
+    def timestamp(self):
+        return from_epoch(self.epoch)
+
+    def isoformat(self):
+        """The timestamp as an ISO string, without parsing it if unparsed."""
+        if isinstance(self._ts, str):
+            return self._ts
+        return from_epoch(self._ts).isoformat()
+
+    @property
+    def type(self):
+        return _type_names[self.type_code]
+
+    def __getitem__(self, key):
+        if key == "id":
+            return unpack_id(self._id)
+        if key == "timestamp":
+            return from_epoch(self.epoch)
+        if key == "type":
+            return _type_names[self.type_code]
+        if key == "input":
+            return self.input
+        if key == "result":
+            return self.result
+        raise KeyError(key)
+
+    def __iter__(self):
+        return iter(FIELDS)
+
+    def __len__(self):
+        return len(FIELDS)
+
+    # Identity semantics keep list.remove() and index lookups cheap
+    __eq__ = object.__eq__
+    __hash__ = object.__hash__
+
+    def copy(self):
+        return dict(self)
+
+    def __repr__(self):
+        return f"HistoryEntry({dict(self)!r})"
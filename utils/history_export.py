@@ -0,0 +1,159 @@
+import csv
+import json
+import os
+import threading
+
+from utils.history_stores import serialize_entry
+
+# Export formats: (label, file extension)
+FORMATS = {
+    "csv": ("CSV", ".csv"),
+    "txt": ("Text", ".txt"),
+    "jsonl": ("JSON Lines", ".jsonl"),
+    "sqlite": ("SQLite", ".db"),
+}
+
+
+class CsvExportWriter:
+    def __init__(self, filepath):
+        self.file = open(filepath, 'w', newline='')
+        self.writer = csv.writer(self.file)
+        # Write header
+        self.writer.writerow(["Time", "Calculator", "Input", "Result"])
+
+    def write(self, entries):
+        self.writer.writerows(
+            [
+                entry["timestamp"].strftime("%Y-%m-%d %H:%M:%S"),
+                entry["type"],
+                entry["input"],
+                entry["result"]
+            ]
+            for entry in entries
+        )
+
+    def close(self):
+        self.file.close()
+
+
+class TextExportWriter:
+    def __init__(self, filepath):
+        self.file = open(filepath, 'w')
+        self.file.write("CALCULATOR HISTORY\n")
+        self.file.write("=================\n\n")
+
+    def write(self, entries):
+        for entry in entries:
+            self.file.write(f"Time: {entry['timestamp'].strftime('%Y-%m-%d %H:%M:%S')}\n")
+            self.file.write(f"Calculator: {entry['type']}\n")
+            self.file.write(f"Input: {entry['input']}\n")
+            self.file.write(f"Result: {entry['result']}\n")
+            self.file.write("-" * 40 + "\n\n")
+
+    def close(self):
+        self.file.close()
+
+
+class JsonLinesExportWriter:
+    """One serialized entry per line, with ids, so it can be imported again."""
+
+    def __init__(self, filepath):
+        self.file = open(filepath, 'w', encoding="utf-8")
+
+    def write(self, entries):
+        self.file.write("".join(json.dumps(serialize_entry(entry)) + "\n" for entry in entries))
+
+    def close(self):
+        self.file.close()
+
+
+class SqliteExportWriter:
+    """A database the sqlite history backend can open directly."""
+
+    def __init__(self, filepath):
+        from utils.sqlite_history_store import SqliteHistoryStore
+
+        self.store = SqliteHistoryStore(filepath)
+
+    def write(self, entries):
+        self.store.append_many(entries)
+
+    def close(self):
+        self.store.close()
+
+
+WRITERS = {
+    "csv": CsvExportWriter,
+    "txt": TextExportWriter,
+    "jsonl": JsonLinesExportWriter,
+    "sqlite": SqliteExportWriter,
+}
+
+
+class HistoryExport:
+    """Exports the history to a file on a background thread.
+
+    Entries are streamed from the history manager in chunks and written as
+    they arrive. The file is written under a temporary name and only moved
+    into place once complete, so a cancelled or failed export leaves
+    nothing behind. Poll ``written``, ``total`` and ``finished`` for
+    progress; ``error`` holds the message if the export failed.
+    """
+
+    def __init__(self, history_manager, filepath, export_format, calculator_type=None, chunk_size=1000):
+        if export_format not in WRITERS:
+            raise ValueError(f"Unknown export format: {export_format}")
+        self.history_manager = history_manager
+        self.filepath = filepath
+        self.export_format = export_format
+        self.calculator_type = calculator_type
+        self.chunk_size = chunk_size
+
+        self.total = None
+        self.written = 0
+        self.error = None
+        self.finished = False
+        self.cancel_event = threading.Event()
+        self.thread = None
+
+    @property
+    def cancelled(self):
+        return self.cancel_event.is_set()
+
+    def start(self):
+        self.thread = threading.Thread(target=self.run, daemon=True)
+        self.thread.start()
+        return self
+
+    def cancel(self):
+        self.cancel_event.set()
+
+    def run(self):
+        tmp_path = self.filepath + ".tmp"
+        try:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+
+            writer = WRITERS[self.export_format](tmp_path)
+            try:
+                for chunk in self.history_manager.iter_history(self.calculator_type, self.chunk_size):
+                    if self.total is None:
+                        # Counted once streaming has loaded the whole history
+                        self.total = self.history_manager.count_history(self.calculator_type)
+                    if self.cancelled:
+                        break
+                    writer.write(chunk)
+                    self.written += len(chunk)
+            finally:
+                writer.close()
+
+            if self.cancelled:
+                os.remove(tmp_path)
+            else:
+                os.replace(tmp_path, self.filepath)
+        except Exception as e:
+            self.error = str(e)
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+        finally:
+            self.finished = True
@@ -0,0 +1,312 @@
+import csv
+import datetime
+import hashlib
+import heapq
+import json
+import os
+import pickle
+import tempfile
+import threading
+
+from utils.history_entry import HistoryEntry, to_epoch
+
+# Entries held in memory per file while cutting it into sorted runs
+RUN_CHUNK_SIZE = 50000
+
+# CSV headers accepted for each field (exports use Time/Calculator/...)
+CSV_COLUMNS = {
+    "id": ("id",),
+    "timestamp": ("timestamp", "time"),
+    "type": ("type", "calculator"),
+    "input": ("input",),
+    "result": ("result",),
+}
+
+
+def content_key(epoch, calculator_type, input_text, result):
+    """Hash of an entry's content, with the timestamp cut to whole seconds."""
+    text = f"{int(epoch)}\x1f{calculator_type}\x1f{input_text}\x1f{result}"
+    return int.from_bytes(hashlib.blake2b(text.encode("utf-8"), digest_size=8).digest(), "big")
+
+
+def content_id(epoch, calculator_type, input_text, result):
+    """A stable id for an entry imported without one.
+
+    Made like a new id (milliseconds, then 20 more bits) from the timestamp
+    and a content hash, so importing the same file twice gives the same ids.
+    """
+    low_bits = content_key(epoch, calculator_type, input_text, result) & 0xFFFFF
+    return f"{(int(epoch * 1000) << 20) | low_bits:016x}"
+
+
+def make_entry(data):
+    """Build (entry, derived id) from a record dict, or None if unusable."""
+    timestamp = data.get("timestamp")
+    calculator_type = data.get("type")
+    if not timestamp or not calculator_type:
+        return None
+    try:
+        if isinstance(timestamp, (int, float)):
+            epoch = float(timestamp)
+        else:
+            epoch = to_epoch(datetime.datetime.fromisoformat(str(timestamp).strip()))
+    except ValueError:
+        return None
+
+    input_text = data.get("input", "")
+    result = data.get("result", "")
+    entry_id = data.get("id")
+    derived = not entry_id
+    if derived:
+        entry_id = content_id(epoch, calculator_type, input_text, result)
+    return HistoryEntry(str(entry_id), epoch, calculator_type, input_text, result), derived
+
+
+def iter_jsonl_records(f):
+    for line in f:
+        if line.strip():
+            yield json.loads(line)
+
+
+def iter_json_records(f, block_size=1 << 16):
+    """Stream the items of a JSON array without parsing it all at once."""
+    decoder = json.JSONDecoder()
+    buffer = ""
+    position = 0
+    started = False
+    eof = False
+    while True:
+        # Skip whitespace and separators between items
+        while position < len(buffer) and buffer[position] in " \t\r\n,[]":
+            if buffer[position] == "[":
+                started = True
+            position += 1
+        if position < len(buffer):
+            if not started:
+                raise ValueError("Expected a JSON array of history entries")
+            try:
+                item, end = decoder.raw_decode(buffer, position)
+            except json.JSONDecodeError:
+                if eof:
+                    raise
+                item = None
+            # An item that reaches the end of the buffer may be cut short
+            if item is not None and (end < len(buffer) or eof):
+                yield item
+                position = end
+                continue
+        if eof:
+            return
+        block = f.read(block_size)
+        eof = not block
+        buffer = buffer[position:] + block
+        position = 0
+
+
+def iter_csv_records(f):
+    reader = csv.reader(f)
+    header = next(reader, None)
+    if header is None:
+        return
+    header = [name.strip().lower() for name in header]
+    columns = {}
+    for field, names in CSV_COLUMNS.items():
+        for name in names:
+            if name in header:
+                columns[field] = header.index(name)
+                break
+    for row in reader:
+        yield {field: row[column] for field, column in columns.items() if column < len(row)}
+
+
+READERS = {
+    ".json": iter_json_records,
+    ".jsonl": iter_jsonl_records,
+    ".csv": iter_csv_records,
+}
+
+
+def read_entries(path, stats=None):
+    """Stream (entry, derived id) pairs from a CSV, JSON Lines or JSON file."""
+    extension = os.path.splitext(path)[1].lower()
+    reader = READERS.get(extension)
+    if reader is None:
+        raise ValueError(f"Unsupported history file: {path}")
+    newline = "" if extension == ".csv" else None
+    with open(path, 'r', encoding="utf-8", newline=newline) as f:
+        for record in reader(f):
+            item = make_entry(record) if isinstance(record, dict) else None
+            if stats is not None:
+                stats["read"] += 1
+                if item is None:
+                    stats["skipped"] += 1
+            if item is not None:
+                yield item
+
+
+class _SpilledRun:
+    """A sorted run written to a temporary file in pickled chunks."""
+
+    def __init__(self, directory):
+        handle, self.path = tempfile.mkstemp(suffix=".run", dir=directory)
+        self.file = os.fdopen(handle, 'wb')
+        self.last_epoch = None
+
+    def close(self):
+        self.file.close()
+
+    def write(self, chunk):
+        pickle.dump([_pack(item) for item in chunk], self.file, pickle.HIGHEST_PROTOCOL)
+        self.last_epoch = chunk[-1][0].epoch
+
+    def __iter__(self):
+        with open(self.path, 'rb') as f:
+            while True:
+                try:
+                    chunk = pickle.load(f)
+                except EOFError:
+                    break
+                for packed in chunk:
+                    yield _unpack(packed)
+        os.remove(self.path)
+
+
+def _pack(item):
+    entry, derived = item
+    return (entry.id, entry.epoch, entry.type, entry.input, entry.result, derived)
+
+
+def _unpack(packed):
+    entry_id, epoch, calculator_type, input_text, result, derived = packed
+    return HistoryEntry(entry_id, epoch, calculator_type, input_text, result), derived
+
+
+def sorted_runs(items, directory, chunk_size=RUN_CHUNK_SIZE):
+    """Cut a stream of (entry, derived) pairs into runs sorted by timestamp.
+
+    Each chunk is sorted in memory; chunks that continue the previous one
+    in time order extend the same run, so an already sorted file becomes a
+    single run. A file of one chunk stays in memory; larger ones are
+    spilled to temporary files in directory.
+    """
+    runs = []
+    chunk = []
+    spilled = None
+
+    def flush(chunk):
+        nonlocal spilled
+        chunk.sort(key=lambda item: item[0].epoch)
+        if spilled is None or chunk[0][0].epoch < spilled.last_epoch:
+            spilled = _SpilledRun(directory)
+            runs.append(spilled)
+        spilled.write(chunk)
+
+    for item in items:
+        chunk.append(item)
+        if len(chunk) >= chunk_size:
+            flush(chunk)
+            chunk = []
+    if chunk:
+        if runs:
+            flush(chunk)
+        else:
+            chunk.sort(key=lambda item: item[0].epoch)
+            runs.append(chunk)
+    for run in runs:
+        if isinstance(run, _SpilledRun):
+            run.close()
+    return runs
+
+
+def merge_runs(runs):
+    """K-way merge runs of (entry, derived) pairs by timestamp, dropping duplicates.
+
+    Yields (run number, entry), oldest first. Entries sharing an id are
+    duplicates, and an entry whose id was derived from its content (the
+    file had no ids) also duplicates any entry with the same content in
+    the same second, since exports like CSV drop ids and sub-second time.
+    The first run wins ties, so pass the existing history first.
+    """
+    streams = [_keyed(number, run) for number, run in enumerate(runs)]
+    seen_ids = set()
+    seen_content = set()
+
+    # Entries of the current second wait until every copy of them is seen
+    pending = []
+    pending_second = None
+    for epoch, number, entry, derived in heapq.merge(*streams, key=lambda item: item[:2]):
+        second = int(epoch)
+        if second != pending_second:
+            yield from _flush_pending(pending, seen_content)
+            pending = []
+            pending_second = second
+
+        if entry._id in seen_ids:
+            continue
+        seen_ids.add(entry._id)
+        key = content_key(epoch, entry.type, entry.input, entry.result)
+        if not derived:
+            seen_content.add(key)
+        pending.append((number, entry, derived, key))
+    yield from _flush_pending(pending, seen_content)
+
+
+def _keyed(number, run):
+    for entry, derived in run:
+        yield entry.epoch, number, entry, derived
+
+
+def _flush_pending(pending, seen_content):
+    for number, entry, derived, key in pending:
+        if derived:
+            if key in seen_content:
+                continue
+            seen_content.add(key)
+        yield number, entry
+
+
+class HistoryImport:
+    """Imports history files into the history manager on a background thread.
+
+    Each file is streamed into sorted runs, then all runs are merged with
+    the existing history in one pass. Poll ``stats`` (entries read,
+    skipped as unreadable, and added) and ``finished``; ``error`` holds
+    the message if the import failed.
+    """
+
+    def __init__(self, history_manager, paths):
+        self.history_manager = history_manager
+        self.paths = list(paths)
+        self.stats = {"read": 0, "skipped": 0, "added": 0}
+        self.error = None
+        self.finished = False
+        self.cancel_event = threading.Event()
+        self.thread = None
+
+    @property
+    def cancelled(self):
+        return self.cancel_event.is_set()
+
+    def start(self):
+        self.thread = threading.Thread(target=self.run, daemon=True)
+        self.thread.start()
+        return self
+
+    def cancel(self):
+        self.cancel_event.set()
+
+    def run(self):
+        try:
+            with tempfile.TemporaryDirectory(prefix="history-import-") as directory:
+                runs = []
+                for path in self.paths:
+                    if self.cancelled:
+                        return
+                    runs.extend(sorted_runs(read_entries(path, self.stats), directory))
+                added = self.history_manager.import_history(runs, self.cancel_event.is_set)
+                if added is not None:
+                    self.stats["added"] = added
+        except Exception as e:
+            self.error = str(e)
+        finally:
+            self.finished = True
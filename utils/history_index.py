@@ -0,0 +1,128 @@
+import bisect
+
+from utils.history_entry import pack_id, to_epoch, type_code, type_name
+
+
+class HistoryIndex:
+    """Secondary indexes over the in-memory history.
+
+    Keeps an id -> entry map, per-type buckets (insertion ordered dicts, so
+    removal is O(1)) and a timestamp-ordered array searched with bisect for
+    time-range queries. Maps are keyed by the entry's packed binary id.
+
+    The time array needs every timestamp parsed, so it is only built on the
+    first time-range query and maintained incrementally after that.
+    """
+
+    def __init__(self):
+        self.clear()
+
+    def clear(self):
+        self.by_id = {}
+        self.by_type = {}
+        self.time_keys = None
+        self.time_entries = None
+
+    def rebuild(self, entries):
+        self.clear()
+        for entry in entries:
+            self.add(entry)
+
+    def __contains__(self, entry_id):
+        return pack_id(entry_id) in self.by_id
+
+    def __len__(self):
+        return len(self.by_id)
+
+    def add(self, entry):
+        key = entry._id
+        if key in self.by_id:
+            self._remove(key)
+
+        self.by_id[key] = entry
+        self.by_type.setdefault(entry.type_code, {})[key] = entry
+        if self.time_keys is None:
+            return
+
+        # Entries normally arrive in time order, so this is usually an append.
+        # bisect_right keeps equal timestamps in insertion order.
+        if not self.time_keys or entry.epoch >= self.time_keys[-1]:
+            self.time_keys.append(entry.epoch)
+            self.time_entries.append(entry)
+        else:
+            position = bisect.bisect_right(self.time_keys, entry.epoch)
+            self.time_keys.insert(position, entry.epoch)
+            self.time_entries.insert(position, entry)
+
+    def prepend(self, entries):
+        """Index entries that are older than everything already indexed."""
+        groups = {}
+        for entry in entries:
+            self.by_id[entry._id] = entry
+            groups.setdefault(entry.type_code, {})[entry._id] = entry
+
+        # Keep each bucket in insertion (oldest first) order
+        for code, group in groups.items():
+            group.update(self.by_type.get(code, {}))
+            self.by_type[code] = group
+
+        self.time_keys = None
+        self.time_entries = None
+
+    def _build_time_index(self):
+        # sorted() is stable, so equal timestamps stay in insertion order
+        self.time_entries = sorted(self.by_id.values(), key=lambda entry: entry.epoch)
+        self.time_keys = [entry.epoch for entry in self.time_entries]
+
+    def remove(self, entry_id):
+        """Remove an entry by id, returning it (or None if not indexed)."""
+        return self._remove(pack_id(entry_id))
+
+    def _remove(self, key):
+        entry = self.by_id.pop(key, None)
+        if entry is None:
+            return None
+
+        bucket = self.by_type.get(entry.type_code)
+        if bucket is not None:
+            bucket.pop(key, None)
+            if not bucket:
+                del self.by_type[entry.type_code]
+        if self.time_keys is None:
+            return entry
+
+        # Step over any other entries sharing the same timestamp
+        position = bisect.bisect_left(self.time_keys, entry.epoch)
+        while self.time_entries[position] is not entry:
+            position += 1
+        del self.time_keys[position]
+        del self.time_entries[position]
+        return entry
+
+    def get(self, entry_id):
+        return self.by_id.get(pack_id(entry_id))
+
+    def of_type(self, calculator_type):
+        """Entries of one calculator type, in insertion order."""
+        return list(self.by_type.get(type_code(calculator_type), {}).values())
+
+    def types(self):
+        return [type_name(code) for code in self.by_type]
+
+    def range(self, since=None, until=None, calculator_type=None):
+        """Entries with since <= timestamp < until, in time order."""
+        if self.time_keys is None:
+            self._build_time_index()
+
+        start = 0
+        end = len(self.time_keys)
+        if since is not None:
+            start = bisect.bisect_left(self.time_keys, to_epoch(since))
+        if until is not None:
+            end = bisect.bisect_left(self.time_keys, to_epoch(until))
+
+        entries = self.time_entries[start:end]
+        if calculator_type:
+            code = type_code(calculator_type)
+            entries = [entry for entry in entries if entry.type_code == code]
+        return entries
@@ -1,86 +1,834 @@
+import collections
 import datetime
-import uuid
-import json
-import os
+import itertools
+import shutil
+import threading
+
+from utils.history_archive import HistoryArchive
+from utils.history_columns import HistoryColumns
+from utils.history_entry import HistoryEntry, new_id, to_epoch, type_code
+from utils.history_import import merge_runs
+from utils.history_index import HistoryIndex
+from utils.history_snapshot import HistorySnapshot
+from utils.history_sort import SortIndexes
+from utils.history_stores import create_store
+from utils.input_completions import InputCompletions
+from utils.trigram_index import TrigramIndex
+from utils.write_behind import WriteBehindStore
+
+# Change events passed to subscribers as callback(event, entries)
+EVENT_ADD = "add"          # New entries
+EVENT_DELETE = "delete"    # Entries deleted
+EVENT_CLEAR = "clear"      # All history cleared
+EVENT_TRIM = "trim"        # Oldest entries dropped by the size or age limit
+EVENT_ARCHIVE = "archive"  # Oldest entries moved to the archive
+EVENT_RELOAD = "reload"    # History reloaded from disk; re-read everything
+
+# Entries per archive segment when an import rewrites the archive
+IMPORT_SEGMENT_SIZE = 10000
+
+# Rows read at a time when building input suggestions from the database
+COMPLETIONS_CHUNK = 5000
 
 class HistoryManager:
-    def __init__(self):
-        self.history = []
+    def __init__(self, history_file="calculator_history.json", backend="json",
+                 durability=None, batch_size=50, flush_interval=1.0,
+                 ttl=None, archive_dir=None, archive_compression="gzip", archive_batch=100):
+        # Hot tier: the newest entries, as an immutable snapshot that is
+        # replaced (never modified) on every change. Readers on any thread
+        # can iterate self.history without locking; writers take self.lock.
+        self.history = HistorySnapshot()
+        self.lock = threading.RLock()
+        self.index = HistoryIndex()
+        self.columns = HistoryColumns()  # Built on the first analytics() call
+        self.search_index = TrigramIndex()  # Built on the first search
+        self.sort_indexes = SortIndexes()  # Each order built on first use
+        self.completions = InputCompletions()  # Built on the first suggestion
+        # Changes made while the archive part of the completions builds
+        self.completions_log = None
         self.max_entries = 1000  # Limit history size
-        
+        self.ttl = ttl  # Optional timedelta after which entries age out
+        self.initial_load = 200  # Entries parsed at startup
+        self.older = None  # Stream of not yet loaded entries, newest first
+        self.subscribers = []
+        # Changes made while an import merges, replayed onto its result
+        self.import_log = None
+        self.import_lock = threading.Lock()
+
         # Load history from file if exists
-        self.history_file = "calculator_history.json"
+        self.history_file = history_file
+        self.store = create_store(backend, history_file)
+
+        # Optionally move writes off the calling thread
+        # (durability is "every_n", "every_t" or "on_exit")
+        if durability:
+            self.store = WriteBehindStore(self.store, durability, batch_size, flush_interval)
+
+        # Entries that age out of the hot tier are moved to compressed
+        # archive segments instead of being dropped. Stores that keep the
+        # full history already retain them.
+        self.archive = None
+        self.archive_batch = archive_batch
+        if archive_dir and not getattr(self.store, "keeps_full_history", False):
+            self.archive = HistoryArchive(archive_dir, archive_compression)
+
         self.load_history()
-    
+
     def add_entry(self, type, input_text, result):
         """Add a new entry to the history."""
-        entry = {
-            "id": str(uuid.uuid4()),
-            "timestamp": datetime.datetime.now(),
-            "type": type,
-            "input": input_text,
-            "result": result
-        }
-        
-        # Add to history
-        self.history.append(entry)
-        
-        # Limit history size
-        if len(self.history) > self.max_entries:
-            self.history = self.history[-self.max_entries:]
-        
-        # Save to file
-        self.save_history()
-        
+        with self.lock:
+            # Created under the lock so history order matches id order
+            entry = HistoryEntry(
+                new_id(),
+                datetime.datetime.now(),
+                type,
+                input_text,
+                result
+            )
+
+            self._prepare_store_write()
+
+            # Limit history size, archiving entries before they leave the store
+            history = self.history.appended(entry)
+            expired = self._expired(history)
+            if expired and self.older is not None:
+                # Entries not loaded yet are older still; archive them first
+                self._load_older()
+                history = self.history.appended(entry)
+                expired = self._expired(history)
+            if expired and self.archive is not None:
+                try:
+                    self.archive.write_segment(expired)
+                except Exception as e:
+                    # Keep them in the hot tier rather than lose them
+                    print(f"Error archiving history: {str(e)}")
+                    expired = []
+
+            # Publish the new entry and the trim as a single version
+            self.history = history.without_oldest(len(expired))
+            self.index.add(entry)
+            self.columns.append(entry)
+            self.search_index.add(entry)
+            self.sort_indexes.add(entry)
+            self._completions_add(entry)
+            self._log_import("add", entry)
+            for old_entry in expired:
+                self.index.remove(old_entry["id"])
+                self.search_index.remove(old_entry)
+                self.sort_indexes.remove(old_entry)
+            trimmed_ids = [e["id"] for e in expired]
+
+            # Stores that keep the full history only lose entries from memory
+            if getattr(self.store, "keeps_full_history", False):
+                trimmed_ids = []
+            elif self.archive is None:
+                # Archived entries stay in the analytics columns
+                self.columns.drop_oldest(len(expired))
+
+            # Save to file
+            try:
+                self.store.append(entry, self.history, trimmed_ids)
+            except Exception as e:
+                print(f"Error saving history: {str(e)}")
+            self._compact_if_due()
+
+        if trimmed_ids:
+            self._notify(EVENT_ARCHIVE if self.archive is not None else EVENT_TRIM, expired)
+        self._notify(EVENT_ADD, [entry])
         return entry
-    
+
+    def subscribe(self, callback):
+        """Call callback(event, entries) after every change to the history.
+
+        Events are EVENT_ADD, EVENT_DELETE, EVENT_CLEAR, EVENT_TRIM,
+        EVENT_ARCHIVE and EVENT_RELOAD. Callbacks run on the thread that made
+        the change.
+        """
+        self.subscribers.append(callback)
+        return callback
+
+    def unsubscribe(self, callback):
+        if callback in self.subscribers:
+            self.subscribers.remove(callback)
+
+    def _notify(self, event, entries=()):
+        for callback in list(self.subscribers):
+            try:
+                callback(event, list(entries))
+            except Exception as e:
+                print(f"Error notifying history subscriber: {str(e)}")
+
+    def _expired(self, history):
+        """Entries of history past the size or age limit, oldest first."""
+        cutoff = None
+        if self.ttl is not None:
+            cutoff = to_epoch(datetime.datetime.now() - self.ttl)
+
+        count = 0
+        for entry in history:
+            if len(history) - count > self.max_entries or (cutoff is not None and entry.epoch < cutoff):
+                count += 1
+            else:
+                break
+
+        # Archive in batches so each segment holds a useful number of entries
+        if count == 0 or (self.archive is not None and count < self.archive_batch):
+            return []
+        return list(itertools.islice(history, count))
+
     def get_history(self):
         """Get the full history."""
+        self._load_older()
         return self.history
-    
-    def get_filtered_history(self, calculator_type=None):
-        """Get history filtered by calculator type."""
+
+    def iter_history(self, calculator_type=None, chunk_size=1000):
+        """Stream the whole history (archive, then hot tier) in chunks, oldest first.
+
+        At most one chunk and one decoded archive segment are held at a
+        time, so memory stays flat however long the history is.
+        """
+        if hasattr(self.store, "query"):
+            offset = 0
+            while True:
+                chunk = self.store.query(calculator_type=calculator_type, limit=chunk_size, offset=offset)
+                if not chunk:
+                    return
+                yield chunk
+                offset += len(chunk)
+
+        self._load_older()
+        # Take the hot tier and the segment list at the same moment, so
+        # entries archived while streaming are not seen twice
+        with self.lock:
+            live = self.history
+            segments = self.archive.segments() if self.archive is not None else []
+        live_ids = {entry._id for entry in live}
+
+        chunk = []
+        for _, _, _, path in segments:
+            try:
+                segment = self.archive.read_segment(path)
+            except Exception as e:
+                print(f"Error reading history archive: {str(e)}")
+                continue
+            for entry in segment:
+                if calculator_type and entry.type != calculator_type:
+                    continue
+                if entry._id in live_ids:
+                    continue
+                chunk.append(entry)
+                if len(chunk) >= chunk_size:
+                    yield chunk
+                    chunk = []
+
+        for entry in live:
+            if calculator_type and entry.type != calculator_type:
+                continue
+            chunk.append(entry)
+            if len(chunk) >= chunk_size:
+                yield chunk
+                chunk = []
+        if chunk:
+            yield chunk
+
+    def count_history(self, calculator_type=None):
+        """Count entries across the hot tier and the archive.
+
+        Entries not yet loaded from the store are left out until a window
+        reaches them.
+        """
+        live = self.count_sortable(calculator_type)
+        if self.archive is not None and not hasattr(self.store, "query"):
+            live += self.archive.count(calculator_type)
+        return live
+
+    def count_sortable(self, calculator_type=None):
+        """Count the entries that orders other than time cover (see get_window).
+
+        That is every entry with the SQLite backend, and otherwise the hot
+        tier only, the most recent entries: less than count_history() once
+        entries have been archived.
+        """
+        if hasattr(self.store, "query"):
+            return self.store.count(calculator_type)
+        if calculator_type:
+            return len(self.index.by_type.get(type_code(calculator_type), ()))
+        return len(self.history)
+
+    def get_window(self, offset, count, calculator_type=None, sort_by="time", descending=True):
+        """Get up to count entries, skipping the first offset, newest first.
+
+        Positions run through the hot tier and then on into the archive, so
+        a scrolling view can fetch any window without reading what is
+        above it. sort_by "type", "input" or "result" orders by that column
+        instead, from sort indexes over the hot tier (or the database's own
+        indexes), so archived entries are left out of those orders (see
+        count_sortable()); descending=False reverses the order.
+        """
+        if hasattr(self.store, "query"):
+            return self.store.query(calculator_type=calculator_type, limit=count, offset=offset,
+                                    newest_first=descending, order_by=sort_by)
+
+        if sort_by != "time":
+            with self.lock:
+                self._load_older()
+                entries = self.sort_indexes.order(sort_by, self.history).entries
+                ordered = reversed(entries) if descending else iter(entries)
+                if calculator_type:
+                    ordered = (entry for entry in ordered if entry.type == calculator_type)
+                return list(itertools.islice(ordered, offset, offset + count))
+
+        if not descending:
+            # Oldest first is the same window counted from the other end,
+            # which needs the full count
+            self._load_older()
+            end = max(self.count_history(calculator_type) - offset, 0)
+            start = max(end - count, 0)
+            entries = self.get_window(start, end - start, calculator_type)
+            entries.reverse()
+            return entries
+
+        live = self.index.of_type(calculator_type) if calculator_type else self.history
+        if self.older is not None and offset + count > len(live):
+            # Unloaded entries come before the archive; load just enough of
+            # them (all, when filtering by type) to fill the window
+            self._load_older(None if calculator_type else offset + count - len(live))
+            live = self.index.of_type(calculator_type) if calculator_type else self.history
+        entries = list(itertools.islice(reversed(live), offset, offset + count))
+        if self.archive is not None and len(entries) < count:
+            offset = max(offset - len(live), 0)
+            entries.extend(self.archive.window(offset, count - len(entries), calculator_type))
+        return entries
+
+    def analytics(self, top=10, window_days=7, now=None):
+        """Get usage statistics for the stored history, archive included.
+
+        Returns a dict with the total, counts per calculator type, per-hour
+        and per-day histograms (NumPy arrays), a trailing window_days mean of
+        the daily counts, the top inputs and conversion pairs, and the number
+        of entries in the last hour, day and week.
+        """
+        with self.lock:
+            if not self.columns.valid:
+                if hasattr(self.store, "query"):
+                    entries = self.store.query()
+                else:
+                    # Archive and hot tier, one segment at a time
+                    entries = itertools.chain.from_iterable(self.iter_history())
+                self.columns.build(entries)
+        return self.columns.analytics(now, top, window_days)
+
+    def _load_older(self, count=None):
+        if self.older is None:
+            return 0
+
+        with self.lock:
+            if self.older is None:
+                return 0
+
+            # Never load past the history size limit, which archiving in
+            # batches lets the hot tier run up to a batch over
+            capacity = self.max_entries
+            if self.archive is not None:
+                capacity += self.archive_batch - 1
+            limit = capacity - len(self.history)
+            if count is not None:
+                limit = min(limit, count)
+
+            try:
+                page = list(itertools.islice(self.older, max(limit, 0)))
+                if len(page) < limit or len(self.history) + len(page) >= capacity:
+                    self._close_older(complete=True)
+            except Exception as e:
+                print(f"Error loading history: {str(e)}")
+                page = []
+                self.older = None
+
+            # The page is newest first
+            page.reverse()
+            self.history = self.history.with_older(page)
+            self.index.prepend(page)
+            self.columns.invalidate()
+            self.search_index.invalidate()
+            self.sort_indexes.invalidate()
+            for entry in page:
+                self._completions_add(entry)
+            return len(page)
+
+    def _close_older(self, complete=False):
+        if self.older is not None:
+            if hasattr(self.older, "close"):
+                self.older.close()
+            self.older = None
+
+            # Let the store know it may now write out the full history
+            if complete and hasattr(self.store, "mark_history_complete"):
+                self.store.mark_history_complete()
+
+    def _prepare_store_write(self):
+        # Stores that write out the whole history need all of it loaded
+        if self.older is not None and getattr(self.store, "needs_full_history", True):
+            self._load_older()
+
+    def get_entry(self, entry_id):
+        """Get an entry by ID, or None if it is not in memory."""
+        entry = self.index.get(entry_id)
+        if entry is None and self.older is not None:
+            self._load_older()
+            entry = self.index.get(entry_id)
+        return entry
+
+    def get_filtered_history(self, calculator_type=None, since=None, until=None):
+        """Get history filtered by calculator type and time range.
+
+        ``since`` is inclusive and ``until`` exclusive.
+        """
+        if hasattr(self.store, "query"):
+            return self.store.query(calculator_type=calculator_type, since=since, until=until)
+        self._load_older()
+        if since is not None or until is not None:
+            return self.index.range(since, until, calculator_type)
         if calculator_type:
-            return [entry for entry in self.history if entry["type"] == calculator_type]
+            return self.index.of_type(calculator_type)
         return self.history
-    
+
+    def search_history(self, text, calculator_type=None, limit=None, newest_first=False):
+        """Get entries whose input or result contains the given text.
+
+        Case-insensitive; answered from a trigram index over the hot tier,
+        then from the archive's own index (see prepare_search()). Pass a
+        limit where possible: it stops the archive search early.
+        """
+        if hasattr(self.store, "query"):
+            return self.store.query(calculator_type=calculator_type, search=text,
+                                    limit=limit, newest_first=newest_first)
+        with self.lock:
+            self._load_older()
+            if not self.search_index.valid:
+                self.search_index.build(self.history)
+            live = self.history
+        if self.archive is None:
+            return self.search_index.search(text, calculator_type, limit, newest_first)
+
+        # The archive holds the oldest entries: after the hot tier newest
+        # first, before it oldest first
+        live_ids = {entry._id for entry in live}
+        def search_archive(count):
+            return self.archive.search(text, calculator_type, count, newest_first, live_ids)
+        def search_live(count):
+            return self.search_index.search(text, calculator_type, count, newest_first)
+
+        first, then = (search_live, search_archive) if newest_first else (search_archive, search_live)
+        results = first(limit)
+        if limit is None or len(results) < limit:
+            results.extend(then(None if limit is None else limit - len(results)))
+        return results
+
+    def prepare_search(self):
+        """Start indexing the archive for search, if it is not indexed yet."""
+        if self.archive is not None and not hasattr(self.store, "query"):
+            self.archive.prepare_search()
+
+    def suggest_inputs(self, prefix, calculator_type=None, limit=8):
+        """Past inputs starting with prefix, most used and most recent first.
+
+        Answered from a prefix trie over the whole history, archive
+        included, kept up to date as entries are added and deleted. It is
+        built on a background thread; until it is ready there are no
+        suggestions (see prepare_suggestions()).
+        """
+        with self.lock:
+            if not self.completions.valid:
+                self._start_completions_build()
+                return []
+            return self.completions.suggest(prefix, calculator_type, limit)
+
+    def prepare_suggestions(self):
+        """Start building the input suggestions, if they are not built yet."""
+        with self.lock:
+            if not self.completions.valid:
+                self._start_completions_build()
+
+    def _start_completions_build(self):
+        # Called with the lock held
+        if self.completions_log is not None:
+            return
+        log = self.completions_log = []
+        threading.Thread(target=self._build_completions, args=(log,), daemon=True).start()
+
+    def _build_completions(self, log):
+        with self.lock:
+            if self.completions_log is not log:
+                return
+            self._load_older()
+            # Changes from here on are replayed onto the built trie
+            del log[:]
+            live = self.history
+            segments = self.archive.segments() if self.archive is not None else []
+            until = datetime.datetime.now()
+
+        completions = InputCompletions()
+        try:
+            if hasattr(self.store, "query"):
+                # The database holds every entry; take those stored so far
+                offset = 0
+                while True:
+                    chunk = self.store.query(until=until, limit=COMPLETIONS_CHUNK, offset=offset)
+                    if not chunk:
+                        break
+                    completions.add_all(chunk)
+                    offset += len(chunk)
+            else:
+                live_ids = {entry._id for entry in live}
+                for _, _, _, path in segments:
+                    segment = self.archive.read_segment(path)
+                    completions.add_all(entry for entry in segment if entry._id not in live_ids)
+                completions.add_all(live)
+        except Exception as e:
+            print(f"Error building input suggestions: {str(e)}")
+            with self.lock:
+                if self.completions_log is log:
+                    self.completions_log = None
+            return
+
+        with self.lock:
+            if self.completions_log is not log:
+                # Cleared or reloaded meanwhile
+                return
+            completions.valid = True
+            for op, entry in log:
+                if op == "add":
+                    completions.add(entry)
+                else:
+                    completions.remove(entry)
+            self.completions = completions
+            self.completions_log = None
+
+    def _completions_add(self, entry):
+        self.completions.add(entry)
+        if self.completions_log is not None:
+            self.completions_log.append(("add", entry))
+
+    def _completions_remove(self, entry):
+        self.completions.remove(entry)
+        if self.completions_log is not None:
+            self.completions_log.append(("remove", entry))
+
+    def _completions_reset(self):
+        # Also abandons any build in progress
+        self.completions.invalidate()
+        self.completions_log = None
+
     def delete_entry(self, entry_id):
-        """Delete an entry by ID."""
-        self.history = [entry for entry in self.history if entry["id"] != entry_id]
-        self.save_history()
-    
+        """Delete an entry by ID, whether in the hot tier or the archive."""
+        with self.lock:
+            if entry_id not in self.index:
+                self._load_older()
+            self._prepare_store_write()
+
+            entry = self.index.remove(entry_id)
+            self._log_import("delete", entry_id)
+            if entry is not None:
+                self.history = self.history.without(entry)
+                self.search_index.remove(entry)
+                self.sort_indexes.remove(entry)
+                self._completions_remove(entry)
+            self.columns.invalidate()
+            try:
+                self.store.remove([entry_id], self.history)
+            except Exception as e:
+                print(f"Error saving history: {str(e)}")
+            self._compact_if_due()
+
+        if entry is not None:
+            self._notify(EVENT_DELETE, [entry])
+        elif self.archive is not None:
+            # Archived rows are listed too; find their segments before
+            # taking the lock, as that may decode the whole archive
+            paths = self.archive.find([entry_id])
+            if paths:
+                with self.lock:
+                    removed = self.archive.delete([entry_id], paths)
+                    self.columns.invalidate()
+                    for entry in removed:
+                        self._completions_remove(entry)
+                if removed:
+                    self._notify(EVENT_DELETE, removed)
+
+    def import_history(self, runs, cancelled=None):
+        """Merge imported entries into the history in one pass.
+
+        runs are iterables of (entry, derived id) pairs, each oldest first
+        (see utils.history_import). They are k-way merged with the existing
+        history, dropping duplicates; the newest entries become the hot
+        tier and the rest are rewritten as archive segments. The merge runs
+        without holding the lock, and changes made meanwhile are replayed
+        onto the result when it is swapped in. Returns the number of
+        entries added, or None if cancelled() became true first (or the
+        history was cleared or reloaded meanwhile).
+        """
+        with self.import_lock:
+            if hasattr(self.store, "insert_new"):
+                # The database keeps every entry in order already; only
+                # duplicates by id are left out
+                def imported():
+                    for _, entry in merge_runs(runs):
+                        if cancelled is not None and cancelled():
+                            raise InterruptedError("Import cancelled")
+                        yield entry
+                try:
+                    added = self.store.insert_new(imported())
+                except InterruptedError:
+                    return None
+                self.load_history()
+                return added
+
+            with self.lock:
+                self.import_log = []
+            try:
+                return self._import_entries(runs, cancelled)
+            finally:
+                with self.lock:
+                    self.import_log = None
+
+    def _import_entries(self, runs, cancelled):
+        existing = ((entry, False) for chunk in self.iter_history() for entry in chunk)
+
+        # Build the new archive beside the current one and swap it in at
+        # the end, so a failed or cancelled import changes nothing
+        staging = None
+        if self.archive is not None:
+            staging_dir = self.archive.archive_dir + ".import"
+            shutil.rmtree(staging_dir, ignore_errors=True)
+            staging = HistoryArchive(staging_dir, self.archive.compression)
+
+        # (run number, entry); run 0 is the existing history
+        hot = collections.deque()
+        segment = []
+        added = 0
+        try:
+            for number, entry in merge_runs([existing] + list(runs)):
+                if cancelled is not None and cancelled():
+                    return None
+                if number:
+                    added += 1
+                hot.append((number, entry))
+                if len(hot) > self.max_entries:
+                    # Past the size limit: archived, or dropped without an archive
+                    number, oldest = hot.popleft()
+                    if staging is not None:
+                        segment.append(oldest)
+                        if len(segment) >= IMPORT_SEGMENT_SIZE:
+                            staging.write_segment(segment)
+                            segment = []
+                    elif number:
+                        added -= 1
+            if staging is not None:
+                staging.write_segment(segment)
+
+            with self.lock:
+                log = self.import_log
+                if any(op == "reset" for op, _ in log):
+                    # Cleared or reloaded meanwhile; the merge is out of date
+                    return None
+
+                # Replay what happened while merging
+                deleted = {value for op, value in log if op == "delete"}
+                entries = [entry for _, entry in hot if entry._id not in deleted]
+                known = {entry._id for entry in entries}
+                entries.extend(
+                    value for op, value in log
+                    if op == "add" and value._id not in deleted and value._id not in known
+                )
+
+                if staging is not None:
+                    self.archive.replace_with(staging)
+                    if deleted:
+                        # The new segments were written before these deletes
+                        self.archive.delete(deleted)
+                self._close_older(complete=True)
+                self.history = HistorySnapshot(entries)
+                self.index.rebuild(self.history)
+                self.columns.invalidate()
+                self.search_index.invalidate()
+                self.sort_indexes.invalidate()
+                self._completions_reset()
+                try:
+                    self.store.save(self.history)
+                except Exception as e:
+                    print(f"Error saving history: {str(e)}")
+        finally:
+            if staging is not None:
+                shutil.rmtree(staging.archive_dir, ignore_errors=True)
+        self._notify(EVENT_RELOAD)
+        return added
+
+    def _log_import(self, op, value=None):
+        # An import merging outside the lock replays these when it swaps in
+        if self.import_log is not None:
+            self.import_log.append((op, value))
+
     def clear_history(self):
         """Clear all history."""
-        self.history = []
-        self.save_history()
-    
+        with self.lock:
+            self._log_import("reset")
+            self._close_older(complete=True)
+            self.history = HistorySnapshot()
+            self.index.clear()
+            self.columns.invalidate()
+            self.search_index.invalidate()
+            self.sort_indexes.invalidate()
+            self._completions_reset()
+            try:
+                self.store.clear()
+                if self.archive is not None:
+                    self.archive.clear()
+            except Exception as e:
+                print(f"Error saving history: {str(e)}")
+        self._notify(EVENT_CLEAR)
+
     def save_history(self):
-        """Save history to file."""
-        try:
-            # Convert history to serializable format
-            serializable_history = []
-            for entry in self.history:
-                serializable_entry = entry.copy()
-                serializable_entry["timestamp"] = serializable_entry["timestamp"].isoformat()
-                serializable_history.append(serializable_entry)
-            
-            with open(self.history_file, 'w') as f:
-                json.dump(serializable_history, f, indent=2)
-        except Exception as e:
-            print(f"Error saving history: {str(e)}")
-    
+        """Save the full history to file."""
+        with self.lock:
+            self._load_older()
+            try:
+                self.store.save(self.history)
+            except Exception as e:
+                print(f"Error saving history: {str(e)}")
+
     def load_history(self):
         """Load history from file."""
+        with self.lock:
+            self._log_import("reset")
+            self._close_older()
+            try:
+                if hasattr(self.store, "load_lazy"):
+                    # Only parse the newest entries now; older ones on demand
+                    tail, self.older = self.store.load_lazy()
+                else:
+                    tail = self.store.load()
+                history = HistorySnapshot(tail)
+            except Exception as e:
+                print(f"Error loading history: {str(e)}")
+                history = HistorySnapshot()
+            self.index.rebuild(history)
+            self.history = history
+            self.columns.invalidate()
+            self.search_index.invalidate()
+            self.sort_indexes.invalidate()
+            self._completions_reset()
+
+            if self.older is not None:
+                self._load_older(max(self.initial_load - len(self.history), 0))
+        self._notify(EVENT_RELOAD)
+
+    def sync_external(self):
+        """Merge in changes other processes made to the shared history.
+
+        Returns True if the in-memory history changed.
+        """
+        if not hasattr(self.store, "poll"):
+            return False
+
+        events = []
+        with self.lock:
+            try:
+                ops = self.store.poll()
+            except Exception as e:
+                print(f"Error reading history: {str(e)}")
+                return False
+
+            # Apply every change to a local version and publish it once
+            history = self.history
+            changed = False
+            for op in ops:
+                if op[0] == "reload":
+                    # The files were compacted; start again from disk
+                    self.flush()
+                    self.load_history()
+                    return True
+                if op[0] == "add":
+                    entry = op[1]
+                    if entry["id"] in self.index:
+                        continue
+                    history = history.appended(entry)
+                    self.index.add(entry)
+                    self.columns.append(entry)
+                    self.search_index.add(entry)
+                    self.sort_indexes.add(entry)
+                    self._completions_add(entry)
+                    self._log_import("add", entry)
+                    events.append((EVENT_ADD, [entry]))
+                elif op[0] == "del":
+                    deleted = []
+                    for entry_id in op[1]:
+                        entry = self.index.remove(entry_id)
+                        self._log_import("delete", entry_id)
+                        if entry is not None:
+                            history = history.without(entry)
+                            self.search_index.remove(entry)
+                            self.sort_indexes.remove(entry)
+                            self._completions_remove(entry)
+                            deleted.append(entry)
+                    self.columns.invalidate()
+                    if deleted:
+                        events.append((EVENT_DELETE, deleted))
+                elif op[0] == "clear":
+                    self._log_import("reset")
+                    self._close_older(complete=True)
+                    history = HistorySnapshot()
+                    self.index.clear()
+                    self.columns.invalidate()
+                    self.search_index.invalidate()
+                    self.sort_indexes.invalidate()
+                    self._completions_reset()
+                    events.append((EVENT_CLEAR, []))
+                changed = True
+
+            # The other process wrote (and archived) its own trims; only trim
+            # memory here
+            trimmed = list(itertools.islice(history, max(len(history) - self.max_entries, 0)))
+            history = history.without_oldest(len(trimmed))
+            for entry in trimmed:
+                self.index.remove(entry["id"])
+                self.search_index.remove(entry)
+                self.sort_indexes.remove(entry)
+            if self.archive is None and not getattr(self.store, "keeps_full_history", False):
+                self.columns.drop_oldest(len(trimmed))
+            if trimmed:
+                events.append((EVENT_ARCHIVE if self.archive is not None else EVENT_TRIM, trimmed))
+
+            self.history = history
+            self._compact_if_due()
+
+        for event, entries in events:
+            self._notify(event, entries)
+        return changed
+
+    def _compact_if_due(self):
+        # Journal compaction snapshots memory, so it runs on this thread
+        if getattr(self.store, "compaction_due", False):
+            self._prepare_store_write()
+            try:
+                self.store.compact(self.history)
+            except Exception as e:
+                print(f"Error compacting history: {str(e)}")
+
+    def flush(self):
+        """Wait for any queued writes to reach the store."""
+        if hasattr(self.store, "flush"):
+            self.store.flush()
+
+    def get_store_stats(self):
+        """Get write-behind queue depth and flush latency counters."""
+        if hasattr(self.store, "stats"):
+            return self.store.stats()
+        return {}
+
+    def close(self):
+        """Flush pending writes and release the store."""
+        self._close_older()
         try:
-            if os.path.exists(self.history_file):
-                with open(self.history_file, 'r') as f:
-                    serialized_history = json.load(f)
-                
-                # Convert serialized history back to objects
-                self.history = []
-                for entry in serialized_history:
-                    entry["timestamp"] = datetime.datetime.fromisoformat(entry["timestamp"])
-                    self.history.append(entry)
+            self.store.close()
         except Exception as e:
-            print(f"Error loading history: {str(e)}")
-            self.history = []
\ No newline at end of file
+            print(f"Error closing history: {str(e)}")
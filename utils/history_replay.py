@@ -0,0 +1,341 @@
+import argparse
+import json
+import re
+import time
+
+import numpy as np
+
+from utils.calculations import (
+    UNIT_CATEGORIES, apply_function, apply_operator, bitwise_operation,
+    convert_currency, convert_units, format_converted, matrix_operation,
+    sample_function, solve_linear, solve_quadratic, solve_system
+)
+from utils.history_archive import HistoryArchive
+from utils.history_stores import create_store
+from utils.sample_tiles import SampleTileCache
+
+# Replays a history file as a benchmark: each entry is parsed back into the
+# computation that produced it, and the computations are run headless as
+# fast as possible. Usage:
+#
+#     python -m utils.history_replay calculator_history.json --repeat 100
+#     python -m utils.history_replay calculator_history.json --backend journal \
+#         --archive-dir calculator_history_archive
+
+DISPLAY_OPERATORS = {"×": "*", "÷": "/"}
+
+# Scientific functions recorded in a form other than "name(value)"
+FUNCTION_FORMS = [
+    (re.compile(r"^\((.+)\)²$"), "square"),
+    (re.compile(r"^\((.+)\)³$"), "cube"),
+    (re.compile(r"^1/\((.+)\)$"), "reciprocal"),
+    (re.compile(r"^e\^\((.+)\)$"), "exp"),
+    (re.compile(r"^(sin|cos|tan|ln|log|sqrt)\((.+)\)$"), None),
+]
+
+PLOT_RANGE = re.compile(r"\[(.+), (.+)\]")
+PLOT_STEP = 0.1
+# Width of the plot area at the graph plotter's default figure size
+PLOT_PIXELS = 480
+
+SYSTEM = re.compile(r"^(.+)x \+ (.+)y = (.+), (.+)x \+ (.+)y = (.+)$")
+
+MATRIX_OPERATIONS = {
+    "A + B": "add",
+    "A - B": "subtract",
+    "A × B": "multiply",
+    "A^T": "transpose_a",
+    "A^-1": "inverse_a",
+}
+MATRIX_INPUT = re.compile(r"^(.+) \((\d+)x(\d+)\)$")
+DETERMINANT_INPUT = re.compile(r"^Determinant of (\d+)x(\d+) matrix$")
+
+PROGRAMMER_BASES = {"BIN": 2, "OCT": 8, "DEC": 10, "HEX": 16}
+
+
+def _parse_binary(text):
+    parts = text.split(" ")
+    if len(parts) == 3:
+        first, operator, second = parts
+        operator = DISPLAY_OPERATORS.get(operator, operator)
+        return lambda: apply_operator(float(first), operator, float(second))
+    first, separator, second = text.partition("^")
+    if separator:
+        return lambda: apply_operator(float(first), "^", float(second))
+    return None
+
+
+def parse_basic(entry, rng):
+    return _parse_binary(entry.input)
+
+
+def parse_scientific(entry, rng):
+    for pattern, function in FUNCTION_FORMS:
+        match = pattern.match(entry.input)
+        if match:
+            if function is None:
+                function, value = match.groups()
+            else:
+                value = match.group(1)
+            # The angle mode is not recorded; degrees is the default
+            return lambda: apply_function(function, float(value), degrees=True)
+    return _parse_binary(entry.input)
+
+
+def _split_conversion(text):
+    left, separator, to_unit = text.rpartition(" to ")
+    if not separator:
+        return None
+    value, _, from_unit = left.partition(" ")
+    return float(value), from_unit, to_unit
+
+
+def parse_unit_conversion(entry, rng):
+    value, from_unit, to_unit = _split_conversion(entry.input)
+    for category, units in UNIT_CATEGORIES.items():
+        if from_unit in units and to_unit in units:
+            return lambda: format_converted(convert_units(category, from_unit, to_unit, value)[0])
+    return None
+
+
+def parse_currency_conversion(entry, rng):
+    amount, _, _ = _split_conversion(entry.input)
+    # Rates are fetched live, so derive the one used from the recorded result
+    converted = float(entry.result.split(" ")[0])
+    rate = converted / amount if amount else 1.0
+    return lambda: convert_currency(amount, 1.0, rate)
+
+
+def parse_graph(entry, rng):
+    match = PLOT_RANGE.search(entry.result)
+    if not match:
+        return None
+    x_min, x_max = float(match.group(1)), float(match.group(2))
+    functions = entry.input.split(", ")
+
+    def plot():
+        # A fresh tile cache, so every replay samples like a first plot
+        tiles = SampleTileCache()
+        return [sample_function(func_str, x_min, x_max, PLOT_PIXELS, PLOT_STEP, tiles)
+                for func_str in functions]
+    return plot
+
+
+def _coefficient(text):
+    text = text.strip()
+    if text == "":
+        return 1.0
+    if text == "-":
+        return -1.0
+    return float(text)
+
+
+def _signed_terms(text):
+    """Parse "+ 2.0x - 1.0" into [("x", 2.0), ("", -1.0)]."""
+    tokens = text.split()
+    terms = []
+    for sign, value in zip(tokens[::2], tokens[1::2]):
+        variable = "x" if value.endswith("x") else ""
+        number = float(value.rstrip("x"))
+        terms.append((variable, -number if sign == "-" else number))
+    return terms
+
+
+def parse_equation(entry, rng):
+    text = entry.input
+    match = SYSTEM.match(text)
+    if match:
+        coefficients = [float(group) for group in match.groups()]
+        return lambda: solve_system(*coefficients)
+
+    if not text.endswith(" = 0"):
+        return None
+    text = text[:-len(" = 0")]
+    if "x²" in text:
+        left, rest = text.split("x²", 1)
+        a = _coefficient(left)
+        b = c = 0.0
+        for variable, number in _signed_terms(rest):
+            if variable:
+                b = number
+            else:
+                c = number
+        return lambda: solve_quadratic(a, b, c)
+
+    left, _, rest = text.partition("x")
+    a = _coefficient(left)
+    b = sum(number for _, number in _signed_terms(rest))
+    return lambda: solve_linear(a, b)
+
+
+def parse_matrix(entry, rng):
+    # Only the operation and shape are recorded, so use seeded random values
+    match = DETERMINANT_INPUT.match(entry.input)
+    if match:
+        rows, cols = int(match.group(1)), int(match.group(2))
+        matrix_a = rng.random((rows, cols))
+        return lambda: matrix_operation("determinant_a", matrix_a)
+
+    match = MATRIX_INPUT.match(entry.input)
+    if not match or match.group(1) not in MATRIX_OPERATIONS:
+        return None
+    operation = MATRIX_OPERATIONS[match.group(1)]
+    rows, cols = int(match.group(2)), int(match.group(3))
+    if operation == "multiply":
+        matrix_a, matrix_b = rng.random((rows, rows)), rng.random((rows, cols))
+    elif operation == "transpose_a":
+        matrix_a, matrix_b = rng.random((cols, rows)), None
+    elif operation == "inverse_a":
+        # A dominant diagonal keeps the matrix invertible
+        matrix_a, matrix_b = rng.random((rows, cols)) + rows * np.eye(rows), None
+    else:
+        matrix_a, matrix_b = rng.random((rows, cols)), rng.random((rows, cols))
+    return lambda: matrix_operation(operation, matrix_a, matrix_b)
+
+
+def parse_programmer(entry, rng):
+    parts = entry.input.split(" ")
+    if len(parts) == 2 and parts[0] == "NOT":
+        value = int(parts[1])
+        return lambda: bitwise_operation(value, "NOT")
+    if len(parts) == 3 and parts[1] in ("AND", "OR", "XOR", "<<", ">>"):
+        value, operation, operand = int(parts[0]), parts[1], int(parts[2])
+        return lambda: bitwise_operation(value, operation, operand)
+
+    digits, _, base = entry.input.rpartition(" (")
+    base = PROGRAMMER_BASES.get(base.rstrip(")"))
+    if base is None:
+        return None
+    digits = digits.replace(" ", "")
+    # Reading a value and showing it in every base
+    return lambda: [format(int(digits, base), spec) for spec in ("032b", "o", "d", "X")]
+
+
+PARSERS = {
+    "Basic": parse_basic,
+    "Scientific": parse_scientific,
+    "Unit Converter": parse_unit_conversion,
+    "Currency Converter": parse_currency_conversion,
+    "Graph Plotter": parse_graph,
+    "Equation Solver": parse_equation,
+    "Matrix Operations": parse_matrix,
+    "Programmer": parse_programmer,
+}
+
+
+def parse_history(entries, seed=0):
+    """Turn history entries into (calculator type, operation) pairs.
+
+    Returns the operations in history order and a count of skipped
+    entries per calculator type.
+    """
+    rng = np.random.default_rng(seed)
+    operations = []
+    skipped = {}
+    for entry in entries:
+        parser = PARSERS.get(entry.type)
+        operation = None
+        if parser is not None:
+            try:
+                operation = parser(entry, rng)
+            except (ValueError, TypeError, IndexError):
+                operation = None
+        if operation is None:
+            skipped[entry.type] = skipped.get(entry.type, 0) + 1
+        else:
+            operations.append((entry.type, operation))
+    return operations, skipped
+
+
+def replay(operations, repeat=1):
+    """Run the operations repeat times, returning latencies in ns per type."""
+    latencies = {}
+    for calculator_type, _ in operations:
+        latencies.setdefault(calculator_type, [])
+
+    clock = time.perf_counter_ns
+    for _ in range(repeat):
+        for calculator_type, operation in operations:
+            start = clock()
+            try:
+                operation()
+            except (ValueError, ZeroDivisionError, ArithmeticError):
+                # Errors shown to the user are part of the workload too
+                pass
+            latencies[calculator_type].append(clock() - start)
+    return {calculator_type: np.array(times, dtype=np.int64)
+            for calculator_type, times in latencies.items()}
+
+
+def summarize(times):
+    """Count, throughput and latency percentiles (in microseconds)."""
+    p50, p90, p99 = np.percentile(times, [50, 90, 99]) / 1000
+    total_seconds = times.sum() / 1e9
+    return {
+        "count": int(len(times)),
+        "ops_per_second": len(times) / total_seconds if total_seconds else float("inf"),
+        "p50_us": float(p50),
+        "p90_us": float(p90),
+        "p99_us": float(p99),
+        "max_us": float(times.max()) / 1000,
+    }
+
+
+def report(latencies):
+    stats = {calculator_type: summarize(times) for calculator_type, times in latencies.items()}
+    if latencies:
+        stats["Overall"] = summarize(np.concatenate(list(latencies.values())))
+    return stats
+
+
+def load_entries(history_file, backend="json", archive_dir=None):
+    """Every entry of a stored history, archive included, oldest first.
+
+    Read from the store and archive directly, since a HistoryManager only
+    keeps its max_entries most recent entries.
+    """
+    store = create_store(backend, history_file)
+    try:
+        # SQLite loads just its most recent entries, but queries them all
+        entries = store.query() if hasattr(store, "query") else store.load()
+    finally:
+        store.close()
+
+    if archive_dir and not getattr(store, "keeps_full_history", False):
+        live_ids = {entry._id for entry in entries}
+        archived = [entry for entry in HistoryArchive(archive_dir).iter_newest_first()
+                    if entry._id not in live_ids]
+        archived.reverse()
+        entries = archived + entries
+    entries.sort(key=lambda entry: entry.epoch)
+    return entries
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Replay a calculator history file as a benchmark.")
+    parser.add_argument("history_file", help="history file to replay")
+    parser.add_argument("--backend", default="json",
+                        help="history store backend (json, journal, sqlite, binary...)")
+    parser.add_argument("--archive-dir", help="archive directory of entries aged out of the history")
+    parser.add_argument("--repeat", type=int, default=100, help="times to replay the whole history")
+    parser.add_argument("--seed", type=int, default=0, help="seed for values the history does not record")
+    parser.add_argument("--json", action="store_true", help="print the results as JSON")
+    args = parser.parse_args(argv)
+
+    operations, skipped = parse_history(load_entries(args.history_file, args.backend, args.archive_dir), args.seed)
+    stats = report(replay(operations, args.repeat))
+
+    if args.json:
+        print(json.dumps({"results": stats, "skipped": skipped}, indent=2))
+        return
+
+    print(f"{'Calculator':<20} {'Ops':>8} {'Ops/s':>12} {'p50 µs':>9} {'p90 µs':>9} {'p99 µs':>9} {'max µs':>9}")
+    for calculator_type, row in stats.items():
+        print(f"{calculator_type:<20} {row['count']:>8} {row['ops_per_second']:>12.0f} "
+              f"{row['p50_us']:>9.1f} {row['p90_us']:>9.1f} {row['p99_us']:>9.1f} {row['max_us']:>9.1f}")
+    for calculator_type, count in skipped.items():
+        print(f"Skipped {count} unrecognized {calculator_type} entries")
+
+
+if __name__ == "__main__":
+    main()
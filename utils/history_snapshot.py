@@ -0,0 +1,135 @@
+import itertools
+from collections.abc import Sequence
+
+CHUNK_SIZE = 64
+
+
+def _chunked(entries):
+    entries = tuple(entries)
+    return tuple(entries[i:i + CHUNK_SIZE] for i in range(0, len(entries), CHUNK_SIZE))
+
+
+class HistorySnapshot(Sequence):
+    """An immutable version of the history, oldest entry first.
+
+    Entries are kept in tuples of up to CHUNK_SIZE. Each change returns a
+    new snapshot that copies only the chunk it touches and the tuple of
+    chunk references, sharing every other chunk with the version it came
+    from. Readers can keep iterating a snapshot while writers publish
+    newer ones, and never see a change half applied.
+    """
+
+    __slots__ = ("chunks", "start", "length")
+
+    def __init__(self, entries=()):
+        self._set(_chunked(entries), 0)
+
+    @classmethod
+    def _from_chunks(cls, chunks, start):
+        snapshot = cls.__new__(cls)
+        snapshot._set(chunks, start)
+        return snapshot
+
+    def _set(self, chunks, start):
+        # ``start`` entries of the first chunk are already trimmed
+        self.chunks = chunks
+        self.start = start
+        self.length = sum(len(chunk) for chunk in chunks) - start
+
+    def __len__(self):
+        return self.length
+
+    def __iter__(self):
+        if not self.chunks:
+            return iter(())
+        first = itertools.islice(self.chunks[0], self.start, None)
+        return itertools.chain(first, *self.chunks[1:])
+
+    def __reversed__(self):
+        if not self.chunks:
+            return iter(())
+        rest = [reversed(chunk) for chunk in reversed(self.chunks[1:])]
+        first = reversed(self.chunks[0][self.start:])
+        return itertools.chain(*rest, first)
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return list(self)[index]
+        if index < 0:
+            index += self.length
+        if not 0 <= index < self.length:
+            raise IndexError("history index out of range")
+        index += self.start
+        for chunk in self.chunks:
+            if index < len(chunk):
+                return chunk[index]
+            index -= len(chunk)
+
+    def appended(self, entry):
+        """A new snapshot with entry added at the end."""
+        chunks = self.chunks
+        if chunks and len(chunks[-1]) < CHUNK_SIZE:
+            chunks = chunks[:-1] + (chunks[-1] + (entry,),)
+        else:
+            chunks = chunks + ((entry,),)
+        return HistorySnapshot._from_chunks(chunks, self.start)
+
+    def without_oldest(self, count):
+        """A new snapshot without the oldest count entries."""
+        chunks = self.chunks
+        start = self.start + min(count, self.length)
+        while chunks and start >= len(chunks[0]):
+            start -= len(chunks[0])
+            chunks = chunks[1:]
+        return HistorySnapshot._from_chunks(chunks, start)
+
+    def with_older(self, entries):
+        """A new snapshot with entries (oldest first) added at the front."""
+        if not entries:
+            return self
+        chunks = self.chunks
+        if self.start:
+            chunks = (chunks[0][self.start:],) + chunks[1:]
+        return HistorySnapshot._from_chunks(_chunked(entries) + chunks, 0)
+
+    def without(self, entry):
+        """A new snapshot without entry (compared by identity)."""
+        for position in self._chunks_near(entry.epoch):
+            chunk = self.chunks[position]
+            offset = self.start if position == 0 else 0
+            for index in range(offset, len(chunk)):
+                if chunk[index] is entry:
+                    smaller = chunk[:index] + chunk[index + 1:]
+                    chunks = self.chunks[:position] + ((smaller,) if smaller else ()) + self.chunks[position + 1:]
+                    start = 0 if position == 0 and not smaller else self.start
+                    return HistorySnapshot._from_chunks(chunks, start)
+        raise ValueError("entry not in history")
+
+    def _chunks_near(self, epoch):
+        """Chunk positions to search for an entry with this timestamp.
+
+        History is nearly always in time order, so a binary search over
+        the first timestamp of each chunk finds the chunk, and equal
+        timestamps may run back into earlier ones. Every other chunk
+        follows, in case entries are out of order (clock changes, merges
+        from other processes).
+        """
+        low, high = 0, len(self.chunks)
+        while low < high:
+            middle = (low + high) // 2
+            if self.chunks[middle][0].epoch <= epoch:
+                low = middle + 1
+            else:
+                high = middle
+        position = max(low - 1, 0)
+
+        searched = set()
+        while position >= 0:
+            searched.add(position)
+            yield position
+            if self.chunks[position][0].epoch < epoch:
+                break
+            position -= 1
+        for position in range(len(self.chunks)):
+            if position not in searched:
+                yield position
@@ -0,0 +1,83 @@
+import bisect
+
+# Columns the history can be sorted by, besides its natural time order
+SORT_COLUMNS = ("type", "input", "result")
+
+
+def sort_value(value):
+    """Sort numbers numerically, ahead of text (which ignores case)."""
+    text = str(value)
+    try:
+        number = float(text)
+    except ValueError:
+        number = None
+    # NaN does not order, so it sorts as text
+    if number is None or number != number:
+        return (1, 0.0, text.lower())
+    return (0, number, "")
+
+
+def sort_key(column, entry):
+    # Equal values stay in time order
+    if column == "type":
+        return (entry.type, entry.epoch)
+    return (sort_value(entry[column]), entry.epoch)
+
+
+class SortOrder:
+    """Entries in order of one column, kept sorted with bisect."""
+
+    def __init__(self, column, entries):
+        self.column = column
+        pairs = sorted(((sort_key(column, entry), entry) for entry in entries), key=lambda pair: pair[0])
+        self.keys = [key for key, _ in pairs]
+        self.entries = [entry for _, entry in pairs]
+
+    def __len__(self):
+        return len(self.entries)
+
+    def add(self, entry):
+        key = sort_key(self.column, entry)
+        position = bisect.bisect_right(self.keys, key)
+        self.keys.insert(position, key)
+        self.entries.insert(position, entry)
+
+    def remove(self, entry):
+        key = sort_key(self.column, entry)
+        position = bisect.bisect_left(self.keys, key)
+        # Step over other entries with the same key
+        while position < len(self.entries) and self.entries[position] is not entry:
+            position += 1
+        if position < len(self.entries):
+            del self.keys[position]
+            del self.entries[position]
+
+
+class SortIndexes:
+    """Sort orders of the in-memory history, one per column.
+
+    Each order is built (one sort) the first time its column is used and
+    then maintained as entries come and go, so switching columns or
+    direction never sorts again.
+    """
+
+    def __init__(self):
+        self.invalidate()
+
+    def invalidate(self):
+        self.orders = {}
+
+    def add(self, entry):
+        for order in self.orders.values():
+            order.add(entry)
+
+    def remove(self, entry):
+        for order in self.orders.values():
+            order.remove(entry)
+
+    def order(self, column, entries):
+        """The order for column, building it from entries if needed."""
+        order = self.orders.get(column)
+        if order is None:
+            order = self.orders[column] = SortOrder(column, entries)
+        return order
@@ -0,0 +1,525 @@
+import contextlib
+import json
+import os
+import threading
+
+try:
+    import fcntl
+except ImportError:
+    # Not available on Windows; the journal is then single-process only
+    fcntl = None
+
+from utils.history_entry import HistoryEntry
+
+
+def serialize_entry(entry):
+    """Convert a history entry to a JSON-serializable dict."""
+    return {
+        "id": entry["id"],
+        "timestamp": entry.isoformat(),
+        "type": entry["type"],
+        "input": entry["input"],
+        "result": entry["result"]
+    }
+
+
+def deserialize_entry(data):
+    """Convert a serialized dict back to a history entry.
+
+    The timestamp is kept as a string and parsed lazily on first access.
+    """
+    return HistoryEntry.from_dict(data)
+
+
+def write_json_snapshot(path, history):
+    """Atomically write the full history as a JSON array."""
+    serializable_history = [serialize_entry(entry) for entry in history]
+
+    # Write to a temporary file first so a crash never leaves a truncated file
+    tmp_path = path + ".tmp"
+    with open(tmp_path, 'w') as f:
+        json.dump(serializable_history, f, indent=2)
+    os.replace(tmp_path, path)
+
+
+def read_json_snapshot(path):
+    """Read a JSON array snapshot, returning an empty list if missing."""
+    if not os.path.exists(path):
+        return []
+    with open(path, 'r') as f:
+        return [deserialize_entry(entry) for entry in json.load(f)]
+
+
+def iter_json_snapshot_reversed(path, block_size=1 << 16):
+    """Stream entries from a JSON array snapshot, newest (last) first.
+
+    Reads the file backwards in blocks. Snapshots written by
+    write_json_snapshot put every entry on its own "\n  {" line, which
+    cannot occur inside a JSON string, so each entry can be parsed on its
+    own. Anything not in that layout is parsed in one go at the end.
+
+    The file is opened straight away, so the stream keeps reading the same
+    snapshot even if the file is replaced while it is being consumed.
+    """
+    if not os.path.exists(path):
+        return iter(())
+    return _iter_snapshot_reversed(open(path, 'rb'), block_size)
+
+
+def _iter_snapshot_reversed(file, block_size):
+    with file as f:
+        f.seek(0, os.SEEK_END)
+        position = f.tell()
+        buffer = b""
+        while True:
+            start = buffer.rfind(b"\n  {")
+            while start != -1:
+                chunk = buffer[start:].strip().rstrip(b"]").strip().rstrip(b",")
+                yield deserialize_entry(json.loads(chunk))
+                buffer = buffer[:start]
+                start = buffer.rfind(b"\n  {")
+
+            if position == 0:
+                break
+            size = min(block_size, position)
+            position -= size
+            f.seek(position)
+            buffer = f.read(size) + buffer
+
+    # Whatever is left should be the opening bracket
+    remaining = buffer.strip().rstrip(b",")
+    if remaining and remaining != b"[":
+        if not remaining.endswith(b"]"):
+            remaining += b"]"
+        for data in reversed(json.loads(remaining)):
+            yield deserialize_entry(data)
+
+
+class JsonHistoryStore:
+    """Stores the whole history as a single pretty-printed JSON file.
+
+    Every change rewrites the file, so writes are O(n) in the history size.
+    """
+
+    # Every write rewrites the file from the full in-memory history
+    needs_full_history = True
+
+    def __init__(self, history_file):
+        self.history_file = history_file
+
+    def load(self):
+        return read_json_snapshot(self.history_file)
+
+    def load_lazy(self):
+        """Return (tail, older) where older streams entries newest first."""
+        return [], iter_json_snapshot_reversed(self.history_file)
+
+    def append(self, entry, history, trimmed_ids=()):
+        self.save(history)
+
+    def remove(self, entry_ids, history):
+        self.save(history)
+
+    def clear(self):
+        self.save([])
+
+    def save(self, history):
+        write_json_snapshot(self.history_file, history)
+
+    def apply_batch(self, ops, history):
+        # Any batch of changes collapses into a single rewrite
+        self.save(history)
+
+    def close(self):
+        pass
+
+
+class JournalHistoryStore:
+    """Append-only JSON-lines journal on top of a JSON snapshot.
+
+    Adds write a single journal record, deletes and clears write tombstone
+    records. The snapshot keeps the same format as JsonHistoryStore, so
+    existing history files are read as-is. Once the journal grows past
+    ``compact_ratio`` times the live history size ``compaction_due`` is set
+    and the owner of the history calls ``compact``, which rotates the journal
+    and folds it into a new snapshot on a background thread.
+
+    Several processes can share one journal. Writes hold an exclusive
+    ``fcntl`` lock on a side lock file and first read any records other
+    processes appended since the last read. Those records, and any that
+    ``poll`` picks up later, are handed back to the caller to merge by id.
+    """
+
+    def __init__(self, history_file, compact_ratio=1.0, compact_min_records=200, fsync=False):
+        self.history_file = history_file
+        self.journal_file = history_file + ".journal"
+        self.rotated_file = history_file + ".journal.old"
+        self.lock_file = history_file + ".lock"
+        self.compact_ratio = compact_ratio
+        self.compact_min_records = compact_min_records
+        self.fsync = fsync
+
+        self.lock = threading.Lock()
+        self.lock_fd = None
+        self.journal = None
+        self.journal_records = 0
+        self.compaction_due = False
+        self.compaction_thread = None
+
+        # False while the caller still has older entries to stream in;
+        # compacting from a partial history would lose them
+        self.history_complete = True
+
+        # How far into the journal (and which files) this process has read
+        self.read_offset = 0
+        self.journal_id = None
+        self.snapshot_id = None
+        self.external_ops = []
+
+    @contextlib.contextmanager
+    def _locked(self, exclusive=True):
+        """Hold the thread lock and, where available, an fcntl file lock."""
+        with self.lock:
+            if fcntl is None:
+                yield
+                return
+            if self.lock_fd is None:
+                self.lock_fd = os.open(self.lock_file, os.O_RDWR | os.O_CREAT, 0o644)
+            fcntl.flock(self.lock_fd, fcntl.LOCK_EX if exclusive else fcntl.LOCK_SH)
+            try:
+                yield
+            finally:
+                fcntl.flock(self.lock_fd, fcntl.LOCK_UN)
+
+    def _file_id(self, path):
+        try:
+            stat = os.stat(path)
+        except FileNotFoundError:
+            return None
+        return (stat.st_ino, stat.st_mtime_ns)
+
+    def _remember_files(self):
+        # Called with the lock held, once everything on disk has been read
+        self.snapshot_id = self._file_id(self.history_file)
+        journal_id = self._file_id(self.journal_file)
+        self.journal_id = journal_id[0] if journal_id else None
+        self.read_offset = os.path.getsize(self.journal_file) if journal_id else 0
+
+    def load(self):
+        # Replay snapshot, then any journal left over from an interrupted
+        # compaction, then the live journal. Replay is idempotent: adds are
+        # keyed by id and deletes of missing ids are ignored.
+        with self._locked(exclusive=False):
+            # A handle kept from before a reload may be on a rotated journal
+            self._close_journal()
+            entries = {}
+            for entry in read_json_snapshot(self.history_file):
+                entries[entry["id"]] = entry
+
+            self.journal_records = 0
+            for path in (self.rotated_file, self.journal_file):
+                self.journal_records += self._replay(path, entries)
+
+            self._remember_files()
+            self.external_ops = []
+        return list(entries.values())
+
+    def load_lazy(self):
+        """Return (tail, older) where older streams entries newest first.
+
+        The journal is replayed in full (compaction keeps it short); the
+        snapshot is only streamed as the caller pulls older entries.
+        """
+        with self._locked(exclusive=False):
+            self._close_journal()
+            entries = {}
+            deleted = set()
+            self.journal_records = 0
+            for path in (self.rotated_file, self.journal_file):
+                self.journal_records += self._replay(path, entries, deleted)
+
+            self._remember_files()
+            self.external_ops = []
+
+            if None in deleted:
+                return list(entries.values()), iter(())
+
+            # Open the snapshot under the lock so a concurrent compaction
+            # replacing the file cannot change what this load sees
+            skip = deleted | set(entries)
+            older = self._stream_older(iter_json_snapshot_reversed(self.history_file), skip)
+            self.history_complete = False
+        return list(entries.values()), older
+
+    def _stream_older(self, snapshot_entries, skip):
+        try:
+            for entry in snapshot_entries:
+                if entry["id"] not in skip:
+                    yield entry
+        finally:
+            if hasattr(snapshot_entries, "close"):
+                snapshot_entries.close()
+
+    def mark_history_complete(self):
+        """Called once the caller holds every entry it is going to keep."""
+        self.history_complete = True
+
+    @property
+    def needs_full_history(self):
+        # Only a compaction needs the full history
+        threshold = self.compact_min_records * self.compact_ratio
+        return not self.history_complete and self.journal_records + 2 >= threshold
+
+    def _replay(self, path, entries, deleted=None):
+        if not os.path.exists(path):
+            return 0
+
+        count = 0
+        with open(path, 'r') as f:
+            for line in f:
+                record = self._parse_record(line)
+                if record is None:
+                    continue
+
+                op = record.get("op")
+                if op == "add":
+                    entry = deserialize_entry(record["entry"])
+                    entries[entry["id"]] = entry
+                    if deleted is not None:
+                        deleted.discard(entry["id"])
+                elif op == "del":
+                    for entry_id in record["ids"]:
+                        entries.pop(entry_id, None)
+                        if deleted is not None:
+                            deleted.add(entry_id)
+                elif op == "clear":
+                    entries.clear()
+                    if deleted is not None:
+                        # None marks that every snapshot entry is gone
+                        deleted.clear()
+                        deleted.add(None)
+                count += 1
+        return count
+
+    def _parse_record(self, line):
+        line = line.strip()
+        if not line:
+            return None
+        try:
+            return json.loads(line)
+        except ValueError:
+            # A torn final line from a crash mid-write; skip it
+            return None
+
+    def _read_external(self):
+        """Read records other processes appended since the last read.
+
+        Called with the file lock held. Returns False if the journal was
+        rotated or the snapshot replaced, in which case the caller has to
+        reload everything.
+        """
+        if self._file_id(self.history_file) != self.snapshot_id:
+            return False
+        journal_id = self._file_id(self.journal_file)
+        if journal_id is None:
+            return self.journal_id is None
+        if self.journal_id is not None and journal_id[0] != self.journal_id:
+            return False
+
+        with open(self.journal_file, 'rb') as f:
+            f.seek(0, os.SEEK_END)
+            if f.tell() < self.read_offset:
+                return False
+            f.seek(self.read_offset)
+            data = f.read()
+
+        # Only consume complete lines
+        end = data.rfind(b"\n") + 1
+        self.read_offset += end
+        self.journal_id = journal_id[0]
+
+        for line in data[:end].decode("utf-8").splitlines():
+            record = self._parse_record(line)
+            if record is None:
+                continue
+            op = record.get("op")
+            if op == "add":
+                self.external_ops.append(("add", deserialize_entry(record["entry"])))
+            elif op == "del":
+                self.external_ops.append(("del", record["ids"]))
+            elif op == "clear":
+                self.external_ops.append(("clear",))
+            self.journal_records += 1
+        return True
+
+    def poll(self):
+        """Return changes other processes made since the last poll or write.
+
+        Operations are ("add", entry), ("del", ids) or ("clear",). A single
+        ("reload",) means the files were compacted and must be reloaded.
+        """
+        with self._locked(exclusive=False):
+            if not self._read_external():
+                # The journal may have been rotated away; the next write
+                # must open the new one
+                self._close_journal()
+                self.external_ops = []
+                return [("reload",)]
+            ops = self.external_ops
+            self.external_ops = []
+        return ops
+
+    def append(self, entry, history, trimmed_ids=()):
+        records = [{"op": "add", "entry": serialize_entry(entry)}]
+        if trimmed_ids:
+            records.append({"op": "del", "ids": list(trimmed_ids)})
+        self._write(records, history)
+
+    def remove(self, entry_ids, history):
+        self._write([{"op": "del", "ids": list(entry_ids)}], history)
+
+    def clear(self):
+        self._write([{"op": "clear"}], [])
+
+    def save(self, history):
+        # A full save is a synchronous compaction
+        with self._locked():
+            self._close_journal()
+            write_json_snapshot(self.history_file, history)
+            for path in (self.journal_file, self.rotated_file):
+                if os.path.exists(path):
+                    os.remove(path)
+            self.journal_records = 0
+            self._remember_files()
+            self.external_ops = []
+
+    def apply_batch(self, ops, history):
+        if any(op[0] == "save" for op in ops):
+            self.save(history)
+            return
+
+        records = []
+        for op in ops:
+            if op[0] == "append":
+                records.append({"op": "add", "entry": serialize_entry(op[1])})
+                if op[2]:
+                    records.append({"op": "del", "ids": op[2]})
+            elif op[0] == "remove":
+                records.append({"op": "del", "ids": op[1]})
+            elif op[0] == "clear":
+                records.append({"op": "clear"})
+        self._write(records, history)
+
+    def _write(self, records, history):
+        with self._locked():
+            # Pick up other processes' appends before adding ours
+            in_sync = self._read_external()
+            if not in_sync:
+                self._close_journal()
+                self.external_ops = [("reload",)]
+
+            if self.journal is None:
+                self.journal = open(self.journal_file, 'a')
+            self.journal.write("".join(json.dumps(record) + "\n" for record in records))
+            self.journal.flush()
+            if self.fsync:
+                os.fsync(self.journal.fileno())
+            self.journal_records += len(records)
+
+            stat = os.fstat(self.journal.fileno())
+            self.journal_id = stat.st_ino
+            if in_sync:
+                self.read_offset = stat.st_size
+            else:
+                # Everything will be reloaded; remember the files as they are
+                self._remember_files()
+                return
+
+            threshold = max(len(history), self.compact_min_records) * self.compact_ratio
+            self.compaction_due = self.journal_records >= threshold
+
+    def compact(self, history):
+        """Fold the journal into a new snapshot of ``history``.
+
+        Must be called from the thread that owns ``history`` so it reflects
+        every change merged so far. The snapshot may already contain entries
+        whose journal records are still queued; replay is idempotent, so
+        that is harmless.
+        """
+        with self._locked():
+            # Only safe when nothing from other processes is still waiting
+            # to be merged into history
+            if not self._read_external() or self.external_ops:
+                return
+            self._start_compaction(history)
+
+    def _start_compaction(self, history):
+        # Called with the lock held
+        if not self.history_complete:
+            return
+        if self.compaction_thread is not None and self.compaction_thread.is_alive():
+            return
+        if os.path.exists(self.rotated_file):
+            return
+
+        # Rotate the journal so new writes go to a fresh file while the
+        # snapshot is being rebuilt from a copy of the current state
+        self._close_journal()
+        if os.path.exists(self.journal_file):
+            os.replace(self.journal_file, self.rotated_file)
+        self.journal_records = 0
+        self.compaction_due = False
+        self.journal_id = None
+        self.read_offset = 0
+
+        snapshot = list(history)
+        self.compaction_thread = threading.Thread(
+            target=self._compact, args=(snapshot,), daemon=True
+        )
+        self.compaction_thread.start()
+
+    def _compact(self, snapshot):
+        try:
+            tmp_path = self.history_file + ".compact"
+            write_json_snapshot(tmp_path, snapshot)
+
+            # Swap the snapshot in and drop the rotated journal together, so
+            # readers holding the lock always see a consistent pair
+            with self._locked():
+                os.replace(tmp_path, self.history_file)
+                os.remove(self.rotated_file)
+                self.snapshot_id = self._file_id(self.history_file)
+        except Exception as e:
+            print(f"Error compacting history journal: {str(e)}")
+
+    def _close_journal(self):
+        if self.journal is not None:
+            self.journal.close()
+            self.journal = None
+
+    def close(self):
+        if self.compaction_thread is not None:
+            self.compaction_thread.join()
+        with self.lock:
+            self._close_journal()
+            if self.lock_fd is not None:
+                os.close(self.lock_fd)
+                self.lock_fd = None
+
+
+def create_store(backend, history_file):
+    """Create a history store for the given backend name."""
+    if backend == "json":
+        return JsonHistoryStore(history_file)
+    if backend == "journal":
+        return JournalHistoryStore(history_file)
+    if backend == "sqlite":
+        from utils.sqlite_history_store import SqliteHistoryStore
+        db_file = os.path.splitext(history_file)[0] + ".db"
+        return SqliteHistoryStore(db_file, legacy_json_file=history_file)
+    if backend in ("binary", "binary+zlib", "binary+lzma"):
+        from utils.binary_snapshot import BinaryHistoryStore
+        compression = backend.partition("+")[2] or None
+        snapshot_file = os.path.splitext(history_file)[0] + ".cvh"
+        return BinaryHistoryStore(snapshot_file, legacy_json_file=history_file, compression=compression)
+    raise ValueError(f"Unknown history backend: {backend}")
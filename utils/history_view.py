@@ -0,0 +1,106 @@
+from utils.history_sort import sort_key
+from utils.trigram_index import search_text
+
+
+class HistoryView:
+    """A sorted, filtered window onto the history for a virtual list.
+
+    Only the rows around the current scroll position are fetched from the
+    history manager, plus ``overscan`` rows either side so that small
+    scrolls are served from the cached window. Search results are the one
+    exception: they are held as a list, fetched a page at a time as the
+    list scrolls towards its end (all at once when sorted by a column other
+    than time, which needs every match).
+    """
+
+    SEARCH_PAGE = 200
+
+    def __init__(self, history_manager, overscan=20):
+        self.history_manager = history_manager
+        self.overscan = overscan
+        self.calculator_type = None
+        self.text = ""
+        # Newest first until a column is chosen
+        self.sort_by = "time"
+        self.descending = True
+        self.invalidate()
+
+    def set_filter(self, calculator_type=None, text=""):
+        self.calculator_type = calculator_type
+        self.text = text
+        self.invalidate()
+
+    def set_sort(self, column="time", descending=True):
+        self.sort_by = column
+        self.descending = descending
+        self.invalidate()
+
+    def invalidate(self):
+        """Forget cached rows; call after the history changes."""
+        self.total = None
+        self.matches = None
+        self.matches_complete = False
+        self.window_offset = 0
+        self.window = []
+        self.window_at_end = False
+
+    def matches_filter(self, entry):
+        if self.calculator_type and entry["type"] != self.calculator_type:
+            return False
+        return not self.text or self.text.lower() in search_text(entry)
+
+    def __len__(self):
+        if self.text:
+            matches = self._matches(self.SEARCH_PAGE)
+            # One more row while there may be more, so scrolling continues
+            return len(matches) + (0 if self.matches_complete else 1)
+        if self.total is None:
+            if self.sort_by == "time":
+                self.total = self.history_manager.count_history(self.calculator_type)
+            else:
+                self.total = self.history_manager.count_sortable(self.calculator_type)
+        return self.total
+
+    def partial_order(self):
+        """(rows, entries) when the order leaves out archived entries, else None.
+
+        Orders other than time cover only the most recent entries, unless
+        searching (search results are sorted in full).
+        """
+        if self.text or self.sort_by == "time":
+            return None
+        rows = len(self)
+        entries = self.history_manager.count_history(self.calculator_type)
+        return (rows, entries) if rows < entries else None
+
+    def _matches(self, needed):
+        if self.matches is None or (not self.matches_complete and len(self.matches) < needed):
+            limit = None
+            if self.sort_by == "time":
+                limit = max(needed, 2 * len(self.matches or ()), self.SEARCH_PAGE)
+            self.matches = self.history_manager.search_history(
+                self.text, self.calculator_type, limit, newest_first=self.descending
+            )
+            self.matches_complete = limit is None or len(self.matches) < limit
+            if self.sort_by != "time":
+                self.matches.sort(key=lambda entry: sort_key(self.sort_by, entry), reverse=self.descending)
+        return self.matches
+
+    def rows(self, first, count):
+        """Entries at positions first to first + count, in the current order."""
+        if self.text:
+            return list(self._matches(first + count)[first:first + count])
+
+        start = first - self.window_offset
+        if start < 0 or (start + count > len(self.window) and not self.window_at_end):
+            # Refetch with a margin on both sides of the requested rows
+            self.window_offset = max(first - self.overscan, 0)
+            size = count + first - self.window_offset + self.overscan
+            self.window = self.history_manager.get_window(
+                self.window_offset, size, self.calculator_type, self.sort_by, self.descending
+            )
+            self.window_at_end = len(self.window) < size
+            # Reaching older entries may have loaded more; count again
+            self.total = None
+            start = first - self.window_offset
+        return self.window[start:start + count]
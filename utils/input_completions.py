@@ -0,0 +1,217 @@
+import heapq
+
+from utils.history_entry import type_code
+
+# Completions kept at each trie node, and so the most suggest() returns
+TOP_K = 8
+
+# A use this long ago counts half as much as one now
+HALF_LIFE = 7 * 24 * 3600.0
+
+# Scores are rescaled before recent weights could overflow a float
+MAX_WEIGHT = 2.0 ** 512
+
+
+def input_terms(entry):
+    """The inputs an entry offers as completions.
+
+    The graph plotter records all its functions in one input, so each
+    function is offered on its own.
+    """
+    text = entry.input.strip()
+    if not text:
+        return []
+    if entry.type == "Graph Plotter":
+        return [term for term in split_top_level(text) if term]
+    return [text]
+
+
+def split_top_level(text, separator=","):
+    """Split text on separators that are not inside brackets."""
+    terms = []
+    depth = 0
+    start = 0
+    for i, char in enumerate(text):
+        if char in "([{":
+            depth += 1
+        elif char in ")]}":
+            depth = max(depth - 1, 0)
+        elif char == separator and depth == 0:
+            terms.append(text[start:i].strip())
+            start = i + 1
+    terms.append(text[start:].strip())
+    return terms
+
+
+class _Node:
+    __slots__ = ("children", "top", "texts")
+
+    def __init__(self):
+        self.children = {}
+        # Best completions below this node, best first
+        self.top = []
+        # Inputs ending at this node (case variants differ), once any do
+        self.texts = None
+
+
+class PrefixTrie:
+    """Prefix trie of inputs, each node holding its best completions.
+
+    A new use only ever raises one input's score, so the ranked list at
+    each node on its path can be updated in place, and a lookup is a walk
+    down the prefix with no search below it. Removing a use lowers the
+    score; each node on the path that ranked the input is then re-ranked
+    from its children's lists, deepest first. Matching ignores case.
+    """
+
+    def __init__(self):
+        self.root = _Node()
+        self.scores = {}
+        self.uses = {}
+
+    def add(self, text, weight):
+        score = self.scores.get(text, 0.0) + weight
+        self.scores[text] = score
+        self.uses[text] = self.uses.get(text, 0) + 1
+
+        node = self.root
+        self._rank(node, text, score)
+        for char in text.lower():
+            child = node.children.get(char)
+            if child is None:
+                child = node.children[char] = _Node()
+            node = child
+            self._rank(node, text, score)
+        if node.texts is None:
+            node.texts = []
+        if text not in node.texts:
+            node.texts.append(text)
+
+    def remove(self, text, weight):
+        """Take back one use of text, added with the given weight."""
+        uses = self.uses.get(text)
+        if not uses:
+            return
+        path = [self.root]
+        for char in text.lower():
+            path.append(path[-1].children[char])
+
+        if uses == 1:
+            del self.uses[text]
+            del self.scores[text]
+            path[-1].texts.remove(text)
+        else:
+            self.uses[text] = uses - 1
+            self.scores[text] = max(self.scores[text] - weight, 0.0)
+
+        for node in reversed(path):
+            if text in node.top:
+                self._rerank(node)
+
+    def _rerank(self, node):
+        candidates = set(node.texts or ())
+        for child in node.children.values():
+            candidates.update(child.top)
+        node.top = heapq.nsmallest(TOP_K, candidates, key=lambda text: -self.scores[text])
+
+    def _rank(self, node, text, score):
+        top = node.top
+        if text in top:
+            top.remove(text)
+        elif len(top) >= TOP_K and score <= self.scores[top[-1]]:
+            return
+        position = 0
+        while position < len(top) and self.scores[top[position]] >= score:
+            position += 1
+        top.insert(position, text)
+        del top[TOP_K:]
+
+    def rescale(self, scale):
+        # Scaling every score alike keeps the rankings
+        self.scores = {text: score * scale for text, score in self.scores.items()}
+
+    def suggest(self, prefix, limit=TOP_K):
+        """[(text, score)] of the best completions of prefix, best first."""
+        node = self.root
+        for char in prefix.lower():
+            node = node.children.get(char)
+            if node is None:
+                return []
+        return [(text, self.scores[text]) for text in node.top[:limit]]
+
+
+class InputCompletions:
+    """Past inputs of each calculator, for completing what is being typed.
+
+    An input's score is the sum of its uses, each weighted by
+    2 ** (time / HALF_LIFE), so frequent and recent inputs rank first and
+    old scores never need decaying. There is one trie per calculator type;
+    suggestions across all calculators merge the tries' ranked lists.
+    """
+
+    def __init__(self):
+        self.invalidate()
+
+    def invalidate(self):
+        self.valid = False
+        self.tries = {}
+        self.base = None
+
+    def build(self, entries):
+        """Rebuild from entries, oldest first."""
+        self.invalidate()
+        for entry in entries:
+            self._add(entry)
+        self.valid = True
+
+    def add_all(self, entries):
+        """Add entries while building, before the completions are valid."""
+        for entry in entries:
+            self._add(entry)
+
+    def add(self, entry):
+        if self.valid:
+            self._add(entry)
+
+    def _add(self, entry):
+        if self.base is None:
+            self.base = entry.epoch
+        weight = 2.0 ** ((entry.epoch - self.base) / HALF_LIFE)
+        if weight > MAX_WEIGHT:
+            for trie in self.tries.values():
+                trie.rescale(1.0 / weight)
+            self.base = entry.epoch
+            weight = 1.0
+
+        trie = self.tries.get(entry.type_code)
+        if trie is None:
+            trie = self.tries[entry.type_code] = PrefixTrie()
+        for term in input_terms(entry):
+            trie.add(term, weight)
+
+    def remove(self, entry):
+        """Take back the uses an entry added."""
+        trie = self.tries.get(entry.type_code)
+        if not self.valid or trie is None:
+            return
+        weight = 2.0 ** ((entry.epoch - self.base) / HALF_LIFE)
+        for term in input_terms(entry):
+            trie.remove(term, weight)
+
+    def suggest(self, prefix, calculator_type=None, limit=TOP_K):
+        """The best completions of prefix, best first."""
+        if calculator_type:
+            trie = self.tries.get(type_code(calculator_type))
+            return [text for text, _ in trie.suggest(prefix, limit)] if trie else []
+
+        ranked = heapq.merge(
+            *(trie.suggest(prefix, limit) for trie in self.tries.values()),
+            key=lambda item: -item[1]
+        )
+        suggestions = []
+        for text, _ in ranked:
+            if text not in suggestions:
+                suggestions.append(text)
+                if len(suggestions) >= limit:
+                    break
+        return suggestions
@@ -0,0 +1,142 @@
+import numpy as np
+
+# Points in the first, uniform pass over the range
+INITIAL_POINTS = 65
+
+# Most points evaluated for one function
+MAX_POINTS = 2000
+
+# Refine where a point is off the line through its neighbours by more
+# than this fraction of the curve's typical height
+TOLERANCE = 1e-3
+
+# Intervals are never split below this fraction of the range
+MIN_WIDTH = 1e-7
+
+# A jump of this many typical heights across a flip of sign is a pole
+POLE_JUMP = 10.0
+
+# Most points per pixel of plot width
+POINTS_PER_PIXEL = 2
+
+
+def typical_height(y_values):
+    """The spread of the middle of y_values, ignoring spikes near poles."""
+    finite = y_values[np.isfinite(y_values)]
+    if finite.size == 0:
+        return 1.0
+    low, high = np.percentile(finite, [5, 95])
+    height = high - low
+    if height <= 0:
+        height = max(abs(high), 1.0)
+    return height
+
+
+def _interval_errors(xs, ys, height):
+    """How much each interval between samples needs splitting."""
+    finite = np.isfinite(ys)
+    errors = np.zeros(len(xs) - 1)
+
+    # Bend at each inner point: its distance from the chord of its neighbours
+    if len(xs) > 2:
+        t = (xs[1:-1] - xs[:-2]) / (xs[2:] - xs[:-2])
+        with np.errstate(invalid="ignore"):
+            chord = ys[:-2] + (ys[2:] - ys[:-2]) * t
+            bend = np.abs(ys[1:-1] - chord) / height
+        bend[~(finite[:-2] & finite[1:-1] & finite[2:])] = 0.0
+        errors[:-1] = bend
+        errors[1:] = np.maximum(errors[1:], bend)
+
+    # Edges of the domain (sqrt(x) at 0) and sign flips are found exactly
+    edge = finite[:-1] != finite[1:]
+    errors[edge] = np.maximum(errors[edge], 1.0)
+    with np.errstate(invalid="ignore"):
+        flip = finite[:-1] & finite[1:] & (np.sign(ys[:-1]) != np.sign(ys[1:]))
+        jump = np.abs(ys[1:] - ys[:-1]) / height
+    errors[flip] = np.maximum(errors[flip], jump[flip])
+    return errors
+
+
+def adaptive_sample(function, x_min, x_max, max_points=MAX_POINTS, initial_points=INITIAL_POINTS):
+    """Sample function (vectorized over x) densely only where it needs it.
+
+    Starts from a coarse uniform grid, then repeatedly splits the
+    intervals where the curve bends or flips sign, worst first, until
+    they are straight to within TOLERANCE or max_points are used. Where
+    it jumps across a pole (tan(x) at pi/2, 1/x at 0) a NaN is inserted
+    so the plotted line breaks instead of joining the two ends.
+
+    Returns (x_values, y_values); non-finite y values are NaN.
+    """
+    xs = np.linspace(x_min, x_max, max(min(initial_points, max_points), 2))
+    ys = np.asarray(function(xs), dtype=float)
+    height = typical_height(ys)
+    min_width = (x_max - x_min) * MIN_WIDTH
+
+    while len(xs) < max_points:
+        errors = _interval_errors(xs, ys, height)
+        errors[np.diff(xs) <= min_width] = 0.0
+        split = np.flatnonzero(errors > TOLERANCE)
+        if split.size == 0:
+            break
+        budget = max_points - len(xs)
+        if split.size > budget:
+            split = split[np.argsort(errors[split])[-budget:]]
+            split.sort()
+
+        new_xs = (xs[split] + xs[split + 1]) / 2
+        new_ys = np.asarray(function(new_xs), dtype=float)
+        xs = np.insert(xs, split + 1, new_xs)
+        ys = np.insert(ys, split + 1, new_ys)
+
+    ys[~np.isfinite(ys)] = np.nan
+    return break_at_poles(xs, ys, height, min_width)
+
+
+def break_at_poles(xs, ys, height, min_width):
+    """Insert NaN between samples that jump across a pole."""
+    with np.errstate(invalid="ignore"):
+        jump = np.abs(np.diff(ys)) / height
+        flip = np.sign(ys[:-1]) != np.sign(ys[1:])
+    # A continuous curve can't jump far over an interval refined to the
+    # limit; one that also flips sign did not even when the budget ran out
+    narrow = np.diff(xs) <= 2 * min_width
+    poles = np.flatnonzero(((narrow & (jump > 1.0)) | (flip & (jump > POLE_JUMP))) & ~np.isnan(jump))
+    if poles.size == 0:
+        return xs, ys
+    break_xs = (xs[poles] + xs[poles + 1]) / 2
+    return np.insert(xs, poles + 1, break_xs), np.insert(ys, poles + 1, np.nan)
+
+
+def _spread(xs, ys, low=0.02, high=0.98):
+    """Percentiles of ys weighted by the x width each sample covers."""
+    # Dense sampling near a pole must not count for more than the rest
+    widths = np.gradient(xs)
+    finite = np.isfinite(ys)
+    order = np.argsort(ys[finite])
+    values = ys[finite][order]
+    weights = np.cumsum(widths[finite][order])
+    weights /= weights[-1]
+    return values[np.searchsorted(weights, low)], values[min(np.searchsorted(weights, high), len(values) - 1)]
+
+
+def auto_limits(curves, margin=0.1):
+    """Y limits for (x_values, y_values) curves with poles, or None to autoscale.
+
+    Near a pole the samples run off towards infinity, which would squash
+    the rest of the plot; the limits then cover the typical heights.
+    """
+    curves = [(xs, ys) for xs, ys in curves if len(xs) > 1 and np.isfinite(ys).any()]
+    if not curves:
+        return None
+    spreads = [_spread(xs, ys) for xs, ys in curves]
+    low = min(spread[0] for spread in spreads)
+    high = max(spread[1] for spread in spreads)
+    lowest = min(np.nanmin(ys) for _, ys in curves)
+    highest = max(np.nanmax(ys) for _, ys in curves)
+    spread = high - low
+    if spread <= 0 or highest - lowest <= 10 * spread:
+        return None
+    padding = spread * margin
+    return low - padding, high + padding
+
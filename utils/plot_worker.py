@@ -0,0 +1,71 @@
+import threading
+
+from utils.calculations import sample_function
+
+
+class PlotWorker:
+    """Samples plot functions on a background thread, latest request only.
+
+    Every request bumps a generation counter. The worker runs only the
+    newest request and checks the counter between tiles, so work for a
+    request the user has already superseded (by editing or panning again)
+    stops early and is dropped. Poll result(generation) from the Tk loop;
+    ``progress`` is the fraction of the running request done.
+    """
+
+    def __init__(self, tiles):
+        self.tiles = tiles
+        self.generation = 0
+        self.pending = None
+        self.finished = None
+        self.progress = 0.0
+        self.condition = threading.Condition()
+        self.thread = threading.Thread(target=self.run, daemon=True)
+        self.thread.start()
+
+    def request(self, functions, x_min, x_max, pixels, x_step=None):
+        """Queue sampling of function strings; returns the request's generation."""
+        with self.condition:
+            self.generation += 1
+            self.pending = (self.generation, list(functions), x_min, x_max, pixels, x_step)
+            self.progress = 0.0
+            self.condition.notify()
+            return self.generation
+
+    def cancel(self):
+        with self.condition:
+            self.generation += 1
+            self.pending = None
+
+    def result(self, generation):
+        """Samples for each function (None where it failed), once ready."""
+        with self.condition:
+            if self.finished is not None and self.finished[0] == generation:
+                return self.finished[1]
+        return None
+
+    def stale(self, generation):
+        return generation != self.generation
+
+    def run(self):
+        while True:
+            with self.condition:
+                while self.pending is None:
+                    self.condition.wait()
+                generation, functions, x_min, x_max, pixels, x_step = self.pending
+                self.pending = None
+
+            results = []
+            for number, func_str in enumerate(functions):
+                def progress(done, total, number=number):
+                    self.progress = (number + done / total) / len(functions)
+
+                samples = sample_function(func_str, x_min, x_max, pixels, x_step, self.tiles,
+                                          lambda: self.stale(generation), progress)
+                if self.stale(generation):
+                    break
+                results.append(samples)
+            else:
+                with self.condition:
+                    if not self.stale(generation):
+                        self.finished = (generation, results)
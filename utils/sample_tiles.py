@@ -0,0 +1,109 @@
+import collections
+import math
+import threading
+
+import numpy as np
+
+from utils.plot_sampling import POINTS_PER_PIXEL, adaptive_sample
+
+# Most memory the cached samples may use
+TILE_CACHE_BYTES = 32 * 1024 * 1024
+
+# A view spans this many to twice as many tiles
+TILES_PER_VIEW = 4
+
+# Points in a tile's first, uniform pass
+TILE_FIRST_PASS = 17
+
+
+class SampleTileCache:
+    """Adaptive samples of plot functions, cut into tiles along x like a map.
+
+    At each zoom level the x axis is divided into tiles of a power-of-two
+    width, chosen so a view spans four to eight of them, and each tile is
+    sampled on its own with a budget matched to the pixels it covers.
+    Tiles are cached by (expression, level, tile), least recently used
+    first out once the cache is over its memory budget. Replotting the
+    same view, panning, or adding another function only evaluates the
+    tiles that are missing.
+    """
+
+    def __init__(self, budget=TILE_CACHE_BYTES):
+        self.budget = budget
+        self.tiles = collections.OrderedDict()
+        self.size = 0
+        self.lock = threading.Lock()
+
+    def clear(self):
+        with self.lock:
+            self.tiles.clear()
+            self.size = 0
+
+    def level(self, x_min, x_max, pixels, x_step=None):
+        """(tile width exponent, points per tile, first pass points) for a view."""
+        width = x_max - x_min
+        exponent = math.floor(math.log2(width / TILES_PER_VIEW))
+        tile_pixels = max(pixels, 100) * 2.0 ** exponent / width
+        # Powers of two, so small changes in size reuse the same tiles
+        points = 2 ** max(math.ceil(math.log2(tile_pixels * POINTS_PER_PIXEL)), 5)
+        first = TILE_FIRST_PASS
+        if x_step:
+            # A coarser step only makes the first pass coarser
+            first = max(min(math.ceil(2.0 ** exponent / x_step) + 1, first), 2)
+        return exponent, points, first
+
+    def sample(self, function, x_min, x_max, pixels, x_step=None, cancelled=None, progress=None):
+        """Sample a compiled expression over [x_min, x_max] for a plot pixels wide.
+
+        Returns (x_values, y_values), reaching just past both ends, or None
+        if cancelled() turned true between tiles. progress(done, total) is
+        called as tiles complete.
+        """
+        if not x_max > x_min:
+            raise ValueError("X max must be greater than X min")
+        exponent, points, first = self.level(x_min, x_max, pixels, x_step)
+        tile_width = 2.0 ** exponent
+        first_tile = math.floor(x_min / tile_width)
+        last_tile = max(math.ceil(x_max / tile_width) - 1, first_tile)
+
+        x_pieces = []
+        y_pieces = []
+        for index in range(first_tile, last_tile + 1):
+            if cancelled is not None and cancelled():
+                return None
+            xs, ys = self.tile(function, (exponent, points, first), index)
+            if progress is not None:
+                progress(index - first_tile + 1, last_tile - first_tile + 1)
+            if x_pieces:
+                # Each tile starts where the previous one ended
+                xs, ys = xs[1:], ys[1:]
+            x_pieces.append(xs)
+            y_pieces.append(ys)
+        xs = np.concatenate(x_pieces)
+        ys = np.concatenate(y_pieces)
+
+        start = max(np.searchsorted(xs, x_min, "right") - 1, 0)
+        end = np.searchsorted(xs, x_max, "left") + 1
+        return xs[start:end], ys[start:end]
+
+    def tile(self, function, level, index):
+        key = (function.text, level, index)
+        with self.lock:
+            samples = self.tiles.get(key)
+            if samples is not None:
+                self.tiles.move_to_end(key)
+                return samples
+
+        exponent, points, first = level
+        tile_width = 2.0 ** exponent
+        samples = adaptive_sample(function, index * tile_width, (index + 1) * tile_width,
+                                  max_points=points, initial_points=first)
+
+        with self.lock:
+            if key not in self.tiles:
+                self.tiles[key] = samples
+                self.size += samples[0].nbytes + samples[1].nbytes
+            while self.size > self.budget and len(self.tiles) > 1:
+                _, (xs, ys) = self.tiles.popitem(last=False)
+                self.size -= xs.nbytes + ys.nbytes
+        return samples
@@ -0,0 +1,311 @@
+import os
+import sqlite3
+import threading
+
+from utils.history_entry import HistoryEntry
+from utils.history_sort import sort_value
+from utils.history_stores import read_json_snapshot
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS history (
+    seq INTEGER PRIMARY KEY,
+    id TEXT NOT NULL UNIQUE,
+    timestamp TEXT NOT NULL,
+    type TEXT NOT NULL,
+    input TEXT NOT NULL,
+    result TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS history_type_timestamp ON history (type, timestamp);
+CREATE INDEX IF NOT EXISTS history_timestamp ON history (timestamp);
+"""
+
+# Sort keys for inputs and results, as utils.history_sort.sort_value orders
+# them: numbers numerically, ahead of text ignoring case. They are plain
+# columns filled on insert, so any SQLite client can use the database.
+SORT_COLUMNS_MIGRATION = [
+    # Left by earlier versions; the last two were indexed on functions
+    # only this module defines, which other clients cannot write through
+    "DROP INDEX IF EXISTS history_input",
+    "DROP INDEX IF EXISTS history_result",
+    "DROP INDEX IF EXISTS history_input_sort",
+    "DROP INDEX IF EXISTS history_result_sort",
+    # Recreated by FTS_SCHEMA to fire on input and result changes only,
+    # so the backfill below does not reindex every row
+    "DROP TRIGGER IF EXISTS history_fts_update",
+    "ALTER TABLE history ADD COLUMN input_number REAL",
+    "ALTER TABLE history ADD COLUMN input_text TEXT",
+    "ALTER TABLE history ADD COLUMN result_number REAL",
+    "ALTER TABLE history ADD COLUMN result_text TEXT",
+]
+SORT_INDEXES = [
+    "CREATE INDEX history_input_sort ON history "
+    "(input_number IS NULL, input_number, input_text, timestamp)",
+    "CREATE INDEX history_result_sort ON history "
+    "(result_number IS NULL, result_number, result_text, timestamp)",
+]
+
+# The trigram tokenizer gives substring matches, so "sin(" or "EUR" match
+# anywhere inside an input or result rather than only whole words
+FTS_SCHEMA = """
+CREATE VIRTUAL TABLE IF NOT EXISTS history_fts USING fts5(
+    input, result, content='history', content_rowid='seq', tokenize='trigram'
+);
+CREATE TRIGGER IF NOT EXISTS history_fts_insert AFTER INSERT ON history BEGIN
+    INSERT INTO history_fts (rowid, input, result) VALUES (new.seq, new.input, new.result);
+END;
+CREATE TRIGGER IF NOT EXISTS history_fts_delete AFTER DELETE ON history BEGIN
+    INSERT INTO history_fts (history_fts, rowid, input, result)
+    VALUES ('delete', old.seq, old.input, old.result);
+END;
+CREATE TRIGGER IF NOT EXISTS history_fts_update AFTER UPDATE OF input, result ON history BEGIN
+    INSERT INTO history_fts (history_fts, rowid, input, result)
+    VALUES ('delete', old.seq, old.input, old.result);
+    INSERT INTO history_fts (rowid, input, result) VALUES (new.seq, new.input, new.result);
+END;
+"""
+
+# PRAGMA user_version flags: the legacy JSON history has been migrated,
+# and the sort key columns have been added
+MIGRATED_JSON = 1
+MIGRATED_SORT_COLUMNS = 2
+
+# Columns query() can order by, as the terms to sort on before the timestamp
+ORDER_COLUMNS = {
+    "time": (),
+    "type": ("h.type",),
+    "input": ("h.input_number IS NULL", "h.input_number", "h.input_text"),
+    "result": ("h.result_number IS NULL", "h.result_number", "h.result_text"),
+}
+
+INSERT_SQL = """
+INSERT INTO history (id, timestamp, type, input, result,
+                     input_number, input_text, result_number, result_text)
+VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
+"""
+
+# Upsert rather than INSERT OR REPLACE so the FTS update trigger fires
+UPSERT_SQL = INSERT_SQL + """
+ON CONFLICT (id) DO UPDATE SET
+    timestamp = excluded.timestamp, type = excluded.type,
+    input = excluded.input, result = excluded.result,
+    input_number = excluded.input_number, input_text = excluded.input_text,
+    result_number = excluded.result_number, result_text = excluded.result_text
+"""
+
+INSERT_NEW_SQL = INSERT_SQL.replace("INSERT INTO", "INSERT OR IGNORE INTO")
+
+
+def _sort_number(value):
+    # The numeric part of sort_value(), or NULL for text
+    kind, number, _ = sort_value(value)
+    return None if kind else number
+
+
+def _sort_text(value):
+    # The text part of sort_value(), or NULL for numbers
+    kind, _, text = sort_value(value)
+    return text if kind else None
+
+
+def _row_to_entry(row):
+    # The timestamp string is parsed lazily by HistoryEntry
+    return HistoryEntry(row[0], row[1], row[2], row[3], row[4])
+
+
+def _entry_to_row(entry):
+    input_text = str(entry["input"])
+    result_text = str(entry["result"])
+    return (
+        entry["id"],
+        entry.isoformat(),
+        entry["type"],
+        input_text,
+        result_text,
+        _sort_number(input_text),
+        _sort_text(input_text),
+        _sort_number(result_text),
+        _sort_text(result_text)
+    )
+
+
+class SqliteHistoryStore:
+    """Stores history in an SQLite database.
+
+    The database keeps every entry ever recorded; the in-memory history is
+    only a window of the most recent ``load_limit`` entries. Filters and
+    searches run as indexed queries through ``query``.
+    """
+
+    # Trimming the in-memory window must not delete rows from the database
+    keeps_full_history = True
+    needs_full_history = False
+
+    def __init__(self, db_file, legacy_json_file=None, load_limit=1000):
+        self.db_file = db_file
+        self.load_limit = load_limit
+        self.lock = threading.Lock()
+
+        # The currency converter records entries from its fetch thread
+        self.conn = sqlite3.connect(db_file, check_same_thread=False)
+        self.conn.executescript(SCHEMA)
+        self._add_sort_columns()
+        try:
+            self.conn.executescript(FTS_SCHEMA)
+            self.has_fts = True
+        except sqlite3.OperationalError:
+            # SQLite built without FTS5 or the trigram tokenizer (< 3.34);
+            # searches fall back to LIKE
+            self.has_fts = False
+        self.conn.commit()
+
+        if legacy_json_file:
+            self._migrate_json(legacy_json_file)
+
+    def _add_sort_columns(self):
+        # One transaction, so an interrupted migration is simply run again
+        version = self.conn.execute("PRAGMA user_version").fetchone()[0]
+        if version & MIGRATED_SORT_COLUMNS:
+            return
+        self.conn.execute("BEGIN")
+        try:
+            for statement in SORT_COLUMNS_MIGRATION:
+                self.conn.execute(statement)
+            rows = self.conn.execute("SELECT seq, input, result FROM history").fetchall()
+            self.conn.executemany(
+                "UPDATE history SET input_number = ?, input_text = ?, "
+                "result_number = ?, result_text = ? WHERE seq = ?",
+                [(_sort_number(input_text), _sort_text(input_text),
+                  _sort_number(result_text), _sort_text(result_text), seq)
+                 for seq, input_text, result_text in rows]
+            )
+            for statement in SORT_INDEXES:
+                self.conn.execute(statement)
+            self.conn.execute(f"PRAGMA user_version = {version | MIGRATED_SORT_COLUMNS}")
+            self.conn.commit()
+        except Exception:
+            self.conn.rollback()
+            raise
+
+    def _migrate_json(self, json_file):
+        # Import an existing JSON history the first time the database is
+        # used, and only then: a database emptied by Clear History stays empty
+        with self.lock:
+            version = self.conn.execute("PRAGMA user_version").fetchone()[0]
+            if version & MIGRATED_JSON:
+                return
+            already_used = self.conn.execute("SELECT 1 FROM history LIMIT 1").fetchone()
+            entries = []
+            if not already_used and os.path.exists(json_file):
+                try:
+                    entries = read_json_snapshot(json_file)
+                except Exception as e:
+                    # Leave the version alone so the next launch tries again
+                    print(f"Error migrating history: {str(e)}")
+                    return
+            with self.conn:
+                self.conn.executemany(INSERT_NEW_SQL, [_entry_to_row(entry) for entry in entries])
+                self.conn.execute(f"PRAGMA user_version = {version | MIGRATED_JSON}")
+
+    def load(self):
+        return self.query(limit=self.load_limit, newest_first=True)[::-1]
+
+    def query(self, calculator_type=None, search=None, since=None, until=None,
+              limit=None, offset=0, newest_first=False, order_by="time"):
+        """Return entries matching the given filters, oldest first by default.
+
+        order_by sorts by another column (ties in time order);
+        newest_first reverses whichever order is used.
+        """
+        sql = "SELECT h.id, h.timestamp, h.type, h.input, h.result FROM history h"
+        conditions = []
+        params = []
+
+        if search:
+            # Trigrams need at least three characters to match
+            if self.has_fts and len(search) >= 3:
+                sql += " JOIN history_fts ON history_fts.rowid = h.seq"
+                conditions.append("history_fts MATCH ?")
+                # Quote the text so operators in calculator input are literal
+                params.append('"' + search.replace('"', '""') + '"')
+            else:
+                conditions.append("(h.input LIKE ? OR h.result LIKE ?)")
+                params.extend([f"%{search}%", f"%{search}%"])
+        if calculator_type:
+            conditions.append("h.type = ?")
+            params.append(calculator_type)
+        if since is not None:
+            conditions.append("h.timestamp >= ?")
+            params.append(since.isoformat())
+        if until is not None:
+            conditions.append("h.timestamp < ?")
+            params.append(until.isoformat())
+
+        if conditions:
+            sql += " WHERE " + " AND ".join(conditions)
+        direction = " DESC" if newest_first else ""
+        order = [term + direction for term in ORDER_COLUMNS[order_by]]
+        order += [f"h.timestamp{direction}", f"h.seq{direction}"]
+        sql += " ORDER BY " + ", ".join(order)
+        if limit is not None:
+            sql += " LIMIT ? OFFSET ?"
+            params.extend([limit, offset])
+
+        with self.lock:
+            rows = self.conn.execute(sql, params).fetchall()
+        return [_row_to_entry(row) for row in rows]
+
+    def count(self, calculator_type=None):
+        with self.lock:
+            if calculator_type:
+                row = self.conn.execute("SELECT COUNT(*) FROM history WHERE type = ?", (calculator_type,)).fetchone()
+            else:
+                row = self.conn.execute("SELECT COUNT(*) FROM history").fetchone()
+        return row[0]
+
+    def append(self, entry, history, trimmed_ids=()):
+        with self.lock, self.conn:
+            self.conn.execute(UPSERT_SQL, _entry_to_row(entry))
+
+    def insert_new(self, entries):
+        """Insert the entries whose ids are not stored yet, in one transaction.
+
+        Returns how many were inserted.
+        """
+        with self.lock, self.conn:
+            cursor = self.conn.executemany(INSERT_NEW_SQL, (_entry_to_row(entry) for entry in entries))
+            return max(cursor.rowcount, 0)
+
+    def append_many(self, entries):
+        """Upsert many entries in one transaction."""
+        with self.lock, self.conn:
+            self.conn.executemany(UPSERT_SQL, (_entry_to_row(entry) for entry in entries))
+
+    def remove(self, entry_ids, history):
+        with self.lock, self.conn:
+            self.conn.executemany("DELETE FROM history WHERE id = ?", [(entry_id,) for entry_id in entry_ids])
+
+    def clear(self):
+        with self.lock, self.conn:
+            self.conn.execute("DELETE FROM history")
+
+    def save(self, history):
+        # The database is the source of truth; saving upserts the given entries
+        with self.lock, self.conn:
+            self.conn.executemany(UPSERT_SQL, [_entry_to_row(entry) for entry in history])
+
+    def apply_batch(self, ops, history):
+        # Group commit: the whole batch runs in one transaction
+        with self.lock, self.conn:
+            for op in ops:
+                if op[0] == "append":
+                    self.conn.execute(UPSERT_SQL, _entry_to_row(op[1]))
+                elif op[0] == "remove":
+                    self.conn.executemany("DELETE FROM history WHERE id = ?", [(entry_id,) for entry_id in op[1]])
+                elif op[0] == "clear":
+                    self.conn.execute("DELETE FROM history")
+                elif op[0] == "save":
+                    self.conn.executemany(UPSERT_SQL, [_entry_to_row(entry) for entry in history])
+
+    def close(self):
+        with self.lock:
+            self.conn.close()
@@ -0,0 +1,169 @@
+import array
+import bisect
+
+from utils.history_entry import type_code
+
+
+def trigrams(text):
+    return {text[i:i + 3] for i in range(len(text) - 2)}
+
+
+def search_text(entry):
+    """The lowercased text an entry is searched by."""
+    return f"{entry.input}\n{entry.result}".lower()
+
+
+class TrigramIndex:
+    """Substring index over entry inputs and results.
+
+    Every entry gets a document number in insertion order, and each trigram
+    of its text maps to an array of the document numbers containing it. A
+    search only checks the documents listed under the query's rarest
+    trigram, newest or oldest first, stopping at the limit. Queries shorter
+    than three characters fall back to a scan.
+
+    Removed entries leave a hole that is skipped; the index is rebuilt once
+    most documents are holes.
+    """
+
+    def __init__(self):
+        self.invalidate()
+
+    def invalidate(self):
+        self.valid = False
+        self.docs = []
+        self.texts = []
+        self.doc_of = {}
+        self.postings = {}
+        self.dead = 0
+
+    def build(self, entries):
+        """Rebuild the index from entries, oldest first."""
+        self.invalidate()
+        for entry in entries:
+            self._add(entry)
+        self.valid = True
+
+    def add(self, entry):
+        if self.valid:
+            self._add(entry)
+
+    def remove(self, entry):
+        if self.valid:
+            self._remove(entry._id)
+
+    def _add(self, entry):
+        if entry._id in self.doc_of:
+            self._remove(entry._id)
+
+        doc = len(self.docs)
+        text = search_text(entry)
+        self.docs.append(entry)
+        self.texts.append(text)
+        self.doc_of[entry._id] = doc
+
+        postings = self.postings
+        for gram in trigrams(text):
+            posting = postings.get(gram)
+            if posting is None:
+                posting = postings[gram] = array.array("I")
+            posting.append(doc)
+
+    def _remove(self, key):
+        doc = self.doc_of.pop(key, None)
+        if doc is None:
+            return
+        self.docs[doc] = None
+        self.texts[doc] = None
+        self.dead += 1
+
+        if self.dead > 1024 and self.dead * 2 > len(self.docs):
+            self.build([entry for entry in self.docs if entry is not None])
+
+    def search(self, text, calculator_type=None, limit=None, newest_first=False):
+        """Entries whose input or result contains text, case-insensitively."""
+        # A rebuild replaces these lists rather than changing them, so a
+        # search running alongside a writer stays consistent
+        docs, texts, postings = self.docs, self.texts, self.postings
+
+        text = text.lower()
+        grams = trigrams(text)
+        if grams:
+            # Checking the rarest trigram's documents directly is cheaper
+            # than intersecting postings, and keeps them in order for limit
+            candidates = min((postings.get(gram, ()) for gram in grams), key=len)
+        else:
+            candidates = range(len(docs))
+        if newest_first:
+            candidates = reversed(candidates)
+
+        code = type_code(calculator_type) if calculator_type else None
+        results = []
+        for doc in candidates:
+            entry = docs[doc]
+            if entry is None or (code is not None and entry.type_code != code):
+                continue
+            # The other trigrams may be missing or out of order
+            if text in texts[doc]:
+                results.append(entry)
+                if limit is not None and len(results) >= limit:
+                    break
+        return results
+
+
+class SegmentTrigramIndex:
+    """Trigram postings over archive segments, kept in memory.
+
+    The entries of each indexed segment get consecutive document numbers,
+    and each trigram maps to the documents containing it. A search looks
+    up the rarest trigram of the query and yields (segment path, positions)
+    so that only segments with candidates are decoded, to check the match.
+    A removed segment is forgotten but its documents stay in the postings,
+    skipped, since segments are only removed by rare rewrites.
+    """
+
+    def __init__(self):
+        self.postings = {}
+        self.starts = []
+        self.paths = []
+        self.segment_of = {}
+        self.documents = 0
+        self.ready = False
+
+    def __contains__(self, path):
+        return path in self.segment_of
+
+    def add_segment(self, path, entries):
+        if path in self.segment_of:
+            return
+        self.segment_of[path] = len(self.paths)
+        self.starts.append(self.documents)
+        self.paths.append(path)
+
+        postings = self.postings
+        for document, entry in enumerate(entries, self.documents):
+            for gram in trigrams(search_text(entry)):
+                posting = postings.get(gram)
+                if posting is None:
+                    posting = postings[gram] = array.array("I")
+                posting.append(document)
+        self.documents += len(entries)
+
+    def remove_segment(self, path):
+        segment = self.segment_of.pop(path, None)
+        if segment is not None:
+            self.paths[segment] = None
+
+    def candidates(self, text):
+        """{segment path: [positions]} of entries that may contain text.
+
+        text must be lowercase and at least three characters long.
+        """
+        posting = min((self.postings.get(gram, ()) for gram in trigrams(text)), key=len)
+        found = {}
+        for document in posting:
+            segment = bisect.bisect_right(self.starts, document) - 1
+            path = self.paths[segment]
+            if path is not None:
+                found.setdefault(path, []).append(document - self.starts[segment])
+        return found
@@ -0,0 +1,193 @@
+import atexit
+import threading
+import time
+
+# Durability modes for WriteBehindStore
+EVERY_N = "every_n"    # Flush once batch_size operations are queued
+EVERY_T = "every_t"    # Flush queued operations every interval seconds
+ON_EXIT = "on_exit"    # Only flush on explicit flush() or close()
+
+DURABILITY_MODES = (EVERY_N, EVERY_T, ON_EXIT)
+
+
+class WriteBehindStore:
+    """Queues store writes and group-commits them on a background thread.
+
+    Wraps another history store so add/delete/clear return immediately on
+    the calling (usually Tk) thread. Queued operations are handed to the
+    wrapped store in one batch, so a journal gets one write per batch, SQLite
+    one transaction and the JSON store one rewrite.
+    """
+
+    def __init__(self, inner, durability=EVERY_T, batch_size=50, interval=1.0):
+        if durability not in DURABILITY_MODES:
+            raise ValueError(f"Unknown durability mode: {durability}")
+
+        self.inner = inner
+        self.durability = durability
+        self.batch_size = batch_size
+        self.interval = interval
+
+        self.cond = threading.Condition()
+        self.pending = []
+        self.history = []
+        self.flush_requested = False
+        self.flushing = False
+        self.closed = False
+        # When the oldest queued operation was queued, for EVERY_T
+        self.oldest_pending_time = None
+
+        # Counters
+        self.flush_count = 0
+        self.ops_written = 0
+        self.last_flush_ms = 0.0
+        self.max_flush_ms = 0.0
+        self.total_flush_ms = 0.0
+
+        # Reads must see queued writes, so flush before delegating queries
+        if hasattr(inner, "query"):
+            self.query = self._query
+
+        self.thread = threading.Thread(target=self._run, daemon=True)
+        self.thread.start()
+        atexit.register(self.close)
+
+    def __getattr__(self, name):
+        # Expose the wrapped store's attributes (e.g. keeps_full_history)
+        return getattr(self.inner, name)
+
+    def load(self):
+        return self.inner.load()
+
+    def append(self, entry, history, trimmed_ids=()):
+        self._enqueue(("append", entry, list(trimmed_ids)), history)
+
+    def remove(self, entry_ids, history):
+        self._enqueue(("remove", list(entry_ids)), history)
+
+    def clear(self):
+        self._enqueue(("clear",), [])
+
+    def save(self, history):
+        self._enqueue(("save",), history)
+
+    def _enqueue(self, op, history):
+        with self.cond:
+            if self.closed:
+                raise RuntimeError("History store is closed")
+            self.pending.append(op)
+            self.history = history
+            if self.durability == EVERY_N and len(self.pending) >= self.batch_size:
+                self.cond.notify_all()
+            elif self.durability == EVERY_T and len(self.pending) == 1:
+                # Wake the writer to start timing this batch
+                self.oldest_pending_time = time.monotonic()
+                self.cond.notify_all()
+
+    def _query(self, *args, **kwargs):
+        self.flush()
+        return self.inner.query(*args, **kwargs)
+
+    @property
+    def queue_depth(self):
+        with self.cond:
+            return len(self.pending)
+
+    def stats(self):
+        """Return queue depth and flush latency counters."""
+        with self.cond:
+            return {
+                "durability": self.durability,
+                "queue_depth": len(self.pending),
+                "flushes": self.flush_count,
+                "ops_written": self.ops_written,
+                "last_flush_ms": self.last_flush_ms,
+                "max_flush_ms": self.max_flush_ms,
+                "avg_flush_ms": self.total_flush_ms / self.flush_count if self.flush_count else 0.0
+            }
+
+    def _ready(self):
+        # Called with the condition held
+        if not self.pending:
+            return False
+        if self.flush_requested or self.closed:
+            return True
+        if self.durability == EVERY_N:
+            return len(self.pending) >= self.batch_size
+        if self.durability == EVERY_T:
+            return time.monotonic() - self.oldest_pending_time >= self.interval
+        return False
+
+    def _run(self):
+        while True:
+            with self.cond:
+                while not self._ready():
+                    if self.closed:
+                        return
+                    if self.flush_requested:
+                        # Nothing pending; satisfy the flush immediately
+                        self.flush_requested = False
+                        self.cond.notify_all()
+                    timeout = None
+                    if self.durability == EVERY_T and self.pending:
+                        timeout = max(0.0, self.interval - (time.monotonic() - self.oldest_pending_time))
+                    self.cond.wait(timeout)
+
+                # History snapshots are immutable, so no copy is needed
+                ops = self.pending
+                history = self.history
+                self.pending = []
+                self.flushing = True
+
+            start = time.perf_counter()
+            try:
+                self._apply(ops, history)
+            except Exception as e:
+                print(f"Error saving history: {str(e)}")
+            elapsed_ms = (time.perf_counter() - start) * 1000
+
+            with self.cond:
+                self.flushing = False
+                self.flush_count += 1
+                self.ops_written += len(ops)
+                self.last_flush_ms = elapsed_ms
+                self.max_flush_ms = max(self.max_flush_ms, elapsed_ms)
+                self.total_flush_ms += elapsed_ms
+                if not self.pending:
+                    self.flush_requested = False
+                self.cond.notify_all()
+
+    def _apply(self, ops, history):
+        if hasattr(self.inner, "apply_batch"):
+            self.inner.apply_batch(ops, history)
+            return
+
+        for op in ops:
+            if op[0] == "append":
+                self.inner.append(op[1], history, op[2])
+            elif op[0] == "remove":
+                self.inner.remove(op[1], history)
+            elif op[0] == "clear":
+                self.inner.clear()
+            elif op[0] == "save":
+                self.inner.save(history)
+
+    def flush(self):
+        """Block until every queued operation has been written."""
+        with self.cond:
+            if not self.thread.is_alive():
+                return
+            self.flush_requested = True
+            self.cond.notify_all()
+            while self.pending or self.flushing:
+                self.cond.wait()
+
+    def close(self):
+        with self.cond:
+            if self.closed:
+                return
+            self.closed = True
+            self.cond.notify_all()
+        self.thread.join()
+        atexit.unregister(self.close)
+        self.inner.close()